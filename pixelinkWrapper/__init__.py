@@ -3,6 +3,37 @@ A Pixelink API Python wrapper package for Pixelink cameras
 """
 
 from . pixelink import PxLApi
+from . simulator import SimulatedApi, SimulatedCamera
+from . framePool import FrameGeometry, FramePool, getFrameGeometry, getFrameDescGeometry
+from . streamReader import StreamReader
+from . asyncCamera import AsyncCamera, CameraEvent
+from . batchFormatter import BatchFormatter
+from . compressedArchive import CompressedArchiveWriter, CompressedArchiveReader
+from . callbackQueue import CallbackQueue
+from . callbackStats import CallbackStats, Histogram
+from . streamHealth import StreamHealth
+from . featureCatalog import FeatureCatalog, FeatureInfo, getFeatureCatalog
+
+__all__ = ["PxLApi", "SimulatedApi", "SimulatedCamera", "FrameGeometry", "FramePool", "getFrameGeometry",
+           "getFrameDescGeometry", "StreamReader", "AsyncCamera", "CameraEvent",
+           "BatchFormatter", "CompressedArchiveWriter", "CompressedArchiveReader", "CallbackQueue",
+           "CallbackStats", "Histogram", "StreamHealth",
+           "FeatureCatalog", "FeatureInfo", "getFeatureCatalog"]
+
+# The following require NumPy
+try:
+    import numpy
+except ImportError:
+    pass
+else:
+    from . packedPixels import unpack10, unpack12, unpackFrame
+    from . demosaic import Demosaic, demosaic, demosaicFrame, getColorFilterArray
+    from . decompressionPipeline import DecompressionPipeline
+    from . rawRecording import RawRecordingWriter, RawRecordingReader
+    from . frameDescLog import FrameDescLog
+    from . nativeCallbackRing import NativeCallbackRing
+    __all__ += ["unpack10", "unpack12", "unpackFrame", "Demosaic", "demosaic", "demosaicFrame", "getColorFilterArray",
+                "DecompressionPipeline", "RawRecordingWriter", "RawRecordingReader", "FrameDescLog",
+                "NativeCallbackRing"]
 
-__all__ = ["PxLApi"]
 __version__ = "1.5.0"
@@ -0,0 +1,205 @@
+"""
+asyncio frame acquisition.
+
+getNextFrame is a blocking call, which can't be made on the thread running an asyncio event loop.
+An AsyncCamera therefore grabs frames on a dedicated acquisition thread, and hands each frame over
+to the event loop with loop.call_soon_threadsafe. Camera events, reported by the Pixelink API on a
+thread of its own, are handed over the same way.
+
+NumPy is required for this module.
+"""
+
+from ctypes import*
+from . pixelink import PxLApi
+from . framePool import FramePool
+import asyncio
+import collections
+import threading
+
+
+"""
+A camera event, as reported to an event callback: the event id (one of PxLApi.EventId), the time
+stamp of the event and its data, as bytes.
+"""
+CameraEvent = collections.namedtuple("CameraEvent", "eventId timestamp data")
+
+
+class AsyncCamera:
+    """
+    Acquires frames from the camera hCamera for coroutines running on an asyncio event loop:
+        async with AsyncCamera(hCamera) as camera:
+            frame, frameDesc = await camera.nextFrame()
+            async for frame, frameDesc in camera.frames():
+                ...
+    The frames are NumPy arrays from a FramePool of maxQueued + 2 buffers. At most maxQueued frames
+    wait to be read; when the consumer falls behind, the oldest of those are dropped (and counted in
+    framesDropped). A frame (and its frame descriptor) remains valid until the following call to
+    nextFrame.
+
+    With eventId, camera events with that id (PxLApi.EventId.ANY for all of them) can be awaited with
+    nextEvent or events.
+
+    An AsyncCamera must be started, and stopped, from a coroutine running on the event loop it is used with.
+    """
+
+    def __init__(self, hCamera, maxQueued=2, eventId=None, startStream=True):
+        assert 1 <= maxQueued
+        self.hCamera = hCamera
+        self.maxQueued = maxQueued
+        self.eventId = eventId
+        self.startStream = startStream
+        self.framesRead = 0
+        self.framesDropped = 0
+        self.errorCount = 0
+        self.lastError = PxLApi.ReturnCode.ApiSuccess
+        self._loop = None
+        self._thread = None
+        self._running = False
+        self._lock = threading.Lock()
+        self._framePool = None
+        self._queued = collections.deque()  # (frame, frameDesc) tuples waiting to be read
+        self._held = None                   # Frame last handed out
+        self._frameWaiter = None
+        self._events = None
+        self._eventCallback = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, excType, excValue, traceback):
+        await self.stop()
+
+    async def start(self):
+        """
+        Starts the acquisition thread (and the stream, with startStream), and registers the event
+        callback. Raises PxLApi.ApiError on failure.
+        """
+        if self._running:
+            return
+        self._loop = asyncio.get_running_loop()
+        if None == self._framePool:
+            self._framePool = FramePool(self.hCamera, count=self.maxQueued + 2, useNumPy=True)
+        self.lastError = PxLApi.ReturnCode.ApiSuccess
+
+        if None != self.eventId:
+            self._events = asyncio.Queue()
+            self._eventCallback = PxLApi._eventProcessFunction(self._onEvent)
+            ret = PxLApi.setEventCallback(self.hCamera, self.eventId, 0, self._eventCallback)
+            if not PxLApi.apiSuccess(ret[0]):
+                raise PxLApi.ApiError(ret[0], "setEventCallback")
+
+        if self.startStream:
+            ret = PxLApi.setStreamState(self.hCamera, PxLApi.StreamState.START)
+            if not PxLApi.apiSuccess(ret[0]):
+                raise PxLApi.ApiError(ret[0], "setStreamState")
+        self._running = True
+        self._thread = threading.Thread(target=self._acquire, name="AsyncCamera", daemon=True)
+        self._thread.start()
+
+    async def stop(self):
+        """
+        Stops the acquisition thread (and the stream, with startStream), and cancels the event callback.
+        """
+        self._running = False
+        # Stopping the stream also ends a getNextFrame the acquisition thread may be waiting in
+        if self.startStream:
+            PxLApi.setStreamState(self.hCamera, PxLApi.StreamState.STOP)
+        if None != self._thread:
+            await self._loop.run_in_executor(None, self._thread.join)
+            self._thread = None
+        if None != self._eventCallback:
+            PxLApi.setEventCallback(self.hCamera, self.eventId, 0, None)
+            self._eventCallback = None
+        self._wakeUp()
+
+    def isRunning(self):
+        return self._running
+
+    def _acquire(self):
+        while self._running:
+            # There are enough buffers for the queued frames, the one being read and the one being written
+            frame = self._framePool.acquire()
+            frameDesc = self._framePool.frameDesc(frame)
+            ret = PxLApi.getNextNumPyFrame(self.hCamera, frame, frameDesc)
+            if PxLApi.apiSuccess(ret[0]):
+                with self._lock:
+                    self.framesRead += 1
+                    self._queued.append((frame, frameDesc))
+                    if len(self._queued) > self.maxQueued:
+                        self.framesDropped += 1
+                        self._framePool.release(self._queued.popleft()[0])
+                self._loop.call_soon_threadsafe(self._wakeUp)
+                continue
+            self._framePool.release(frame)
+            if not self._running:
+                break # Stopped while waiting for the frame
+            self.errorCount += 1
+            self.lastError = ret[0]
+            if ret[0] in PxLApi._fatalStreamReturnCodes:
+                self._running = False
+                self._loop.call_soon_threadsafe(self._wakeUp)
+                break
+
+    def _wakeUp(self):
+        # Runs on the event loop
+        if None != self._frameWaiter and not self._frameWaiter.done():
+            self._frameWaiter.set_result(None)
+
+    def _onEvent(self, hCamera, eventId, eventTimestamp, numDataBytes, data, userData):
+        # Runs on a thread of the Pixelink API
+        eventData = string_at(data, numDataBytes) if bool(data) else b""
+        self._loop.call_soon_threadsafe(self._events.put_nowait, CameraEvent(eventId, eventTimestamp, eventData))
+        return PxLApi.ReturnCode.ApiSuccess
+
+    async def nextFrame(self):
+        """
+        Returns the (frame, frameDesc) of the oldest frame not read yet, waiting for one to arrive.
+        Raises PxLApi.ApiError if the acquisition ended because of an error and all frames were read,
+        or if the camera is stopped.
+        """
+        if self._held is not None:
+            self._framePool.release(self._held)
+            self._held = None
+        while True:
+            with self._lock:
+                if self._queued:
+                    frame, frameDesc = self._queued.popleft()
+                    self._held = frame
+                    return (frame, frameDesc)
+            if not self._running:
+                rc = self.lastError if not PxLApi.apiSuccess(self.lastError) else PxLApi.ReturnCode.ApiStreamStopped
+                raise PxLApi.ApiError(rc, "nextFrame")
+            self._frameWaiter = self._loop.create_future()
+            try:
+                await self._frameWaiter
+            finally:
+                self._frameWaiter = None
+
+    async def frames(self):
+        """
+        An asynchronous generator of (frame, frameDesc) tuples, ending when the camera is stopped.
+        Raises PxLApi.ApiError if the acquisition ends because of an error.
+        """
+        while True:
+            try:
+                frame = await self.nextFrame()
+            except PxLApi.ApiError:
+                if PxLApi.apiSuccess(self.lastError):
+                    return
+                raise
+            yield frame
+
+    async def nextEvent(self):
+        """
+        Returns the CameraEvent of the oldest event not read yet, waiting for one to be reported.
+        """
+        assert None != self._events, "AsyncCamera was not started with an eventId"
+        return await self._events.get()
+
+    async def events(self):
+        """
+        An asynchronous generator of CameraEvent tuples.
+        """
+        while True:
+            yield await self.nextEvent()
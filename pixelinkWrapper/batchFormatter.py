@@ -0,0 +1,71 @@
+"""
+Formatting of bursts of frames on a number of threads.
+
+formatImage formats one frame at a time on the calling thread. A BatchFormatter formats a sequence
+of frames into images with a pool of threads instead; as the Pixelink API is called through ctypes,
+which releases the GIL for the duration of the call, the frames are formatted in parallel. The
+results are delivered in the order of the frames, and no more than maxPending frames are in
+progress at a time, so that a long burst can be streamed through without holding all of its
+images in memory.
+"""
+
+from . pixelink import PxLApi
+import collections
+import concurrent.futures
+import os
+
+
+class BatchFormatter:
+    """
+    Formats frames into images of outputFormat (one of PxLApi.ImageFormat) on threads threads (by
+    default, one per CPU), with at most maxPending frames (by default, twice the number of threads)
+    in progress at a time.
+
+    The frames are given as a list, or any other iterable, of (frame, frameDesc) tuples, where
+    frame is a ctypes character buffer or a NumPy array. An iterable is only consumed as frames
+    are formatted, so frames can, for instance, be read from disk as they are needed. The frames
+    and their frame descriptors must not be reused by the iterable until they are formatted.
+    """
+    def __init__(self, outputFormat, threads=None, maxPending=None):
+        self.outputFormat = outputFormat
+        self.threads = threads if None != threads else (os.cpu_count() or 1)
+        self.maxPending = maxPending if None != maxPending else 2 * self.threads
+
+    def _formatFrame(self, frame, frameDesc):
+        if hasattr(frame, "ctypes"):
+            return PxLApi.formatNumPyImage(frame, frameDesc, self.outputFormat)
+        return PxLApi.formatImage(frame, frameDesc, self.outputFormat)
+
+    def _saveFrame(self, frame, frameDesc, fileName):
+        ret = self._formatFrame(frame, frameDesc)
+        if not PxLApi.apiSuccess(ret[0]):
+            return ret[0]
+        with open(fileName, "wb") as file:
+            file.write(ret[1])
+        return ret[0]
+
+    def _run(self, function, frames):
+        pending = collections.deque()
+        with concurrent.futures.ThreadPoolExecutor(self.threads) as executor:
+            for index, (frame, frameDesc) in enumerate(frames):
+                if len(pending) >= self.maxPending:
+                    yield pending.popleft().result()
+                pending.append(executor.submit(function, index, frame, frameDesc))
+            while pending:
+                yield pending.popleft().result()
+
+    def format(self, frames):
+        """
+        A generator of the formatted images of frames, in order. Like formatImage, it yields a tuple
+        of the return code and, on success, the formatted image for each frame.
+        """
+        return self._run(lambda index, frame, frameDesc: self._formatFrame(frame, frameDesc), frames)
+
+    def formatToFiles(self, frames, fileName):
+        """
+        Formats frames and saves each image to a file; fileName is formatted with the index of the frame
+        to name the file, e.g. "burst/frame{0:05d}.jpg". The images are written on the threads of the
+        formatter too. Returns a list of the return codes, one for each frame.
+        """
+        return list(self._run(lambda index, frame, frameDesc: self._saveFrame(frame, frameDesc, fileName.format(index)),
+                              frames))
@@ -0,0 +1,359 @@
+"""
+Benchmarks of the acquisition, conversion and callback paths of the wrapper.
+
+Each benchmark runs one operation over and over for a fixed time, against a camera or against the
+simulator (SimulatedApi), and reports:
+    framesPerSecond      - the operations (frames, or feature accesses) completed per second
+    megabytesPerSecond   - the frame data processed per second, for the operations on frames
+    latencyP50/P99/Max   - the time taken by an operation, in microseconds; for the callback
+                           benchmark, the time from the camera timestamp of a frame to its callback
+    allocationsPerFrame  - the memory blocks still allocated per operation at the end of the run
+                           (sys.getallocatedblocks), which shows the objects kept for every frame
+    errors               - the operations that failed; for the callback benchmark, the frames lost
+
+Run them from the command line, against the first camera found, or against a simulated camera:
+    python -m pixelinkWrapper.bench [--simulate] [--duration 2] [--json results.json] [benchmark ...]
+(or pixelinkBench, once the package is installed), or from Python with runBenchmarks. With --json,
+the results are also written as JSON, along with the versions and the camera they were taken with,
+so that the results of two versions of the wrapper can be compared.
+"""
+
+from ctypes import*
+from . pixelink import PxLApi
+from . callbackStats import CallbackStats, Histogram
+from . framePool import FramePool, getFrameGeometry
+from . simulator import SimulatedApi, SimulatedCamera
+import argparse
+import json
+import platform
+import sys
+import time
+
+
+class _Skipped(Exception):
+    """
+    Raised by a benchmark that can't be run with the camera, or without NumPy.
+    """
+    pass
+
+
+def _allocatedBlocks():
+    return sys.getallocatedblocks() if hasattr(sys, "getallocatedblocks") else None
+
+
+def _result(iterations, seconds, bytesPerFrame, latency, errors, blocks):
+    return {"iterations": iterations,
+            "seconds": seconds,
+            "framesPerSecond": iterations / seconds if seconds else None,
+            "megabytesPerSecond": iterations * bytesPerFrame / seconds / 1e6 if seconds and bytesPerFrame else None,
+            "latencyP50": latency.percentile(50),
+            "latencyP99": latency.percentile(99),
+            "latencyMax": latency.max,
+            "allocationsPerFrame": blocks / iterations if None != blocks and iterations else None,
+            "errors": errors}
+
+
+def _measure(operation, duration, bytesPerFrame=0, warmUp=10):
+    """
+    Calls operation, which returns a return code, for duration seconds after warmUp calls, and
+    returns the result.
+    """
+    for i in range(warmUp):
+        operation()
+    latency = Histogram()
+    perfCounter = time.perf_counter
+    iterations = errors = 0
+    blocks = _allocatedBlocks()
+    start = now = perfCounter()
+    end = start + duration
+    while now < end:
+        rc = operation()
+        done = perfCounter()
+        latency.record((done - now) * 1e6)
+        if not PxLApi.apiSuccess(rc):
+            errors += 1
+        iterations += 1
+        now = done
+    if None != blocks:
+        blocks = _allocatedBlocks() - blocks
+    return _result(iterations, now - start, bytesPerFrame, latency, errors, blocks)
+
+
+class _Stream:
+    """
+    Streams the camera for the duration of a with block.
+    """
+    def __init__(self, hCamera):
+        self.hCamera = hCamera
+
+    def __enter__(self):
+        ret = PxLApi.setStreamState(self.hCamera, PxLApi.StreamState.START)
+        if not PxLApi.apiSuccess(ret[0]):
+            raise PxLApi.ApiError(ret[0], "setStreamState")
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        PxLApi.setStreamState(self.hCamera, PxLApi.StreamState.STOP)
+
+
+def _grabFrame(hCamera):
+    # Returns a (frame, frameDesc) of the camera, frame being an aligned ctypes buffer
+    frame = FramePool(hCamera, count=1).acquire()
+    frameDesc = PxLApi.createFrameDesc()
+    with _Stream(hCamera):
+        ret = PxLApi.getNextFrame(hCamera, frame, frameDesc)
+    if not PxLApi.apiSuccess(ret[0]):
+        raise PxLApi.ApiError(ret[0], "getNextFrame")
+    return frame, frameDesc
+
+
+def _numPy():
+    try:
+        import numpy
+    except ImportError:
+        raise _Skipped("requires NumPy")
+    return numpy
+
+
+def benchGetNextFrame(hCamera, duration):
+    framePool = FramePool(hCamera, count=1)
+    frame = framePool.acquire()
+    frameDesc = PxLApi.createFrameDesc()
+    with _Stream(hCamera):
+        return _measure(lambda: PxLApi.getNextFrame(hCamera, frame, frameDesc)[0], duration, framePool.frameSize)
+
+
+def benchGetNextNumPyFrame(hCamera, duration):
+    _numPy()
+    framePool = FramePool(hCamera, count=1, useNumPy=True)
+    frame = framePool.acquire()
+    frameDesc = PxLApi.createFrameDesc()
+    with _Stream(hCamera):
+        return _measure(lambda: PxLApi.getNextNumPyFrame(hCamera, frame, frameDesc)[0], duration, framePool.frameSize)
+
+
+def benchCallback(hCamera, duration):
+    ret = getFrameGeometry(hCamera)
+    if not PxLApi.apiSuccess(ret[0]):
+        raise PxLApi.ApiError(ret[0], "getFrameGeometry")
+    frameSize = ret[1].frameSize()
+
+    def callback(hCamera, frameData, dataFormat, frameDesc, userData):
+        return PxLApi.ReturnCode.ApiSuccess
+
+    stats = CallbackStats()
+    ret = PxLApi.setCallback(hCamera, PxLApi.Callback.FRAME, 0, callback, stats=stats)
+    if not PxLApi.apiSuccess(ret[0]):
+        raise PxLApi.ApiError(ret[0], "setCallback")
+    try:
+        with _Stream(hCamera):
+            time.sleep(min(duration, 0.1)) # Warm up
+            stats.reset(hCamera)
+            blocks = _allocatedBlocks()
+            start = time.perf_counter()
+            time.sleep(duration)
+            callbacks = stats.callbacks
+            seconds = time.perf_counter() - start
+            if None != blocks:
+                blocks = _allocatedBlocks() - blocks
+    finally:
+        PxLApi.setCallback(hCamera, PxLApi.Callback.FRAME, 0, None)
+    result = _result(callbacks, seconds, frameSize, stats.latency, stats.framesLost, blocks)
+    result["callbackTimeP50"] = stats.callbackTime.percentile(50)
+    result["callbackTimeP99"] = stats.callbackTime.percentile(99)
+    return result
+
+
+def benchFormatImage(hCamera, duration):
+    frame, frameDesc = _grabFrame(hCamera)
+    return _measure(lambda: PxLApi.formatImage(frame, frameDesc, PxLApi.ImageFormat.BMP)[0], duration, len(frame))
+
+
+def benchDecompressFrame(hCamera, duration):
+    ret = PxLApi.getFeature(hCamera, PxLApi.FeatureId.COMPRESSION)
+    if not PxLApi.apiSuccess(ret[0]):
+        raise _Skipped("the camera does not support compression")
+    flags, params = ret[1], ret[2]
+    ret = PxLApi.setFeature(hCamera, PxLApi.FeatureId.COMPRESSION, PxLApi.FeatureFlags.MANUAL,
+                            [params[0], PxLApi.CompressionStrategy.PIXELINK10])
+    if not PxLApi.apiSuccess(ret[0]):
+        raise _Skipped("Pixelink10 compression can't be enabled")
+    try:
+        compressedFrame = FramePool(hCamera, count=1).acquire()
+        compressionDesc = create_string_buffer(PxLApi.CompressionDescSize.PIXELINK10)
+        with _Stream(hCamera):
+            ret = PxLApi.getNextCompressedFrame(hCamera, compressedFrame, compressionDesc)
+        if not PxLApi.apiSuccess(ret[0]):
+            raise PxLApi.ApiError(ret[0], "getNextCompressedFrame")
+        frameDesc = ret[1]
+        ret = PxLApi.decompressFrame(compressedFrame, frameDesc, compressionDesc)
+        if not PxLApi.apiSuccess(ret[0]):
+            raise PxLApi.ApiError(ret[0], "decompressFrame")
+        frameSize = ret[1]
+        frame = PxLApi.createByteAlignedBuffer(frameSize, 64)
+        return _measure(lambda: PxLApi.decompressFrame(compressedFrame, frameDesc, compressionDesc, frame)[0],
+                        duration, frameSize)
+    finally:
+        PxLApi.setFeature(hCamera, PxLApi.FeatureId.COMPRESSION, flags, params)
+
+
+def benchGetFeature(hCamera, duration):
+    return _measure(lambda: PxLApi.getFeature(hCamera, PxLApi.FeatureId.SHUTTER)[0], duration)
+
+
+def benchSetFeature(hCamera, duration):
+    ret = PxLApi.getFeature(hCamera, PxLApi.FeatureId.SHUTTER)
+    if not PxLApi.apiSuccess(ret[0]):
+        raise PxLApi.ApiError(ret[0], "getFeature")
+    params = ret[2]
+    return _measure(lambda: PxLApi.setFeature(hCamera, PxLApi.FeatureId.SHUTTER, PxLApi.FeatureFlags.MANUAL, params)[0],
+                    duration)
+
+
+def _benchUnpack(hCamera, duration, bitsPerPixel):
+    numpy = _numPy()
+    from . import packedPixels
+    ret = getFrameGeometry(hCamera)
+    if not PxLApi.apiSuccess(ret[0]):
+        raise PxLApi.ApiError(ret[0], "getFrameGeometry")
+    width, height = ret[1].width, ret[1].height
+    width -= width % 4 # Whole groups of pixels, for both 10 and 12 bits per pixel
+    packed = numpy.arange(packedPixels.packedRowSize(width, bitsPerPixel) * height, dtype=numpy.uint8)
+    out = numpy.empty((height, width), numpy.uint16)
+    unpack = packedPixels.unpack10 if 10 == bitsPerPixel else packedPixels.unpack12
+
+    def operation():
+        unpack(packed, width, height, out=out)
+        return PxLApi.ReturnCode.ApiSuccess
+
+    result = _measure(operation, duration, packed.nbytes)
+    result["compiled"] = packedPixels.haveCompiledUnpackers
+    return result
+
+
+def benchUnpack10(hCamera, duration):
+    return _benchUnpack(hCamera, duration, 10)
+
+
+def benchUnpack12(hCamera, duration):
+    return _benchUnpack(hCamera, duration, 12)
+
+
+"""
+The benchmarks, by name, in the order they are run
+"""
+benchmarks = {
+    "getNextFrame": benchGetNextFrame,
+    "getNextNumPyFrame": benchGetNextNumPyFrame,
+    "callback": benchCallback,
+    "formatImage": benchFormatImage,
+    "decompressFrame": benchDecompressFrame,
+    "getFeature": benchGetFeature,
+    "setFeature": benchSetFeature,
+    "unpack10": benchUnpack10,
+    "unpack12": benchUnpack12,
+}
+
+
+def runBenchmarks(hCamera, names=None, duration=2.0, progress=None):
+    """
+    Runs the benchmarks names (by default, all of them) on the camera hCamera, for duration seconds
+    each, and returns their results as a dictionary by name. A benchmark that can't be run has a
+    "skipped" reason as its result, and one that fails the return code as "error". progress, if given,
+    is called with the name and result of each benchmark as it completes.
+    """
+    results = {}
+    for name in (benchmarks if None == names else names):
+        try:
+            result = benchmarks[name](hCamera, duration)
+        except _Skipped as e:
+            result = {"skipped": str(e)}
+        except PxLApi.ApiError as e:
+            result = {"error": e.rc, "function": e.functionName}
+        results[name] = result
+        if None != progress:
+            progress(name, result)
+    return results
+
+
+def _format(value, format):
+    return "-" if None == value else format.format(value)
+
+
+def _printResult(name, result):
+    if "skipped" in result:
+        print("{0:<18} skipped: {1}".format(name, result["skipped"]))
+    elif "error" in result:
+        print("{0:<18} {1} failed! rc = {2}".format(name, result["function"], result["error"]))
+    else:
+        print("{0:<18} {1:>12} {2:>10} {3:>10} {4:>10} {5:>10} {6:>8}".format(
+            name, _format(result["framesPerSecond"], "{0:.1f}"), _format(result["megabytesPerSecond"], "{0:.1f}"),
+            _format(result["latencyP50"], "{0}"), _format(result["latencyP99"], "{0}"),
+            _format(result["allocationsPerFrame"], "{0:.2f}"), result["errors"]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="pixelinkBench", description="Benchmarks the pixelinkWrapper package.")
+    parser.add_argument("benchmarks", nargs="*", metavar="benchmark",
+                        help="the benchmarks to run (by default, all of them): " + ", ".join(benchmarks))
+    parser.add_argument("--simulate", action="store_true", help="benchmark a simulated camera, rather than a real one")
+    parser.add_argument("--serial", type=int, default=0, help="the serial number of the camera (by default, the first one found)")
+    parser.add_argument("--width", type=int, default=1280, help="the sensor width of the simulated camera")
+    parser.add_argument("--height", type=int, default=1024, help="the sensor height of the simulated camera")
+    parser.add_argument("--frame-rate", type=float, default=0.0,
+                        help="the frame rate of the simulated camera (by default, as fast as the frames are read)")
+    parser.add_argument("--duration", type=float, default=2.0, help="the time to run each benchmark for, in seconds")
+    parser.add_argument("--json", metavar="FILE", help="writes the results as JSON to FILE ('-' for the standard output)")
+    args = parser.parse_args(argv)
+    for name in args.benchmarks:
+        if name not in benchmarks:
+            parser.error("unknown benchmark {0}".format(name))
+
+    if args.simulate:
+        PxLApi.setApiBackend(SimulatedApi([SimulatedCamera(serialNumber=args.serial or 1000, sensorWidth=args.width,
+                                                           sensorHeight=args.height, frameRate=args.frame_rate)]))
+    ret = PxLApi.initialize(args.serial)
+    if not PxLApi.apiSuccess(ret[0]):
+        print("Could not initialize the camera! rc = %i" % ret[0], file=sys.stderr)
+        return 1
+    hCamera = ret[1]
+
+    try:
+        camera = {}
+        ret = PxLApi.getCameraInfo(hCamera)
+        if PxLApi.apiSuccess(ret[0]):
+            camera["model"] = ret[1].ModelName.decode("utf-8", "replace")
+            camera["serialNumber"] = ret[1].SerialNumber.decode("utf-8", "replace")
+            camera["firmwareVersion"] = ret[1].FirmwareVersion.decode("utf-8", "replace")
+        ret = getFrameGeometry(hCamera)
+        if PxLApi.apiSuccess(ret[0]):
+            camera.update(ret[1]._asdict())
+
+        quiet = "-" == args.json
+        if not quiet:
+            print("{0:<18} {1:>12} {2:>10} {3:>10} {4:>10} {5:>10} {6:>8}".format(
+                "benchmark", "frames/s", "MB/s", "p50 (us)", "p99 (us)", "allocs/fr", "errors"))
+        results = runBenchmarks(hCamera, args.benchmarks or None, args.duration, None if quiet else _printResult)
+    finally:
+        PxLApi.uninitialize(hCamera)
+
+    if None != args.json:
+        from . import __version__
+        document = {"wrapperVersion": __version__,
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "backend": "simulator" if args.simulate else "native",
+                    "camera": camera,
+                    "duration": args.duration,
+                    "results": results}
+        if quiet:
+            json.dump(document, sys.stdout, indent=2)
+            print()
+        else:
+            with open(args.json, "w") as file:
+                json.dump(document, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+Handing frames over from frame callbacks to consumer threads.
+
+Frame callbacks (PxLApi.Callback.FRAME and PREVIEW) are called on a thread of the Pixelink API, and
+the API can't deliver the next frame until the callback returns. Any processing done in a callback,
+even printing, therefore holds up the stream, and a Python callback has to take the GIL to run at all.
+
+A CallbackQueue registers a callback that does as little as possible: it copies the frame and its
+frame descriptor into a free buffer of a FramePool, puts the buffer on a queue and returns. Consumer
+threads then take the frames off the queue, at their own pace. When all of the buffers are queued,
+or in use, the incoming frame is dropped, and counted in framesDropped, rather than waited for.
+
+Nor does the callback call the API: when the frames stop fitting the buffers (because the frame
+geometry, or the data format of the callback, changed), it drops them and leaves it to the consumer
+to resize the FramePool, in get.
+"""
+
+from ctypes import*
+from . pixelink import PxLApi
+from . framePool import FramePool, getFrameDescGeometry
+import queue
+
+# Queued by the callback for the consumer to resize the frame pool
+_RESIZE = object()
+
+
+class CallbackQueue:
+    """
+    Queues the frames of the callback callbackType (PxLApi.Callback.FRAME or PREVIEW) of the camera
+    hCamera for consumers to get. At most maxQueued frames wait to be read. With startStream, the
+    stream of the camera is started when the queue is started, and stopped when it is stopped.
+
+    The frames are NumPy arrays from a FramePool of maxQueued + 1 buffers, sized for the data format
+    dataFormat of the callback (by default, the pixel format of the camera). PREVIEW callbacks
+    typically get RGB24 frames, whatever the pixel format of the camera; when dataFormat isn't that
+    of the callback, the first frames are dropped, until get has resized the pool for them. A frame
+    (and its frame descriptor) remains valid until the following call to get, so only one thread
+    should consume frames from a queue.
+
+    A CallbackQueue can be used as a context manager, which starts and stops it.
+    """
+    def __init__(self, hCamera, maxQueued=4, callbackType=PxLApi.Callback.FRAME, startStream=True,
+                 dataFormat=None):
+        assert 1 <= maxQueued
+        self.hCamera = hCamera
+        self.maxQueued = maxQueued
+        self.callbackType = callbackType
+        self.startStream = startStream
+        self.dataFormat = dataFormat
+        self.framesQueued = 0
+        self.framesDropped = 0
+        self._framePool = None
+        self._resizePending = False
+        self._queue = queue.SimpleQueue()
+        self._held = None # Frame last handed out
+        self._running = False
+        self._dataProcessFunction = PxLApi._dataProcessFunction(self._onFrame)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.stop()
+
+    def start(self):
+        """
+        Registers the callback (and starts the stream, with startStream). Raises PxLApi.ApiError on failure.
+        """
+        if self._running:
+            return
+        if None == self._framePool:
+            self._framePool = FramePool(self.hCamera, count=self.maxQueued + 1, useNumPy=True,
+                                        pixelFormat=self.dataFormat)
+        self._running = True
+        ret = PxLApi.setCallback(self.hCamera, self.callbackType, 0, self._dataProcessFunction)
+        if not PxLApi.apiSuccess(ret[0]):
+            self._running = False
+            raise PxLApi.ApiError(ret[0], "setCallback")
+        if self.startStream:
+            ret = PxLApi.setStreamState(self.hCamera, PxLApi.StreamState.START)
+            if not PxLApi.apiSuccess(ret[0]):
+                self.stop()
+                raise PxLApi.ApiError(ret[0], "setStreamState")
+
+    def stop(self):
+        """
+        Stops the stream (with startStream) and cancels the callback. Frames already queued can still
+        be read after that.
+        """
+        if not self._running:
+            return
+        if self.startStream:
+            PxLApi.setStreamState(self.hCamera, PxLApi.StreamState.STOP)
+        PxLApi.setCallback(self.hCamera, self.callbackType, 0, None)
+        self._running = False
+        self._queue.put(None) # Wakes up a consumer waiting in get
+
+    def isRunning(self):
+        return self._running
+
+    def _resizePool(self):
+        self._framePool.pixelFormat = self.dataFormat
+        self._framePool.resize()
+        self._resizePending = False
+
+    def _onFrame(self, hCamera, frameData, dataFormat, frameDesc, userData):
+        # Runs on a thread of the Pixelink API, so it must return as soon as possible, and can't
+        # call the API to resize the pool
+        frame = self._framePool.acquire(block=False, checkGeometry=False)
+        if frame is None:
+            self.framesDropped += 1
+            return PxLApi.ReturnCode.ApiSuccess
+        geometry = getFrameDescGeometry(frameDesc.contents)._replace(pixelFormat=dataFormat)
+        frameSize = geometry.frameSize()
+        if frameSize != frame.nbytes or geometry.numPyShape() != frame.shape:
+            # A frame of another geometry, or data format; the consumer resizes the pool for it
+            self._framePool.release(frame)
+            self.framesDropped += 1
+            if not self._resizePending:
+                self._resizePending = True
+                self.dataFormat = dataFormat
+                self._queue.put(_RESIZE)
+            return PxLApi.ReturnCode.ApiSuccess
+        # The pool allocated the frame descriptor along with the frame, so the callback doesn't have to
+        ourFrameDesc = self._framePool.frameDesc(frame)
+        memmove(frame.ctypes.data, frameData, frameSize)
+        memmove(addressof(ourFrameDesc), frameDesc, sizeof(ourFrameDesc))
+        self.framesQueued += 1
+        self._queue.put((frame, ourFrameDesc))
+        return PxLApi.ReturnCode.ApiSuccess
+
+    def get(self, timeout=None):
+        """
+        Returns the (frame, frameDesc) of the oldest queued frame, waiting for at most timeout seconds
+        for one to arrive. Returns None on a timeout, or once the queue is stopped and all of its frames
+        were read. Raises PxLApi.ApiError if the frame pool has to be resized, and can't be.
+        """
+        if self._held is not None:
+            self._framePool.release(self._held)
+            self._held = None
+        while True:
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                return None
+            if _RESIZE is item:
+                self._resizePool()
+                continue
+            if None != item:
+                self._held = item[0]
+                return item
+            if not self._running:
+                return None
+            # The wake-up of an earlier stop, as the queue was restarted since
+
+    def frames(self):
+        """
+        A generator of (frame, frameDesc) tuples, ending when the queue is stopped and all of its frames
+        were read.
+        """
+        while True:
+            frame = self.get()
+            if None == frame:
+                return
+            yield frame
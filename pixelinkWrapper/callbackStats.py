@@ -0,0 +1,190 @@
+"""
+Instrumentation of frame callbacks.
+
+When frames go missing, the question is whether the callback is too slow, or whether the frames
+never made it over the link. A CallbackStats, passed to setCallback as its stats argument, has the
+callback function wrapped with instrumentation that measures, for every frame:
+    - the time between the arrival of consecutive frames, and its jitter: how much that time
+      varies from the time between the frames as timestamped by the camera (as RTP does);
+    - the time spent in the callback function;
+    - the latency from the camera timestamp of the frame (dFrameTime) to the callback;
+    - the frames missing from the sequence of frame numbers (u64FrameNumber).
+The times are recorded in Histograms: log-linear histograms, like HDR histograms, that keep their
+precision across many orders of magnitude for a fixed, small number of buckets. Everything is only
+ever updated by the callback thread, without any locks, and can be read at any time.
+"""
+
+from . pixelink import PxLApi
+import time
+
+
+class Histogram:
+    """
+    A histogram of non-negative integer values (such as times in microseconds), with a relative
+    precision of 1 / 2 ** (subBucketBits - 1): values below 2 ** subBucketBits are counted exactly,
+    and each power of 2 above that is split into 2 ** (subBucketBits - 1) buckets.
+    """
+    def __init__(self, subBucketBits=5):
+        self.subBucketBits = subBucketBits
+        self._halfBucketCount = 1 << (subBucketBits - 1)
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self._counts = []
+
+    def _index(self, value):
+        shift = value.bit_length() - self.subBucketBits
+        if shift <= 0:
+            return value
+        return shift * self._halfBucketCount + (value >> shift)
+
+    def _highestValue(self, index):
+        # The highest value counted in a bucket
+        if index < 2 * self._halfBucketCount:
+            return index
+        shift = index // self._halfBucketCount - 1
+        return ((index - shift * self._halfBucketCount + 1) << shift) - 1
+
+    def record(self, value):
+        value = int(value)
+        if value < 0:
+            value = 0
+        index = self._index(value)
+        counts = self._counts
+        if index >= len(counts):
+            counts.extend([0] * (index + 1 - len(counts)))
+        counts[index] += 1
+        self.count += 1
+        self.total += value
+        if None == self.min or value < self.min:
+            self.min = value
+        if None == self.max or value > self.max:
+            self.max = value
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def percentile(self, percentile):
+        """
+        Returns the value below which percentile percent of the recorded values are, to within the
+        precision of the histogram, or None if no values were recorded.
+        """
+        if 0 == self.count:
+            return None
+        rank = max(1, percentile * self.count / 100)
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank:
+                return max(min(self._highestValue(index), self.max), self.min)
+        return self.max
+
+    def summary(self):
+        """
+        Returns the count, min, mean, median (p50), p99, p99.9 and max of the values, as a dictionary.
+        """
+        return {"count": self.count, "min": self.min, "mean": self.mean(), "p50": self.percentile(50),
+                "p99": self.percentile(99), "p99.9": self.percentile(99.9), "max": self.max}
+
+
+class CallbackStats:
+    """
+    The statistics of a callback function, as registered with PxLApi.setCallback(..., stats=stats).
+    All times are in microseconds:
+        callbacks      - the number of calls of the callback function
+        framesLost     - the number of frames missing from the sequence of frame numbers, and
+        gaps           - the number of places where frames are missing
+        interArrival   - a Histogram of the host time between consecutive callbacks
+        jitter         - the smoothed variation of that time, relative to the camera timestamps
+        callbackTime   - a Histogram of the time spent in the callback function
+        latency        - a Histogram of the time from the camera timestamp of a frame to its callback
+    The latency is measured against the clock of the camera, as read by calibrate, which setCallback
+    calls when the function is registered. As the two clocks drift apart, calibrate (or reset) should
+    be called again every now and then on long runs.
+    """
+    def __init__(self):
+        self._clockOffset = None
+        self.interArrival = Histogram()
+        self.callbackTime = Histogram()
+        self.latency = Histogram()
+        self.reset()
+
+    def reset(self, hCamera=None):
+        """
+        Clears all of the statistics, and calibrates the camera clock of hCamera, if given.
+        """
+        self.callbacks = 0
+        self.framesLost = 0
+        self.gaps = 0
+        self.jitter = 0.0
+        self.interArrival.reset()
+        self.callbackTime.reset()
+        self.latency.reset()
+        self._lastArrival = None
+        self._lastFrameTime = None
+        self._lastFrameNumber = None
+        if None != hCamera:
+            self.calibrate(hCamera)
+
+    def calibrate(self, hCamera):
+        """
+        Reads the current time of the camera hCamera, to relate the camera timestamps of the frames to
+        the host clock. Returns the return code of getCurrentTimestamp; on failure, latencies are not measured.
+        """
+        before = time.perf_counter()
+        ret = PxLApi.getCurrentTimestamp(hCamera)
+        after = time.perf_counter()
+        if not PxLApi.apiSuccess(ret[0]):
+            self._clockOffset = None
+            return ret[0]
+        self._clockOffset = (before + after) / 2 - ret[1]
+        return ret[0]
+
+    def wrap(self, function):
+        """
+        Returns a data process function (as created with @PxLApi._dataProcessFunction) that calls function
+        and records its statistics. function can itself be a data process function, or a plain Python
+        function with the same arguments.
+        """
+        perfCounter = time.perf_counter
+
+        def dataProcessFunction(hCamera, frameData, dataFormat, frameDesc, userData):
+            start = perfCounter()
+            rc = function(hCamera, frameData, dataFormat, frameDesc, userData)
+            end = perfCounter()
+            self._record(start, end, frameDesc.contents)
+            return rc
+
+        return PxLApi._dataProcessFunction(dataProcessFunction)
+
+    def _record(self, start, end, frameDesc):
+        self.callbacks += 1
+        self.callbackTime.record((end - start) * 1e6)
+        frameTime = frameDesc.dFrameTime
+        if None != self._clockOffset:
+            self.latency.record((start - self._clockOffset - frameTime) * 1e6)
+        if None != self._lastArrival:
+            arrival = start - self._lastArrival
+            self.interArrival.record(arrival * 1e6)
+            # The jitter estimator of RTP (RFC 3550)
+            deviation = abs(arrival - (frameTime - self._lastFrameTime)) * 1e6
+            self.jitter += (deviation - self.jitter) / 16
+        frameNumber = frameDesc.u64FrameNumber
+        if None != self._lastFrameNumber and frameNumber > self._lastFrameNumber + 1:
+            self.framesLost += frameNumber - self._lastFrameNumber - 1
+            self.gaps += 1
+        self._lastArrival = start
+        self._lastFrameTime = frameTime
+        self._lastFrameNumber = frameNumber
+
+    def summary(self):
+        """
+        Returns all of the statistics, as a dictionary.
+        """
+        return {"callbacks": self.callbacks, "framesLost": self.framesLost, "gaps": self.gaps,
+                "jitter": self.jitter, "interArrival": self.interArrival.summary(),
+                "callbackTime": self.callbackTime.summary(), "latency": self.latency.summary()}
@@ -0,0 +1,213 @@
+"""
+Recording of Pixelink10 compressed frames, decompressed only when read back.
+
+Long recordings are usually limited by how fast frames can be written to disk, and most of their
+frames are never looked at again. A CompressedArchiveWriter therefore stores the frames exactly as
+they are received from getNextCompressedFrame, or from a PxLApi.Callback.COMPRESSED_FRAME callback,
+each along with its frame descriptor and compression descriptor. A CompressedArchiveReader only
+decompresses a frame, with decompressFrame, when that frame is read.
+
+An archive is a header, followed by one record per frame and, once the writer is closed, an index
+of the file offsets of the records:
+    header:  b"PXLZ", the archive version and the size of a frame descriptor (uint32 each)
+    record:  the size of the compression descriptor and of the compressed frame (uint32 each),
+             the frame descriptor, the compression descriptor and the compressed frame
+    index:   the offset of each record (uint64 each)
+    trailer: the offset of the index and the number of frames (uint64 each), and b"PXLI"
+An archive whose writer was never closed has no index; its records are then found by scanning them.
+"""
+
+from ctypes import*
+from . pixelink import PxLApi
+from . framePool import getFrameDescGeometry
+import os
+import struct
+import threading
+
+
+_ARCHIVE_MAGIC = b"PXLZ"
+_INDEX_MAGIC = b"PXLI"
+_ARCHIVE_VERSION = 1
+_header = struct.Struct("<4sII")
+_recordHeader = struct.Struct("<II")
+_trailer = struct.Struct("<QQ4s")
+
+
+class CompressedArchiveWriter:
+    """
+    Writes compressed frames to the archive fileName. Frames can be written from any thread, such as
+    the thread of a compressed frame callback:
+        writer = CompressedArchiveWriter("recording.pxlz")
+        compressionInfo = PxLApi.CompressionInfoPixelink10()
+        PxLApi.setCallback(hCamera, PxLApi.Callback.COMPRESSED_FRAME, compressionInfo, writer.compressedFrameCallback)
+    The archive is only complete, with its index, once the writer is closed. A CompressedArchiveWriter
+    can be used as a context manager, which closes it.
+    """
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.frameCount = 0
+        self._offsets = []
+        self._lock = threading.Lock()
+        self._file = open(fileName, "wb")
+        self._file.write(_header.pack(_ARCHIVE_MAGIC, _ARCHIVE_VERSION, sizeof(PxLApi._FrameDesc)))
+        # A data process function, for PxLApi.setCallback with PxLApi.Callback.COMPRESSED_FRAME, that
+        # writes every frame. The writer must stay referenced for as long as the callback is set.
+        self.compressedFrameCallback = PxLApi._dataProcessFunction(self._onCompressedFrame)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    def write(self, frame, frameDesc, compressionDesc, compressionDescSize=None):
+        """
+        Writes a compressed frame, as returned by getNextCompressedFrame: frame is the frame buffer (or
+        a pointer to the frame data), frameDesc its frame descriptor and compressionDesc its compression
+        descriptor, of which compressionDescSize bytes are used (all of them by default). The size of the
+        compressed frame is taken from the frame descriptor.
+        """
+        frameSize = int(frameDesc.CompressionInfo.fCompressedSize)
+        if None == compressionDescSize:
+            compressionDescSize = sizeof(compressionDesc)
+        record = b"".join((_recordHeader.pack(compressionDescSize, frameSize),
+                           string_at(addressof(frameDesc), sizeof(PxLApi._FrameDesc)),
+                           string_at(addressof(compressionDesc), compressionDescSize),
+                           string_at(frame, frameSize)))
+        with self._lock:
+            self._offsets.append(self._file.tell())
+            self._file.write(record)
+            self.frameCount += 1
+
+    def _onCompressedFrame(self, hCamera, frameData, dataFormat, frameDesc, userData):
+        compressionInfo = PxLApi.CompressionInfoPixelink10.from_address(userData)
+        self.write(frameData, frameDesc.contents, compressionInfo.CompressionDesc)
+        return PxLApi.ReturnCode.ApiSuccess
+
+    def close(self):
+        """
+        Writes the index of the archive and closes it.
+        """
+        with self._lock:
+            if None == self._file:
+                return
+            indexOffset = self._file.tell()
+            self._file.write(struct.pack("<{0}Q".format(len(self._offsets)), *self._offsets))
+            self._file.write(_trailer.pack(indexOffset, len(self._offsets), _INDEX_MAGIC))
+            self._file.close()
+            self._file = None
+
+
+class CompressedArchiveReader:
+    """
+    Reads the frames of the archive fileName. The frame descriptors are available without any
+    decompression; frames are decompressed as they are read. The frames are ctypes character buffers
+    or, with useNumPy, NumPy arrays shaped and typed as per their FrameGeometry. A reader is not thread
+    safe. It can be used as a context manager, which closes it.
+
+    Raises ValueError if fileName is not an archive.
+    """
+    def __init__(self, fileName, useNumPy=False):
+        self.fileName = fileName
+        self.useNumPy = useNumPy
+        self._file = open(fileName, "rb")
+        self._compressedFrame = None
+        try:
+            magic, version, self._frameDescSize = _header.unpack(self._file.read(_header.size))
+        except struct.error:
+            magic = None
+        if _ARCHIVE_MAGIC != magic or version > _ARCHIVE_VERSION:
+            self._file.close()
+            raise ValueError("{0} is not a compressed frame archive".format(fileName))
+        self._offsets = self._readIndex()
+        if None == self._offsets:
+            self._offsets = self._scanRecords()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def _readIndex(self):
+        fileSize = self._file.seek(0, os.SEEK_END)
+        if fileSize < _header.size + _trailer.size:
+            return None
+        self._file.seek(fileSize - _trailer.size)
+        indexOffset, count, magic = _trailer.unpack(self._file.read(_trailer.size))
+        if _INDEX_MAGIC != magic or indexOffset + 8 * count + _trailer.size != fileSize:
+            return None
+        self._file.seek(indexOffset)
+        return list(struct.unpack("<{0}Q".format(count), self._file.read(8 * count)))
+
+    def _scanRecords(self):
+        # Finds the records of an archive without an index, up to the last complete one
+        offsets = []
+        fileSize = self._file.seek(0, os.SEEK_END)
+        offset = _header.size
+        while offset + _recordHeader.size <= fileSize:
+            self._file.seek(offset)
+            compressionDescSize, frameSize = _recordHeader.unpack(self._file.read(_recordHeader.size))
+            recordSize = _recordHeader.size + self._frameDescSize + compressionDescSize + frameSize
+            if offset + recordSize > fileSize:
+                break
+            offsets.append(offset)
+            offset += recordSize
+        return offsets
+
+    def _readRecord(self, index, readFrame):
+        self._file.seek(self._offsets[index])
+        compressionDescSize, frameSize = _recordHeader.unpack(self._file.read(_recordHeader.size))
+        frameDesc = PxLApi.createFrameDesc()
+        frameDescBytes = self._file.read(self._frameDescSize)
+        memmove(addressof(frameDesc), frameDescBytes, min(len(frameDescBytes), sizeof(frameDesc)))
+        if not readFrame:
+            return (frameDesc,)
+        compressionDesc = create_string_buffer(self._file.read(compressionDescSize), compressionDescSize)
+        # decompressFrame needs an aligned source, which is reused from one frame to the next
+        if None == self._compressedFrame or len(self._compressedFrame) < frameSize:
+            self._compressedFrame = PxLApi.createByteAlignedBuffer(frameSize, 64)
+        self._file.readinto(memoryview(self._compressedFrame).cast("B")[:frameSize])
+        return (frameDesc, compressionDesc)
+
+    def frameDesc(self, index):
+        """
+        Returns the frame descriptor of the frame index, without decompressing the frame.
+        """
+        return self._readRecord(index, False)[0]
+
+    def read(self, index):
+        """
+        Decompresses the frame index, and returns it along with its frame descriptor as a (frame,
+        frameDesc) tuple. Raises PxLApi.ApiError if the frame can't be decompressed.
+        """
+        frameDesc, compressionDesc = self._readRecord(index, True)
+        ret = PxLApi.decompressFrame(self._compressedFrame, frameDesc, compressionDesc)
+        if not PxLApi.apiSuccess(ret[0]):
+            raise PxLApi.ApiError(ret[0], "decompressFrame")
+        frame = PxLApi.createByteAlignedBuffer(ret[1], 64)
+        ret = PxLApi.decompressFrame(self._compressedFrame, frameDesc, compressionDesc, frame)
+        if not PxLApi.apiSuccess(ret[0]):
+            raise PxLApi.ApiError(ret[0], "decompressFrame")
+        if self.useNumPy:
+            import numpy
+            geometry = getFrameDescGeometry(frameDesc)
+            frame = numpy.frombuffer(frame, geometry.numPyDtype()).reshape(geometry.numPyShape())
+        return (frame, frameDesc)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self._offsets)
+        if not 0 <= index < len(self._offsets):
+            raise IndexError("frame index out of range")
+        return self.read(index)
+
+    def __iter__(self):
+        for index in range(len(self._offsets)):
+            yield self.read(index)
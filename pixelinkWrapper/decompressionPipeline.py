@@ -0,0 +1,240 @@
+"""
+Parallel decompression of Pixelink10 compressed frames.
+
+With Pixelink10 compression enabled (PxLApi.FeatureId.COMPRESSION, using
+PxLApi.CompressionStrategy.PIXELINK10), a camera sends more frames over the same link, but every
+frame has to be decompressed on the host with decompressFrame. Done on the thread that reads the
+frames, the decompression limits the frame rate to what a single CPU core can decompress.
+
+A DecompressionPipeline reads the compressed frames, along with their compression descriptors,
+on a thread of its own, and decompresses them on a pool of worker threads; as the Pixelink API is
+called through ctypes, which releases the GIL for the duration of the call, the frames are
+decompressed in parallel. The decompressed frames are still delivered in the order they were read.
+All of the buffers, compressed and decompressed, come from FramePools of aligned buffers, so
+nothing is allocated per frame.
+
+NumPy is required for this module.
+"""
+
+from ctypes import*
+from . pixelink import PxLApi
+from . framePool import FramePool
+import collections
+import concurrent.futures
+import numpy
+import os
+import threading
+import time
+
+
+class DecompressionPipeline:
+    """
+    Reads compressed frames from the camera hCamera and decompresses them on workers threads (by
+    default, one per CPU). Compression must already be enabled on the camera. With startStream, the
+    pipeline starts the stream of the camera when it is started and stops it when it is stopped.
+
+    The compressed frames are read into buffers of the uncompressed frame size, which is what the
+    Pixelink API asks for (see getCompressedImage.py sample): it is the upper bound of the size of a
+    compressed frame, as frames that don't compress are sent as they are.
+
+    At most maxPending frames (by default, twice the number of workers) are read but not handed out
+    yet; when the workers or the consumer fall behind, the reading thread waits, and the camera will
+    drop frames instead once its own frame buffers fill up.
+
+    The frames returned by next are NumPy arrays, shaped and typed as per the FrameGeometry of the
+    camera, viewing a pooled decompression buffer. A frame (and its frame descriptor) remains valid
+    until the following call to next, so only one thread should consume frames from a pipeline.
+
+    A DecompressionPipeline can be used as a context manager, which starts and stops it.
+    """
+
+    def __init__(self, hCamera, workers=None, maxPending=None, startStream=True):
+        self.hCamera = hCamera
+        self.workers = workers if None != workers else (os.cpu_count() or 1)
+        self.maxPending = maxPending if None != maxPending else 2 * self.workers
+        assert 1 <= self.workers and 1 <= self.maxPending
+        self.startStream = startStream
+        self.framesRead = 0
+        self.framesDecompressed = 0
+        self.errorCount = 0
+        self.lastError = PxLApi.ReturnCode.ApiSuccess
+        self.decompressionErrors = 0
+        self.lastDecompressionError = PxLApi.ReturnCode.ApiSuccess
+        self._compressedPool = None
+        self._framePool = None
+        self._compressionDescs = {} # Compression descriptor of each compressed buffer
+        self._frameViews = {}       # NumPy view of each decompression buffer
+        self._executor = None
+        self._pending = collections.deque() # Futures of the frames not handed out yet, in order
+        self._held = None                   # Decompression buffer last handed out
+        self._running = False
+        self._thread = None
+        self._condition = threading.Condition()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.stop()
+
+    def start(self):
+        """
+        Starts the reading thread and the workers (and the stream, with startStream). Raises
+        PxLApi.ApiError on failure.
+        """
+        if self._running:
+            return
+        # A compressed buffer for each worker and one being read; a decompression buffer for each
+        # pending frame, plus the one being read into and the one handed out
+        if None == self._compressedPool:
+            self._compressedPool = FramePool(self.hCamera, count=self.workers + 1)
+            self._framePool = FramePool(self.hCamera, count=self.maxPending + 2)
+        else:
+            self._compressedPool.resize()
+            self._framePool.resize()
+        self._held = None
+        self.lastError = PxLApi.ReturnCode.ApiSuccess
+        self._executor = concurrent.futures.ThreadPoolExecutor(self.workers, thread_name_prefix="DecompressionPipeline")
+
+        if self.startStream:
+            ret = PxLApi.setStreamState(self.hCamera, PxLApi.StreamState.START)
+            if not PxLApi.apiSuccess(ret[0]):
+                self._executor.shutdown()
+                self._executor = None
+                raise PxLApi.ApiError(ret[0], "setStreamState")
+        self._running = True
+        self._thread = threading.Thread(target=self._acquire, name="DecompressionPipeline", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the reading thread and the workers (and the stream, with startStream). Frames already
+        read can still be handed out by next after that.
+        """
+        with self._condition:
+            if not self._running and None == self._thread:
+                return
+            self._running = False
+            self._condition.notify_all()
+        # Stopping the stream also ends a getNextCompressedFrame the reading thread may be waiting in
+        if self.startStream:
+            PxLApi.setStreamState(self.hCamera, PxLApi.StreamState.STOP)
+        if None != self._thread:
+            self._thread.join()
+            self._thread = None
+        if None != self._executor:
+            self._executor.shutdown()
+            self._executor = None
+
+    def isRunning(self):
+        return self._running
+
+    def _acquireBuffer(self, pool):
+        # Waits for a free buffer of pool, for as long as the pipeline is running
+        while self._running:
+            buffer = pool.acquire(timeout=0.1)
+            if None != buffer:
+                return buffer
+        return None
+
+    def _acquire(self):
+        while self._running:
+            frame = self._acquireBuffer(self._framePool)
+            if None == frame:
+                break
+            compressedFrame = self._acquireBuffer(self._compressedPool)
+            if None == compressedFrame:
+                self._framePool.release(frame)
+                break
+            frameDesc = self._framePool.frameDesc(frame)
+            compressionDesc = self._compressionDescs.get(id(compressedFrame))
+            if None == compressionDesc:
+                compressionDesc = self._compressionDescs[id(compressedFrame)] = \
+                    create_string_buffer(PxLApi.CompressionDescSize.PIXELINK10)
+            ret = PxLApi.getNextCompressedFrame(self.hCamera, compressedFrame, compressionDesc, frameDesc)
+            if PxLApi.apiSuccess(ret[0]):
+                future = self._executor.submit(self._decompress, compressedFrame, compressionDesc, frame, frameDesc)
+                with self._condition:
+                    self.framesRead += 1
+                    self._pending.append(future)
+                    self._condition.notify_all()
+                continue
+            self._compressedPool.release(compressedFrame)
+            self._framePool.release(frame)
+            with self._condition:
+                if not self._running:
+                    break # Stopped while waiting for the frame
+                self.errorCount += 1
+                self.lastError = ret[0]
+                if ret[0] in PxLApi._fatalStreamReturnCodes:
+                    self._running = False
+                    self._condition.notify_all()
+                    break
+
+    def _decompress(self, compressedFrame, compressionDesc, frame, frameDesc):
+        # Runs on a worker thread; returns the return code and the decompression buffer
+        ret = PxLApi.decompressFrame(compressedFrame, frameDesc, compressionDesc, frame)
+        self._compressedPool.release(compressedFrame)
+        if not PxLApi.apiSuccess(ret[0]):
+            self._framePool.release(frame)
+            return (ret[0], None)
+        return (ret[0], frame)
+
+    def _frameView(self, frame):
+        geometry = self._framePool.geometry
+        view = self._frameViews.get(id(frame))
+        if view is None or view.shape != geometry.numPyShape() or view.dtype != geometry.numPyDtype():
+            view = numpy.frombuffer(frame, geometry.numPyDtype()).reshape(geometry.numPyShape())
+            self._frameViews[id(frame)] = view
+        return view
+
+    def next(self, timeout=None):
+        """
+        Returns the (frame, frameDesc) of the oldest frame not handed out yet, waiting for at most
+        timeout seconds for it to be read and decompressed. Returns None on a timeout. Frames that
+        fail to decompress are skipped, and counted in decompressionErrors, the last of them with
+        lastDecompressionError. Raises PxLApi.ApiError if the acquisition (the reading of the frames)
+        ended because of an error and all frames were handed out.
+        """
+        if None != self._held:
+            self._framePool.release(self._held)
+            self._held = None
+        deadline = None if None == timeout else time.monotonic() + timeout
+        while True:
+            with self._condition:
+                while not self._pending:
+                    if not self._running:
+                        if not PxLApi.apiSuccess(self.lastError):
+                            raise PxLApi.ApiError(self.lastError, "getNextCompressedFrame")
+                        return None
+                    remaining = None if None == deadline else deadline - time.monotonic()
+                    if None != remaining and remaining <= 0:
+                        return None
+                    self._condition.wait(remaining)
+                future = self._pending[0]
+            remaining = None if None == deadline else max(0, deadline - time.monotonic())
+            try:
+                rc, frame = future.result(remaining)
+            except concurrent.futures.TimeoutError:
+                return None
+            with self._condition:
+                self._pending.popleft()
+                if not PxLApi.apiSuccess(rc):
+                    self.decompressionErrors += 1
+                    self.lastDecompressionError = rc
+                    continue
+                self.framesDecompressed += 1
+            self._held = frame
+            return (self._frameView(frame), self._framePool.frameDesc(frame))
+
+    def frames(self):
+        """
+        A generator of (frame, frameDesc) tuples, ending when the pipeline is stopped and all frames
+        were handed out. Raises PxLApi.ApiError if the acquisition ends because of an error.
+        """
+        while True:
+            frame = self.next()
+            if None == frame:
+                return
+            yield frame
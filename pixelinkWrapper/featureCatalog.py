@@ -0,0 +1,140 @@
+"""
+The feature information of a camera, read once per connection.
+
+getCameraFeatures tells which features a camera supports (PxLApi.FeatureFlags.PRESENCE), how they
+can be controlled, and the limits of their parameters. That information doesn't change for as long
+as the camera is connected, yet every call of getCameraFeatures makes two calls of the Pixelink API.
+A FeatureCatalog reads the information of all of the features (PxLApi.FeatureId.ALL) of a camera
+once, into a FeatureInfo for each of them, and answers from those after that:
+    ret = getFeatureCatalog(hCamera)
+    catalog = ret[1]
+    if catalog.supports(PxLApi.FeatureId.ACTUAL_FRAME_RATE):
+        ...
+    minFrameRate, maxFrameRate = catalog.range(PxLApi.FeatureId.FRAME_RATE)
+
+getFeatureCatalog keeps the catalog of each camera, and only reads it again once the camera handle
+has been uninitialized or initialized since, as the handle may then be that of a reconnected, or
+another, camera.
+"""
+
+from . pixelink import PxLApi
+import collections
+import threading
+
+
+class FeatureInfo(collections.namedtuple("FeatureInfo", "featureId flags numberOfParameters minValues maxValues")):
+    """
+    The feature information of a feature: its id, its PxLApi.FeatureFlags, its number of parameters
+    and the minimum and maximum value of each of them, as tuples.
+    """
+    __slots__ = ()
+
+    def isSupported(self):
+        return 0 != (self.flags & PxLApi.FeatureFlags.PRESENCE)
+
+
+class FeatureCatalog:
+    """
+    The feature information of the camera hCamera, read when the catalog is created. Raises
+    PxLApi.ApiError if it can't be read.
+    """
+    def __init__(self, hCamera):
+        self.hCamera = hCamera
+        self.refresh()
+
+    def refresh(self):
+        """
+        Reads the feature information of the camera again. Raises PxLApi.ApiError on failure.
+        """
+        generation = PxLApi._connectionGeneration(self.hCamera)
+        ret = PxLApi.getCameraFeatures(self.hCamera, PxLApi.FeatureId.ALL)
+        if not PxLApi.apiSuccess(ret[0]):
+            raise PxLApi.ApiError(ret[0], "getCameraFeatures")
+        cameraFeatures = ret[1]
+        features = {}
+        for i in range(cameraFeatures.uNumberOfFeatures):
+            feature = cameraFeatures.Features[i]
+            numberOfParameters = feature.uNumberOfParameters if feature.Params else 0
+            params = [feature.Params[j] for j in range(numberOfParameters)]
+            features[feature.uFeatureId] = FeatureInfo(feature.uFeatureId, feature.uFlags, numberOfParameters,
+                                                       tuple(param.fMinValue for param in params),
+                                                       tuple(param.fMaxValue for param in params))
+        self._features = features
+        self._generation = generation
+
+    def isCurrent(self):
+        """
+        Returns False once the camera handle has been uninitialized or initialized since the catalog was read.
+        """
+        return self._generation == PxLApi._connectionGeneration(self.hCamera)
+
+    def feature(self, featureId):
+        """
+        Returns the FeatureInfo of the feature featureId, or None if the camera didn't report it.
+        """
+        return self._features.get(featureId)
+
+    def features(self):
+        """
+        Returns the FeatureInfo of all of the features the camera supports.
+        """
+        return [info for info in self._features.values() if info.isSupported()]
+
+    def supports(self, featureId):
+        """
+        Returns True if the camera supports the feature featureId.
+        """
+        info = self._features.get(featureId)
+        return None != info and info.isSupported()
+
+    def flags(self, featureId):
+        """
+        Returns the PxLApi.FeatureFlags of the feature featureId, or 0 if the camera doesn't support it.
+        """
+        info = self._features.get(featureId)
+        return 0 if None == info else info.flags
+
+    def range(self, featureId, param=0):
+        """
+        Returns the (minimum, maximum) values of the parameter param of the feature featureId, or None if
+        the camera doesn't support the feature, or the feature has no such parameter.
+        """
+        info = self._features.get(featureId)
+        if None == info or not info.isSupported() or not 0 <= param < info.numberOfParameters:
+            return None
+        return (info.minValues[param], info.maxValues[param])
+
+    def isSettableWhileStreaming(self, featureId):
+        """
+        Returns True if the feature featureId can be set while the camera is streaming.
+        """
+        return 0 != (self.flags(featureId) & PxLApi.FeatureFlags.SETTABLE_WHILE_STREAMING)
+
+    def isReadOnly(self, featureId):
+        """
+        Returns True if the feature featureId can only be read.
+        """
+        return 0 != (self.flags(featureId) & PxLApi.FeatureFlags.READ_ONLY)
+
+
+_catalogs = {}
+_catalogsLock = threading.Lock()
+
+
+def getFeatureCatalog(hCamera):
+    """
+    Returns the FeatureCatalog of the camera hCamera, reading it only the first time for each connection
+    of the camera. Like the Pixelink API functions, returns a tuple of the return code and, on success,
+    the FeatureCatalog.
+    """
+    with _catalogsLock:
+        catalog = _catalogs.get(hCamera)
+    if None != catalog and catalog.isCurrent():
+        return (PxLApi.ReturnCode.ApiSuccess, catalog)
+    try:
+        catalog = FeatureCatalog(hCamera)
+    except PxLApi.ApiError as e:
+        return (e.rc,)
+    with _catalogsLock:
+        _catalogs[hCamera] = catalog
+    return (PxLApi.ReturnCode.ApiSuccess, catalog)
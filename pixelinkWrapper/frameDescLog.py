@@ -0,0 +1,145 @@
+"""
+Logging of the frame descriptors of a stream of frames.
+
+Every frame descriptor carries some 45 fields, from the shutter and gain to the ROI, HDR, polar and
+compression information of its frame. A FrameDescLog keeps the descriptors of millions of frames
+without creating a Python object for any of them: the descriptors are copied, with a single memmove
+of their raw bytes each, into NumPy structured arrays of frameDescDtype (the layout of
+PxLApi._FrameDesc itself), which are preallocated in chunks of chunkSize descriptors. A field is
+only decoded, for all of the logged frames at once, when it is asked for:
+    log = FrameDescLog()
+    log.append(frameDesc)
+    shutters = log.field("Shutter.fValue")
+
+A log can be saved as a .npy file, or as the raw descriptors back to back, and loaded again.
+
+NumPy is required for this module.
+"""
+
+from ctypes import*
+from . pixelink import PxLApi
+import numpy
+import threading
+
+
+frameDescDtype = numpy.dtype(PxLApi._FrameDesc)
+
+
+class FrameDescLog:
+    """
+    A log of frame descriptors, growing by chunks of chunkSize descriptors. Descriptors can be
+    appended from any thread, such as the thread of a frame callback.
+    """
+    def __init__(self, chunkSize=65536):
+        assert 1 <= chunkSize
+        self.chunkSize = chunkSize
+        self._chunks = []
+        self._used = 0 # Descriptors in the last chunk
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def append(self, frameDesc):
+        """
+        Appends a frame descriptor, given as a PxLApi._FrameDesc or, as passed to a frame callback, a
+        pointer to one.
+        """
+        address = addressof(frameDesc.contents) if hasattr(frameDesc, "contents") else addressof(frameDesc)
+        with self._lock:
+            if not self._chunks or self._used == len(self._chunks[-1]):
+                self._chunks.append(numpy.zeros(self.chunkSize, frameDescDtype))
+                self._used = 0
+            memmove(self._chunks[-1].ctypes.data + self._used * frameDescDtype.itemsize, address, frameDescDtype.itemsize)
+            self._used += 1
+            self._count += 1
+
+    def clear(self):
+        with self._lock:
+            self._chunks = []
+            self._used = 0
+            self._count = 0
+
+    def _columns(self, name):
+        # The column name of each chunk, the last one trimmed to its descriptors
+        with self._lock:
+            chunks = list(self._chunks)
+            used = self._used
+        columns = [chunk if None == name else chunk[name] for chunk in chunks]
+        if columns:
+            columns[-1] = columns[-1][:used]
+        return columns
+
+    def _concatenate(self, name):
+        columns = self._columns(name)
+        if not columns:
+            dtype = frameDescDtype if None == name else frameDescDtype[name]
+            return numpy.empty(0, dtype)
+        if 1 == len(columns):
+            return columns[0].copy()
+        return numpy.concatenate(columns)
+
+    def field(self, name):
+        """
+        Returns the values of the field name of all of the logged descriptors, as a NumPy array. Fields
+        of nested structures are named with a dot, as in "Roi.fWidth"; a structure on its own, such as
+        "Roi", gives a structured array of its fields.
+        """
+        path = name.split(".")
+        values = self._concatenate(path[0])
+        for part in path[1:]:
+            values = values[part]
+        return values
+
+    def frameDescs(self):
+        """
+        Returns all of the logged descriptors, as a NumPy structured array of frameDescDtype.
+        """
+        return self._concatenate(None)
+
+    def frameDesc(self, index):
+        """
+        Returns the logged descriptor index as a PxLApi._FrameDesc.
+        """
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("frame descriptor index out of range")
+        for chunk in self._chunks:
+            if index < len(chunk):
+                return PxLApi._FrameDesc.from_buffer_copy(chunk[index].tobytes())
+            index -= len(chunk)
+
+    def save(self, fileName):
+        """
+        Saves the log as a .npy file of a structured array of frameDescDtype.
+        """
+        numpy.save(fileName, self.frameDescs())
+
+    def saveRaw(self, fileName):
+        """
+        Saves the log as the raw bytes of the descriptors, back to back, just as they are laid out in memory.
+        """
+        with open(fileName, "wb") as file:
+            for column in self._columns(None):
+                column.tofile(file)
+
+    @staticmethod
+    def load(fileName, raw=False, chunkSize=65536):
+        """
+        Loads a log saved with save, or with saveRaw if raw. The descriptors are memory-mapped rather than
+        read, so that the fields are still only read from the file when they are asked for.
+        """
+        if raw:
+            frameDescs = numpy.memmap(fileName, frameDescDtype, "r")
+        else:
+            frameDescs = numpy.load(fileName, mmap_mode="r")
+            if frameDescDtype != frameDescs.dtype:
+                raise ValueError("{0} is not a frame descriptor log".format(fileName))
+        log = FrameDescLog(chunkSize)
+        if len(frameDescs):
+            # The loaded descriptors make up a full chunk, so new ones go into a chunk of their own
+            log._chunks = [frameDescs]
+            log._used = log._count = len(frameDescs)
+        return log
@@ -0,0 +1,243 @@
+"""
+Frame buffers sized from the current state of a camera.
+
+FrameGeometry describes the frames a camera delivers with its current settings: ROI, pixel
+addressing, pixel format (including the packed 10 and 12 bit formats) and interleaved gain HDR,
+which doubles the width of a frame. getFrameGeometry reads it from a camera and
+getFrameDescGeometry from a frame descriptor.
+
+FramePool preallocates a number of aligned frame buffers of exactly the frame size, hands them
+out and takes them back. The camera is only queried for its geometry again after one of the
+features affecting the frame size has been changed through PxLApi.setFeature (or settings were
+loaded), at which point the pool reallocates its buffers.
+"""
+
+from . pixelink import PxLApi
+import collections
+import math
+import threading
+
+
+class FrameGeometry(collections.namedtuple("FrameGeometry", "width height pixelFormat hdrInterleaved")):
+    """
+    The width and height (in pixels, after pixel addressing) and the pixel format of a frame, and
+    whether it holds interleaved gain HDR data.
+    """
+    __slots__ = ()
+
+    def bytesPerPixel(self):
+        return PxLApi.getBytesPerPixel(self.pixelFormat)
+
+    def frameWidth(self):
+        # Interleaved HDR frames hold two samples for each pixel
+        return self.width * 2 if self.hdrInterleaved else self.width
+
+    def rowSize(self):
+        # Packed rows of an odd number of pixels end with a partly used byte
+        return int(math.ceil(self.frameWidth() * self.bytesPerPixel()))
+
+    def frameSize(self):
+        return self.rowSize() * self.height
+
+    def numPyDtype(self):
+        """
+        Returns the NumPy data type name of the samples of a frame; 16 bit formats are 'uint16',
+        everything else (including the packed formats) is 'uint8'.
+        """
+        if self.pixelFormat in _16bitFormats:
+            return "uint16"
+        return "uint8"
+
+    def numPyShape(self):
+        """
+        Returns the shape of a NumPy array holding a frame: (height, width) for mono and Bayer
+        formats, (height, width, 3) for RGB and BGR formats, and (height, row size in bytes) for
+        all others, the packed formats included.
+        """
+        if self.pixelFormat in _monoFormats:
+            return (self.height, self.frameWidth())
+        if self.pixelFormat in _rgbFormats:
+            return (self.height, self.frameWidth(), 3)
+        return (self.height, self.rowSize())
+
+
+_monoFormats = frozenset((PxLApi.PixelFormat.MONO8, PxLApi.PixelFormat.MONO16,
+                          PxLApi.PixelFormat.BAYER8_GRBG, PxLApi.PixelFormat.BAYER8_RGGB,
+                          PxLApi.PixelFormat.BAYER8_GBRG, PxLApi.PixelFormat.BAYER8_BGGR,
+                          PxLApi.PixelFormat.BAYER16_GRBG, PxLApi.PixelFormat.BAYER16_RGGB,
+                          PxLApi.PixelFormat.BAYER16_GBRG, PxLApi.PixelFormat.BAYER16_BGGR))
+_rgbFormats = frozenset((PxLApi.PixelFormat.RGB24_DIB, PxLApi.PixelFormat.RGB24_NON_DIB,
+                         PxLApi.PixelFormat.BGR24_NON_DIB, PxLApi.PixelFormat.RGB48_NON_DIB,
+                         PxLApi.PixelFormat.RGB48_DIB))
+_16bitFormats = frozenset((PxLApi.PixelFormat.MONO16, PxLApi.PixelFormat.BAYER16_GRBG,
+                           PxLApi.PixelFormat.BAYER16_RGGB, PxLApi.PixelFormat.BAYER16_GBRG,
+                           PxLApi.PixelFormat.BAYER16_BGGR, PxLApi.PixelFormat.RGB48_NON_DIB,
+                           PxLApi.PixelFormat.RGB48_DIB))
+
+
+def getFrameGeometry(hCamera):
+    """
+    Queries the camera for its ROI, pixel addressing, pixel format and gain HDR mode.
+    Like the Pixelink API functions, returns a tuple of the return code and, on success,
+    the FrameGeometry.
+    """
+    ret = PxLApi.getFeature(hCamera, PxLApi.FeatureId.ROI)
+    if not PxLApi.apiSuccess(ret[0]):
+        return ret[:1]
+    roiWidth = ret[2][PxLApi.RoiParams.WIDTH]
+    roiHeight = ret[2][PxLApi.RoiParams.HEIGHT]
+
+    ret = PxLApi.getFeature(hCamera, PxLApi.FeatureId.PIXEL_ADDRESSING)
+    if not PxLApi.apiSuccess(ret[0]):
+        return ret[:1]
+    pixelAddressingValueX = ret[2][PxLApi.PixelAddressingParams.X_VALUE]
+    pixelAddressingValueY = ret[2][PxLApi.PixelAddressingParams.Y_VALUE]
+
+    ret = PxLApi.getFeature(hCamera, PxLApi.FeatureId.PIXEL_FORMAT)
+    if not PxLApi.apiSuccess(ret[0]):
+        return ret[:1]
+    pixelFormat = int(ret[2][0])
+
+    # Not all cameras support gain HDR
+    ret = PxLApi.getFeature(hCamera, PxLApi.FeatureId.GAIN_HDR)
+    hdrInterleaved = PxLApi.apiSuccess(ret[0]) and PxLApi.GainHdr.INTERLEAVED == int(ret[2][0])
+
+    geometry = FrameGeometry(int(roiWidth / pixelAddressingValueX), int(roiHeight / pixelAddressingValueY),
+                             pixelFormat, hdrInterleaved)
+    return (PxLApi.ReturnCode.ApiSuccess, geometry)
+
+
+def getFrameDescGeometry(frameDesc):
+    """
+    Returns the FrameGeometry of the frame described by a frame descriptor.
+    """
+    return FrameGeometry(int(frameDesc.Roi.fWidth / frameDesc.PixelAddressingValue.fHorizontal),
+                         int(frameDesc.Roi.fHeight / frameDesc.PixelAddressingValue.fVertical),
+                         int(frameDesc.PixelFormat.fValue),
+                         PxLApi.GainHdr.INTERLEAVED == frameDesc.HDRInfo.uMode)
+
+
+def createAlignedNumPyBuffer(size, alignment):
+    """
+    Creates a uint8 NumPy array of size bytes whose data is aligned on an alignment byte boundary.
+    It is the NumPy counterpart of PxLApi.createByteAlignedBuffer.
+    """
+    import numpy
+    oversizedBuffer = numpy.empty(size + alignment, numpy.uint8)
+    alignmentOffset = -oversizedBuffer.ctypes.data % alignment
+    return oversizedBuffer[alignmentOffset:alignmentOffset + size]
+
+
+class FramePool:
+    """
+    A pool of count frame buffers for the camera hCamera. The buffers are ctypes character buffers
+    (as used with getNextFrame) or, with useNumPy, NumPy arrays shaped and typed as per
+    FrameGeometry.numPyShape and numPyDtype (as used with getNextNumPyFrame). Either way, their data
+    is aligned on an alignment byte boundary, so they can also be used with decompressFrame.
+
+    The buffers are sized for the frames of the camera in the pixel format pixelFormat, by default
+    that of the camera. Frame callbacks, PREVIEW ones in particular, may get their frames in another
+    pixel format (their dataFormat) than the camera's.
+
+    Each buffer comes with a frame descriptor of its own (see frameDesc), so that acquisition loops
+    reuse the frame descriptors along with the buffers, and allocate nothing per frame.
+
+    Raises PxLApi.ApiError if the frame geometry can't be read from the camera.
+    """
+    def __init__(self, hCamera, count=4, useNumPy=False, alignment=64, pixelFormat=None):
+        self.hCamera = hCamera
+        self.count = count
+        self.useNumPy = useNumPy
+        self.alignment = alignment
+        self.pixelFormat = pixelFormat
+        self.geometry = None
+        self.frameSize = 0
+        self._generation = None
+        self._available = collections.deque()
+        self._frameDescs = {} # The frame descriptor of each buffer
+        self._outstanding = 0
+        self._condition = threading.Condition()
+        self.resize()
+
+    def resize(self):
+        """
+        Reads the frame geometry from the camera and, if the frame size changed, replaces all of the
+        buffers. Buffers handed out before are not taken back by release.
+        """
+        with self._condition:
+            generation = PxLApi._geometryGeneration(self.hCamera)
+            ret = getFrameGeometry(self.hCamera)
+            if not PxLApi.apiSuccess(ret[0]):
+                raise PxLApi.ApiError(ret[0], "getFrameGeometry")
+            geometry = ret[1]
+            if None != self.pixelFormat:
+                geometry = geometry._replace(pixelFormat=self.pixelFormat)
+            if 0 == geometry.frameSize():
+                raise PxLApi.ApiError(PxLApi.ReturnCode.ApiUnsupportedPixelFormatError, "getFrameGeometry")
+            self._generation = generation
+            if geometry != self.geometry:
+                self.geometry = geometry
+                self.frameSize = geometry.frameSize()
+                self._available.clear()
+                frameDescs = {}
+                for i in range(self.count):
+                    buffer = self._createBuffer()
+                    frameDescs[id(buffer)] = PxLApi.createFrameDesc()
+                    self._available.append(buffer)
+                self._frameDescs = frameDescs
+                self._outstanding = 0
+                self._condition.notify_all()
+
+    def _createBuffer(self):
+        if not self.useNumPy:
+            return PxLApi.createByteAlignedBuffer(self.frameSize, self.alignment)
+        buffer = createAlignedNumPyBuffer(self.frameSize, self.alignment)
+        return buffer.view(self.geometry.numPyDtype()).reshape(self.geometry.numPyShape())
+
+    def _fits(self, buffer):
+        if self.useNumPy:
+            return buffer.nbytes == self.frameSize and buffer.shape == self.geometry.numPyShape()
+        return len(buffer) == self.frameSize
+
+    def acquire(self, block=True, timeout=None, checkGeometry=True):
+        """
+        Returns a free buffer, after resizing the pool if the frame geometry of the camera changed.
+        If all buffers are in use, waits for one to be released (for at most timeout seconds), unless
+        block is False. Returns None if no buffer became available.
+
+        Resizing reads the frame geometry from the camera, so a callback of the Pixelink API has to
+        acquire its buffers without checkGeometry, and leave the resizing to another thread.
+        """
+        if checkGeometry and self._generation != PxLApi._geometryGeneration(self.hCamera):
+            self.resize()
+        with self._condition:
+            if not self._available:
+                if not block or not self._condition.wait_for(lambda: self._available, timeout):
+                    return None
+            self._outstanding += 1
+            return self._available.popleft()
+
+    def release(self, buffer):
+        """
+        Returns a buffer obtained from acquire to the pool. Buffers of an outdated frame size are dropped.
+        """
+        with self._condition:
+            if not self._fits(buffer) or self._outstanding <= 0:
+                return
+            self._outstanding -= 1
+            self._available.append(buffer)
+            self._condition.notify()
+
+    def frameDesc(self, buffer):
+        """
+        Returns the frame descriptor of buffer, a buffer obtained from acquire. A buffer from before the
+        pool was last resized gets a new one.
+        """
+        frameDesc = self._frameDescs.get(id(buffer))
+        return PxLApi.createFrameDesc() if None == frameDesc else frameDesc
+
+    def available(self):
+        """
+        Returns the number of buffers that are free.
+        """
+        return len(self._available)
@@ -0,0 +1,375 @@
+"""
+Frame callbacks that never enter Python.
+
+Even a Python frame callback that does nothing has the ctypes trampoline behind
+PxLApi._dataProcessFunction take the GIL and convert its arguments, for every frame. On small ROIs,
+at thousands of frames per second, that alone limits the frame rate. A NativeCallbackRing registers
+a callback compiled to native code with Numba instead. The callback copies each frame, and its
+frame descriptor, into the next slot of a ring in memory shared with Python, and wakes the consumer
+up through an eventfd (or a pipe) on Linux and an event on Windows; it never takes the GIL.
+
+The state of the ring is an int64 array, whose address is the context of the callback. It holds
+the number of frames written and read, the numbers of frames dropped (as the ring was full) and of
+frames of another geometry than the ring's, and everything the callback needs to know about the
+ring. The callback only writes into slots that were read, and publishes a frame by incrementing the
+number of frames written once the frame is copied; the consumer frees a slot by incrementing the
+number of frames read. Each count is only ever written by one side, so no lock is needed, but both
+sides store their count with release semantics, and load the other's with acquire semantics, so
+that neither sees a count before the frame data it stands for on weakly ordered CPUs (ARM) either.
+
+Numba and NumPy are required for this module. Native callbacks aren't available on 32-bit Windows,
+where the API calls the callbacks with the stdcall calling convention, which Numba can't compile to.
+"""
+
+from ctypes import*
+from . pixelink import PxLApi
+from . framePool import createAlignedNumPyBuffer, getFrameGeometry
+import numpy
+import os
+import select
+import time
+
+try:
+    import numba
+    from numba.core import cgutils
+    from numba.extending import intrinsic
+except ImportError:
+    numba = None
+
+"""
+Whether native callbacks are available (they require Numba, and a cdecl frame callback)
+"""
+haveNativeCallbacks = None != numba and not (os.name == 'nt' and 4 == sizeof(c_void_p))
+
+# The entries of the ring state
+_WRITTEN = 0
+_READ = 1
+_DROPPED = 2
+_MISMATCHED = 3
+_SLOT_COUNT = 4
+_SLOT_SIZE = 5
+_FRAME_SIZE = 6
+_FRAMES_ADDRESS = 7
+_DESCS_ADDRESS = 8
+_DESC_SIZE = 9
+_WIDTH = 10
+_HEIGHT = 11
+_PIXEL_FORMAT = 12
+_HDR_INTERLEAVED = 13
+_WAKE_HANDLE = 14
+_WAKE_VALUE = 15
+_STATE_ADDRESS = 16
+_STATE_SIZE = 17
+
+
+def _frameDescWord(*path):
+    # The offset, in 4 byte words, of a (nested) field of a frame descriptor
+    structure, offset = PxLApi._FrameDesc, 0
+    for name in path:
+        offset += getattr(structure, name).offset
+        structure = dict(structure._fields_)[name]
+    return offset // 4
+
+
+_ROI_WIDTH = _frameDescWord("Roi", "fWidth")
+_ROI_HEIGHT = _frameDescWord("Roi", "fHeight")
+_PA_HORIZONTAL = _frameDescWord("PixelAddressingValue", "fHorizontal")
+_PA_VERTICAL = _frameDescWord("PixelAddressingValue", "fVertical")
+_HDR_INFO_MODE = _frameDescWord("HDRInfo", "uMode")
+_DESC_WORDS = sizeof(PxLApi._FrameDesc) // 4
+
+if None != numba:
+    def _itemPointer(context, builder, arrayType, array, index):
+        arrayValue = context.make_array(arrayType)(context, builder, array)
+        return cgutils.get_item_pointer(context, builder, arrayType, arrayValue, [index])
+
+    @intrinsic
+    def _loadAcquire(typingctx, array, index):
+        """
+        Loads array[index] atomically, with acquire semantics.
+        """
+        def codegen(context, builder, signature, args):
+            pointer = _itemPointer(context, builder, signature.args[0], args[0], args[1])
+            return builder.load_atomic(pointer, "acquire", array.dtype.bitwidth // 8)
+        return array.dtype(array, index), codegen
+
+    @intrinsic
+    def _storeRelease(typingctx, array, index, value):
+        """
+        Stores value into array[index] atomically, with release semantics.
+        """
+        def codegen(context, builder, signature, args):
+            pointer = _itemPointer(context, builder, signature.args[0], args[0], args[1])
+            value = context.cast(builder, args[2], signature.args[2], array.dtype)
+            builder.store_atomic(value, pointer, "release", array.dtype.bitwidth // 8)
+            return context.get_dummy_value()
+        return numba.types.void(array, index, value), codegen
+
+    # The consumer side of the counts
+    @numba.njit(nogil=True)
+    def _loadCount(state, index):
+        return _loadAcquire(state, index)
+
+    @numba.njit(nogil=True)
+    def _storeCount(state, index, value):
+        _storeRelease(state, index, value)
+
+_callback = None
+
+
+def _compileCallback():
+    """
+    Compiles the native callback, the first time it's needed, as compiling takes a while. The C library
+    functions it calls are declared with addresses as size_t, which is how they are passed anyway.
+    """
+    global _callback
+    if None != _callback:
+        return _callback
+    if os.name == 'nt':
+        libc = CDLL("msvcrt")
+        setEvent = WINFUNCTYPE(c_int, c_size_t)(("SetEvent", windll.kernel32))
+
+        @numba.njit(nogil=True)
+        def wakeUp(state):
+            setEvent(state[_WAKE_HANDLE])
+    else:
+        libc = CDLL(None)
+        write = CFUNCTYPE(c_ssize_t, c_int, c_size_t, c_size_t)(("write", libc))
+
+        @numba.njit(nogil=True)
+        def wakeUp(state):
+            write(state[_WAKE_HANDLE], state[_STATE_ADDRESS] + 8 * _WAKE_VALUE, 8)
+    copy = CFUNCTYPE(c_size_t, c_size_t, c_void_p, c_size_t)(("memcpy", libc))
+    ApiSuccess = PxLApi.ReturnCode.ApiSuccess
+    Interleaved = PxLApi.GainHdr.INTERLEAVED
+
+    @numba.cfunc(numba.types.uint32(numba.types.uint32, numba.types.voidptr, numba.types.uint32,
+                                    numba.types.voidptr, numba.types.voidptr), nogil=True)
+    def callback(hCamera, frameData, dataFormat, frameDesc, userData):
+        state = numba.carray(userData, _STATE_SIZE, numpy.int64)
+        descFloats = numba.carray(frameDesc, _DESC_WORDS, numpy.float32)
+        descWords = numba.carray(frameDesc, _DESC_WORDS, numpy.uint32)
+        if (dataFormat != state[_PIXEL_FORMAT] or (Interleaved == descWords[_HDR_INFO_MODE]) != state[_HDR_INTERLEAVED] or
+            int(descFloats[_ROI_WIDTH] / descFloats[_PA_HORIZONTAL]) != state[_WIDTH] or
+            int(descFloats[_ROI_HEIGHT] / descFloats[_PA_VERTICAL]) != state[_HEIGHT]):
+            state[_MISMATCHED] += 1
+            return ApiSuccess
+        written = state[_WRITTEN]
+        if written - _loadAcquire(state, _READ) >= state[_SLOT_COUNT]:
+            state[_DROPPED] += 1
+            return ApiSuccess
+        slot = written % state[_SLOT_COUNT]
+        copy(state[_FRAMES_ADDRESS] + slot * state[_SLOT_SIZE], frameData, state[_FRAME_SIZE])
+        copy(state[_DESCS_ADDRESS] + slot * state[_DESC_SIZE], frameDesc, state[_DESC_SIZE])
+        # Publishes the frame only once it is copied
+        _storeRelease(state, _WRITTEN, written + 1)
+        wakeUp(state)
+        return ApiSuccess
+
+    _callback = callback
+    return _callback
+
+
+class NativeCallbackRing:
+    """
+    Receives the frames of the camera hCamera through a native frame callback (PxLApi.Callback.FRAME)
+    into a ring of count slots, sized for the FrameGeometry of the camera when the ring is started.
+    Frames of any other geometry are counted in framesMismatched and dropped; restart the ring after
+    changing the geometry. When the ring is full, incoming frames are dropped and counted in
+    framesDropped. With startStream, the stream of the camera is started when the ring is started, and
+    stopped when it is stopped.
+
+    The frame and frame descriptor returned by next view a slot of the ring, and remain valid until
+    the following call to next; only one thread should consume frames from a ring.
+
+    A NativeCallbackRing can be used as a context manager, which starts it, and stops and closes it.
+
+    Raises ImportError if Numba is not installed, or on 32-bit Windows (see haveNativeCallbacks).
+    """
+    def __init__(self, hCamera, count=16, startStream=True):
+        assert 2 <= count
+        if None == numba:
+            raise ImportError("NativeCallbackRing requires Numba")
+        if not haveNativeCallbacks:
+            raise ImportError("NativeCallbackRing isn't supported on 32-bit Windows")
+        self.hCamera = hCamera
+        self.count = count
+        self.startStream = startStream
+        self.geometry = None
+        self._state = numpy.zeros(_STATE_SIZE, numpy.int64)
+        self._state[_STATE_ADDRESS] = self._state.ctypes.data
+        self._state[_WAKE_VALUE] = 1
+        self._frames = []
+        self._frameDescs = []
+        self._buffers = None
+        self._held = False # Whether the slot of the oldest unread frame was handed out
+        self._running = False
+        self._wakeRead = self._wakeWrite = None
+        self._callback = _compileCallback()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    @property
+    def framesWritten(self):
+        return int(self._state[_WRITTEN])
+
+    @property
+    def framesDropped(self):
+        return int(self._state[_DROPPED])
+
+    @property
+    def framesMismatched(self):
+        return int(self._state[_MISMATCHED])
+
+    def _openWakeUp(self):
+        if None != self._wakeRead:
+            return
+        if os.name == 'nt':
+            kernel32 = windll.kernel32
+            kernel32.CreateEventW.restype = c_void_p
+            self._wakeRead = self._wakeWrite = kernel32.CreateEventW(None, False, False, None)
+        elif hasattr(os, "eventfd"):
+            self._wakeRead = self._wakeWrite = os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC)
+        else:
+            self._wakeRead, self._wakeWrite = os.pipe()
+            os.set_blocking(self._wakeRead, False)
+            os.set_blocking(self._wakeWrite, False)
+        self._state[_WAKE_HANDLE] = self._wakeWrite
+
+    def _wakeUp(self):
+        if os.name == 'nt':
+            windll.kernel32.SetEvent(c_void_p(self._wakeWrite))
+        else:
+            try:
+                os.write(self._wakeWrite, (1).to_bytes(8, "little"))
+            except BlockingIOError:
+                pass # There is a wake-up pending already
+
+    def _wait(self, timeout):
+        if os.name == 'nt':
+            milliseconds = 0xFFFFFFFF if None == timeout else int(timeout * 1000) # INFINITE without a timeout
+            windll.kernel32.WaitForSingleObject(c_void_p(self._wakeRead), c_uint(milliseconds))
+            return
+        select.select([self._wakeRead], [], [], timeout)
+        try:
+            os.read(self._wakeRead, 65536)
+        except BlockingIOError:
+            pass
+
+    def start(self):
+        """
+        Allocates the ring for the current frame geometry of the camera, registers the native callback
+        (and starts the stream, with startStream). Raises PxLApi.ApiError on failure.
+        """
+        if self._running:
+            return
+        ret = getFrameGeometry(self.hCamera)
+        if not PxLApi.apiSuccess(ret[0]):
+            raise PxLApi.ApiError(ret[0], "getFrameGeometry")
+        geometry = ret[1]
+        if geometry != self.geometry:
+            self.geometry = geometry
+            frameSize = geometry.frameSize()
+            slotSize = -(-frameSize // 64) * 64
+            self._buffers = (createAlignedNumPyBuffer(slotSize * self.count, 64),
+                             numpy.zeros(sizeof(PxLApi._FrameDesc) * self.count, numpy.uint8))
+            frames, frameDescs = self._buffers
+            self._frames = [frames[slot * slotSize:slot * slotSize + frameSize].view(geometry.numPyDtype()).reshape(geometry.numPyShape())
+                            for slot in range(self.count)]
+            self._frameDescs = [PxLApi._FrameDesc.from_buffer(frameDescs, slot * sizeof(PxLApi._FrameDesc))
+                                for slot in range(self.count)]
+            state = self._state
+            state[_SLOT_COUNT] = self.count
+            state[_SLOT_SIZE] = slotSize
+            state[_FRAME_SIZE] = frameSize
+            state[_FRAMES_ADDRESS] = frames.ctypes.data
+            state[_DESCS_ADDRESS] = frameDescs.ctypes.data
+            state[_DESC_SIZE] = sizeof(PxLApi._FrameDesc)
+            state[_WIDTH] = geometry.width
+            state[_HEIGHT] = geometry.height
+            state[_PIXEL_FORMAT] = geometry.pixelFormat
+            state[_HDR_INTERLEAVED] = geometry.hdrInterleaved
+        self._state[_WRITTEN] = self._state[_READ] = 0
+        self._held = False
+        self._openWakeUp()
+
+        ret = PxLApi.setCallback(self.hCamera, PxLApi.Callback.FRAME, self._state.ctypes.data, self._callback.address)
+        if not PxLApi.apiSuccess(ret[0]):
+            raise PxLApi.ApiError(ret[0], "setCallback")
+        self._running = True
+        if self.startStream:
+            ret = PxLApi.setStreamState(self.hCamera, PxLApi.StreamState.START)
+            if not PxLApi.apiSuccess(ret[0]):
+                self.stop()
+                raise PxLApi.ApiError(ret[0], "setStreamState")
+
+    def stop(self):
+        """
+        Stops the stream (with startStream) and cancels the callback. Frames already in the ring can
+        still be read after that.
+        """
+        if not self._running:
+            return
+        if self.startStream:
+            PxLApi.setStreamState(self.hCamera, PxLApi.StreamState.STOP)
+        PxLApi.setCallback(self.hCamera, PxLApi.Callback.FRAME, 0, None)
+        self._running = False
+        self._wakeUp()
+
+    def close(self):
+        """
+        Stops the ring, and releases its wake-up handle.
+        """
+        self.stop()
+        if None == self._wakeRead:
+            return
+        if os.name == 'nt':
+            windll.kernel32.CloseHandle(c_void_p(self._wakeRead))
+        else:
+            os.close(self._wakeRead)
+            if self._wakeWrite != self._wakeRead:
+                os.close(self._wakeWrite)
+        self._wakeRead = self._wakeWrite = None
+
+    def isRunning(self):
+        return self._running
+
+    def next(self, timeout=None):
+        """
+        Returns the (frame, frameDesc) of the oldest frame not read yet, waiting for at most timeout
+        seconds for one to arrive. Returns None on a timeout, or once the ring is stopped and all of its
+        frames were read.
+        """
+        state = self._state
+        if self._held:
+            # Frees the slot handed out last
+            _storeCount(state, _READ, state[_READ] + 1)
+            self._held = False
+        deadline = None if None == timeout else time.monotonic() + timeout
+        while True:
+            if _loadCount(state, _WRITTEN) > state[_READ]:
+                slot = int(state[_READ] % self.count)
+                self._held = True
+                return (self._frames[slot], self._frameDescs[slot])
+            if not self._running or None == self._wakeRead:
+                return None
+            remaining = None if None == deadline else deadline - time.monotonic()
+            if None != remaining and remaining <= 0:
+                return None
+            self._wait(remaining)
+
+    def frames(self):
+        """
+        A generator of (frame, frameDesc) tuples, ending when the ring is stopped and all of its frames
+        were read.
+        """
+        while True:
+            frame = self.next()
+            if None == frame:
+                return
+            yield frame
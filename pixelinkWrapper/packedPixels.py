@@ -0,0 +1,266 @@
+"""
+Unpacking of the packed pixel formats.
+
+Packed pixel formats save bandwidth by not padding pixels to whole bytes, as getBytesPerPixel shows:
+    - The 12 bit packed formats (MONO12_PACKED, BAYER12_*_PACKED and their _MSFIRST variants) store
+      2 pixels in 3 bytes:
+        LS first: byte 0 holds the 8 most significant bits of the first pixel and byte 2 those of the
+                  second pixel; the low nibble of byte 1 holds the 4 least significant bits of the first
+                  pixel, its high nibble those of the second pixel.
+        MS first: the pixels are a big endian bit stream; byte 0 and the high nibble of byte 1 hold the
+                  first pixel, the low nibble of byte 1 and byte 2 the second pixel.
+    - The 10 bit packed formats (MONO10_PACKED_MSFIRST and BAYER10_*_PACKED_MSFIRST) store 4 pixels in
+      5 bytes, as a big endian bit stream: byte 0 and the 2 most significant bits of byte 1 hold the
+      first pixel, the remaining 6 bits of byte 1 and the high nibble of byte 2 the second pixel, and
+      so on.
+
+The unpackers turn each packed row into a row of uint16 pixels, with pixel values ranging from 0 up
+to 1023 for 10 bit pixels and 4095 for 12 bit pixels. They write into an output array, which can be supplied by the caller to
+avoid allocating one per frame. The output can be any (strided) 2D view of a uint16 array, such as an
+ROI of a larger one.
+
+The unpackers are vectorized with NumPy. If Numba is installed, compiled unpackers, that also spread
+the rows over multiple cores, are used instead. unpackReference is a plain Python implementation,
+far too slow for streaming, that the others are verified and benchmarked against.
+
+NumPy is required for this module.
+"""
+
+from . pixelink import PxLApi
+import numpy
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+"""
+Whether the compiled (Numba) unpackers are available
+"""
+haveCompiledUnpackers = None != numba
+
+_12bitLsFirstFormats = frozenset((PxLApi.PixelFormat.MONO12_PACKED, PxLApi.PixelFormat.BAYER12_GRBG_PACKED,
+                                  PxLApi.PixelFormat.BAYER12_RGGB_PACKED, PxLApi.PixelFormat.BAYER12_GBRG_PACKED,
+                                  PxLApi.PixelFormat.BAYER12_BGGR_PACKED))
+_12bitMsFirstFormats = frozenset((PxLApi.PixelFormat.MONO12_PACKED_MSFIRST, PxLApi.PixelFormat.BAYER12_GRBG_PACKED_MSFIRST,
+                                  PxLApi.PixelFormat.BAYER12_RGGB_PACKED_MSFIRST, PxLApi.PixelFormat.BAYER12_GBRG_PACKED_MSFIRST,
+                                  PxLApi.PixelFormat.BAYER12_BGGR_PACKED_MSFIRST))
+_10bitMsFirstFormats = frozenset((PxLApi.PixelFormat.MONO10_PACKED_MSFIRST, PxLApi.PixelFormat.BAYER10_GRBG_PACKED_MSFIRST,
+                                  PxLApi.PixelFormat.BAYER10_RGGB_PACKED_MSFIRST, PxLApi.PixelFormat.BAYER10_GBRG_PACKED_MSFIRST,
+                                  PxLApi.PixelFormat.BAYER10_BGGR_PACKED_MSFIRST))
+
+
+def isPackedFormat(pixelFormat):
+    """
+    Returns True for the pixel formats that unpackFrame can unpack.
+    """
+    return pixelFormat in _12bitLsFirstFormats or pixelFormat in _12bitMsFirstFormats or \
+        pixelFormat in _10bitMsFirstFormats
+
+
+def packedRowSize(width, bitsPerPixel):
+    """
+    Returns the number of bytes in a packed row of width pixels of bitsPerPixel bits.
+    """
+    return (width * bitsPerPixel + 7) // 8
+
+
+def _packedRows(packed, width, height, bitsPerPixel, rowStride):
+    # Returns the packed data as a (height, packed row size) uint8 array, without copying it
+    rowSize = packedRowSize(width, bitsPerPixel)
+    if None == rowStride:
+        rowStride = rowSize
+    if rowStride < rowSize:
+        raise ValueError("rowStride of {0} bytes is less than a packed row of {1} bytes".format(rowStride, rowSize))
+    packed = numpy.frombuffer(packed, numpy.uint8)
+    if len(packed) < rowStride * (height - 1) + rowSize:
+        raise ValueError("{0} bytes can't hold {1} packed rows of {2} bytes".format(len(packed), height, rowSize))
+    return numpy.lib.stride_tricks.as_strided(packed, (height, rowSize), (rowStride, 1), writeable=False)
+
+
+def _output(out, width, height):
+    if out is None:
+        return numpy.empty((height, width), numpy.uint16)
+    if out.dtype != numpy.uint16 or out.shape != (height, width):
+        raise ValueError("out must be a ({0}, {1}) uint16 array".format(height, width))
+    return out
+
+
+def _useCompiled(compiled):
+    if None == compiled:
+        return haveCompiledUnpackers
+    if compiled and not haveCompiledUnpackers:
+        raise ImportError("The compiled unpackers require Numba")
+    return compiled
+
+
+def _unpack12NumPy(rows, out, msFirst):
+    pairs = out.shape[1] // 2
+    triplets = rows[:, :pairs * 3].reshape(rows.shape[0], pairs, 3)
+    b0 = triplets[:, :, 0]
+    b1 = triplets[:, :, 1]
+    b2 = triplets[:, :, 2]
+    even = out[:, 0:pairs * 2:2]
+    odd = out[:, 1:pairs * 2:2]
+    numpy.left_shift(b0, 4, out=even, dtype=numpy.uint16)
+    if msFirst:
+        even |= b1 >> 4
+        numpy.bitwise_and(b1, 0xF, out=odd, dtype=numpy.uint16)
+        odd <<= 8
+        odd |= b2
+    else:
+        even |= b1 & 0xF
+        numpy.left_shift(b2, 4, out=odd, dtype=numpy.uint16)
+        odd |= b1 >> 4
+    if out.shape[1] % 2:
+        # The last pixel of an odd width row is in a final pair of bytes
+        last = out[:, -1]
+        numpy.left_shift(rows[:, pairs * 3], 4, out=last, dtype=numpy.uint16)
+        if msFirst:
+            last |= rows[:, pairs * 3 + 1] >> 4
+        else:
+            last |= rows[:, pairs * 3 + 1] & 0xF
+
+
+def _unpack10NumPy(rows, out):
+    quads = out.shape[1] // 4
+    quintets = rows[:, :quads * 5].reshape(rows.shape[0], quads, 5)
+    b = [quintets[:, :, i] for i in range(5)]
+    p = [out[:, i:quads * 4:4] for i in range(4)]
+    numpy.left_shift(b[0], 2, out=p[0], dtype=numpy.uint16)
+    p[0] |= b[1] >> 6
+    numpy.bitwise_and(b[1], 0x3F, out=p[1], dtype=numpy.uint16)
+    p[1] <<= 4
+    p[1] |= b[2] >> 4
+    numpy.bitwise_and(b[2], 0xF, out=p[2], dtype=numpy.uint16)
+    p[2] <<= 6
+    p[2] |= b[3] >> 2
+    numpy.bitwise_and(b[3], 0x3, out=p[3], dtype=numpy.uint16)
+    p[3] <<= 8
+    p[3] |= b[4]
+    # The last pixels of a row with a width that's not a multiple of 4 are in a final, partial group
+    for x in range(quads * 4, out.shape[1]):
+        bit = x * 10
+        pixel = out[:, x]
+        numpy.left_shift(rows[:, bit // 8], 8, out=pixel, dtype=numpy.uint16)
+        pixel |= rows[:, bit // 8 + 1]
+        pixel >>= 6 - bit % 8
+        pixel &= 0x3FF
+
+
+if haveCompiledUnpackers:
+    @numba.njit(parallel=True, cache=True, nogil=True)
+    def _unpack12Compiled(rows, out, msFirst):
+        height, width = out.shape
+        for y in numba.prange(height):
+            row = rows[y]
+            for i in range(width // 2):
+                b0 = numpy.uint16(row[3 * i])
+                b1 = numpy.uint16(row[3 * i + 1])
+                b2 = numpy.uint16(row[3 * i + 2])
+                if msFirst:
+                    out[y, 2 * i] = (b0 << 4) | (b1 >> 4)
+                    out[y, 2 * i + 1] = ((b1 & 0xF) << 8) | b2
+                else:
+                    out[y, 2 * i] = (b0 << 4) | (b1 & 0xF)
+                    out[y, 2 * i + 1] = (b2 << 4) | (b1 >> 4)
+            if width % 2:
+                b0 = numpy.uint16(row[3 * (width // 2)])
+                b1 = numpy.uint16(row[3 * (width // 2) + 1])
+                if msFirst:
+                    out[y, width - 1] = (b0 << 4) | (b1 >> 4)
+                else:
+                    out[y, width - 1] = (b0 << 4) | (b1 & 0xF)
+
+    @numba.njit(parallel=True, cache=True, nogil=True)
+    def _unpack10Compiled(rows, out):
+        height, width = out.shape
+        for y in numba.prange(height):
+            row = rows[y]
+            for i in range(width // 4):
+                b0 = numpy.uint16(row[5 * i])
+                b1 = numpy.uint16(row[5 * i + 1])
+                b2 = numpy.uint16(row[5 * i + 2])
+                b3 = numpy.uint16(row[5 * i + 3])
+                b4 = numpy.uint16(row[5 * i + 4])
+                out[y, 4 * i] = (b0 << 2) | (b1 >> 6)
+                out[y, 4 * i + 1] = ((b1 & 0x3F) << 4) | (b2 >> 4)
+                out[y, 4 * i + 2] = ((b2 & 0xF) << 6) | (b3 >> 2)
+                out[y, 4 * i + 3] = ((b3 & 0x3) << 8) | b4
+            for x in range(width // 4 * 4, width):
+                bit = x * 10
+                pixel = (numpy.uint16(row[bit // 8]) << 8) | numpy.uint16(row[bit // 8 + 1])
+                out[y, x] = (pixel >> (6 - bit % 8)) & 0x3FF
+
+
+def unpack12(packed, width, height, out=None, msFirst=False, rowStride=None, compiled=None):
+    """
+    Unpacks height rows of width 12 bit pixels into out, a (height, width) uint16 array that is
+    allocated if not supplied, and returns it. packed can be a NumPy array, a ctypes buffer or any
+    other object supporting the buffer protocol, holding packed rows rowStride bytes apart (by default,
+    the rows are back to back). msFirst selects the bit order of the _MSFIRST formats. compiled selects
+    the compiled unpacker (True) or the NumPy one (False); by default, the compiled one is used if
+    Numba is installed.
+    """
+    rows = _packedRows(packed, width, height, 12, rowStride)
+    out = _output(out, width, height)
+    if _useCompiled(compiled):
+        _unpack12Compiled(rows, out, msFirst)
+    else:
+        _unpack12NumPy(rows, out, msFirst)
+    return out
+
+
+def unpack10(packed, width, height, out=None, rowStride=None, compiled=None):
+    """
+    Unpacks height rows of width 10 bit (MS first) pixels into out, a (height, width) uint16 array that
+    is allocated if not supplied, and returns it. The arguments are the same as those of unpack12.
+    """
+    rows = _packedRows(packed, width, height, 10, rowStride)
+    out = _output(out, width, height)
+    if _useCompiled(compiled):
+        _unpack10Compiled(rows, out)
+    else:
+        _unpack10NumPy(rows, out)
+    return out
+
+
+def unpackReference(packed, width, height, bitsPerPixel, msFirst=False, rowStride=None):
+    """
+    Unpacks packed pixels just like unpack10 or unpack12, one pixel at a time in plain Python. Like
+    unpack12, it takes 12 bit pixels to be LS first unless msFirst; 10 bit pixels are always MS first.
+    """
+    rows = _packedRows(packed, width, height, bitsPerPixel, rowStride)
+    out = numpy.empty((height, width), numpy.uint16)
+    mask = (1 << bitsPerPixel) - 1
+    for y in range(height):
+        row = bytes(rows[y])
+        for x in range(width):
+            if msFirst or 10 == bitsPerPixel:
+                # Take the (at most 3) bytes the pixel is in as a big endian number
+                bit = x * bitsPerPixel
+                group = row[bit // 8:bit // 8 + 3].ljust(3, b"\0")
+                pixel = int.from_bytes(group, "big") >> (24 - bit % 8 - bitsPerPixel)
+            elif 0 == x % 2:
+                pixel = row[x // 2 * 3] << 4 | row[x // 2 * 3 + 1] & 0xF
+            else:
+                pixel = row[x // 2 * 3 + 2] << 4 | row[x // 2 * 3 + 1] >> 4
+            out[y, x] = pixel & mask
+    return out
+
+
+def unpackFrame(frame, frameDesc, out=None, compiled=None):
+    """
+    Unpacks a frame of one of the packed pixel formats, as described by its frame descriptor (from
+    getNextFrame or getNextNumPyFrame), into out, and returns it. See unpack10 and unpack12 for the
+    details.
+    Raises ValueError for any other pixel format.
+    """
+    pixelFormat = int(frameDesc.PixelFormat.fValue)
+    width = int(frameDesc.Roi.fWidth / frameDesc.PixelAddressingValue.fHorizontal)
+    height = int(frameDesc.Roi.fHeight / frameDesc.PixelAddressingValue.fVertical)
+    if pixelFormat in _12bitLsFirstFormats or pixelFormat in _12bitMsFirstFormats:
+        return unpack12(frame, width, height, out, pixelFormat in _12bitMsFirstFormats, compiled=compiled)
+    if pixelFormat in _10bitMsFirstFormats:
+        return unpack10(frame, width, height, out, compiled=compiled)
+    raise ValueError("Pixel format {0} is not a packed pixel format".format(pixelFormat))
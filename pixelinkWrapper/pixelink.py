@@ -41,9 +41,10 @@ cameras, as well as camera operation with Navitar zoom systems.
 """
 
 from ctypes import*
-from ctypes import util
+import itertools
 import os
-import subprocess
+import re
+import threading
 
 class PxLApi:
     """
@@ -51,7 +52,12 @@ class PxLApi:
     """
     """
     Dynamic link library loader
-    The Pixelink 4.0 API library loaded will depend on the operating system
+    The Pixelink 4.0 API library loaded will depend on the operating system. The library is not 
+    loaded when the wrapper is imported, but rather on the first Pixelink API function call. Its 
+    version is verified at that time too, unless the PIXELINK_SKIP_VERSION_CHECK environment 
+    variable is set (to anything other than 0).
+    Setting the PIXELINK_API_BACKEND environment variable to 'simulator' loads the simulated 
+    camera library of the simulator module instead. See also setApiBackend.
     """
     ## Checks if the loaded Pixelink API is supported
     def _isApiSupported(minApiNumbers, curApiNumbers):
@@ -61,55 +67,149 @@ class PxLApi:
                 return True
         
         return False
-    
+
     if os.name == 'nt': # on Windows
-        ## Queries Pixelink registry key
-        _regApiCommand = ["REG", "QUERY", "HKEY_CURRENT_USER\\Software\\PixeLINK", "/ve"]
-        _pipe = subprocess.Popen(_regApiCommand, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        _pipe.communicate()
-        _regApiPresent = _pipe.returncode
-        if 0 < _regApiPresent:
+        _apiLibraryName = "PxLAPI40.dll"
+        _minApiVersion = "4.2.6.29" # minimum Pixelink API version supported
+        _sdkName = "Pixelink SDK"
+    else: # on Linux
+        _apiLibraryName = "libPxLApi.so"
+        _minApiVersion = "4.2.2.11" # minimum Pixelink API version supported
+        _sdkName = "Linux SDK"
+
+    ## Determines the version of the Pixelink API library loaded into this process (Windows)
+    def _getWindowsApiVersion(library):
+        import winreg
+        # Checks for the Pixelink registry key
+        try:
+            winreg.CloseKey(winreg.OpenKey(winreg.HKEY_CURRENT_USER, "Software\\PixeLINK"))
+        except OSError:
             print("\nWARNING: The system was unable to find the required Pixelink registry setting. This could\n"
                   "be because the Pixelink software was installed by a different (administrative) user, in which\n"
                   "case you would not have access to versioning information.")
-        
-        ## Loads Pixelink API library
-        _Api = WinDLL("PxLAPI40.dll")
-
-        ## Verifies that the loaded Pixelink API version is supported
-        _minApiVersion = "4.2.6.29" # minimum Pixelink API version supported
-        # Finds Pixelink API full path
-        _pxlApiPath = util.find_library("PxLAPI40.dll").replace("\\", "\\\\")
-        # PowerShell query
-        _powerShellCommand = "Get-CimInstance -Query \"SELECT Version FROM CIM_DataFile WHERE Name='" + _pxlApiPath + "'\""
-        # Queries installed Pixelink API file version
-        _completedProcess = subprocess.run(["powershell", "-Command", _powerShellCommand], text=True, capture_output=True, check=True)
-        _curApiVersion = _completedProcess.stdout
-        _curApiVersion = _curApiVersion.split("Version")[1].replace("Writeable", "").replace(":", "").replace("\n", "").strip()
+        # Finds the full path of the loaded module
+        ctbPath = create_unicode_buffer(1024)
+        if 0 == windll.kernel32.GetModuleFileNameW(c_void_p(library._handle), ctbPath, len(ctbPath)):
+            return None
+        # Reads the fixed file information from the module version resource
+        version = windll.version
+        ctVersionInfoSize = version.GetFileVersionInfoSizeW(ctbPath, None)
+        if 0 == ctVersionInfoSize:
+            return None
+        ctbVersionInfo = create_string_buffer(ctVersionInfoSize)
+        if not version.GetFileVersionInfoW(ctbPath, 0, ctVersionInfoSize, ctbVersionInfo):
+            return None
+        ctFixedFileInfo = POINTER(c_uint)()
+        ctFixedFileInfoSize = c_uint(0)
+        if not version.VerQueryValueW(ctbVersionInfo, "\\", byref(ctFixedFileInfo), byref(ctFixedFileInfoSize)):
+            return None
+        # dwFileVersionMS and dwFileVersionLS of VS_FIXEDFILEINFO
+        versionMS = ctFixedFileInfo[2]
+        versionLS = ctFixedFileInfo[3]
+        return "{0}.{1}.{2}.{3}".format(versionMS >> 16, versionMS & 0xFFFF, versionLS >> 16, versionLS & 0xFFFF)
+
+    ## Determines the version of the Pixelink API library loaded into this process (Linux)
+    def _getLinuxApiVersion(library):
+        versionPattern = re.compile(r"libPxLApi(?:Lite)?\.so\.([0-9.]+)$")
+        apiPaths = []
+        # Asks the dynamic linker where it found the library
+        class _LinkMap(Structure):
+            _fields_ = [("l_addr", c_void_p),
+                        ("l_name", c_char_p)]
+        try:
+            ctLinkMap = POINTER(_LinkMap)()
+            RTLD_DI_LINKMAP = 2
+            if 0 == CDLL(None).dlinfo(c_void_p(library._handle), RTLD_DI_LINKMAP, byref(ctLinkMap)):
+                apiPaths.append(ctLinkMap.contents.l_name.decode('utf-8'))
+        except (AttributeError, ValueError):
+            pass
+        if not apiPaths:
+            # dlinfo is not available, or failed, so look at what is mapped into this process instead
+            try:
+                with open("/proc/self/maps") as maps:
+                    for line in maps:
+                        if "libPxLApi" in line:
+                            apiPaths.append(line.split()[-1])
+                            break
+            except OSError:
+                pass
+        # The soname symbolic link resolves to the fully versioned file name
+        for apiPath in apiPaths:
+            match = versionPattern.search(os.path.basename(os.path.realpath(apiPath)))
+            if match:
+                return match.group(1).strip(".")
+        # Not a versioned file, so look for one alongside the libraries in $PIXELINK_SDK_LIB
+        sdkLibPath = os.environ.get("PIXELINK_SDK_LIB")
+        if sdkLibPath and os.path.isdir(sdkLibPath):
+            for fileName in os.listdir(sdkLibPath):
+                match = versionPattern.search(fileName)
+                if match:
+                    return match.group(1).strip(".")
+        return None
+
+    ## Verifies that the loaded Pixelink API version is supported
+    def _checkApiVersion(library):
+        if os.name == 'nt':
+            curApiVersion = PxLApi._getWindowsApiVersion(library)
+        else:
+            curApiVersion = PxLApi._getLinuxApiVersion(library)
+        if None == curApiVersion:
+            return None
         # Checks if the loaded Pixelink API is supported
-        if _isApiSupported(_minApiVersion.split("."), _curApiVersion.split(".")):
+        if PxLApi._isApiSupported(PxLApi._minApiVersion.split("."), curApiVersion.split(".")):
             print("\nWARNING: Pixelink API Version {0} detected. This Python wrapper was designed to\n" 
-                  "API Version {1} – upgrade to the latest Pixelink SDK for full functionality and\n"
-                  "performance.\n".format(_curApiVersion, _minApiVersion))
-
-    else: # on Linux
-        ## Loads Pixelink API library
-        _Api = CDLL('libPxLApi.so')
+                  "API Version {1} – upgrade to the latest {2} for full functionality and\n"
+                  "performance.\n".format(curApiVersion, PxLApi._minApiVersion, PxLApi._sdkName))
+        return curApiVersion
 
-        ## Verifies that the loaded Pixelink API version is supported
-        _minApiVersion = "4.2.2.11" # minimum Pixelink API version supported
-        # Searches for installed Pixelink API or Pixelink API Lite file and its full path from $PIXELINK_SDK_LIB
-        _pxlApiSearch = "find $PIXELINK_SDK_LIB -name 'libPxLApi*.so.*'"
-        _completedProcess = subprocess.run(_pxlApiSearch, shell=True, text=True, capture_output=True, check=True)
-        _pxlApiPath = _completedProcess.stdout
-        # Finds current version of Pixelink API
-        _pxlApiList = _pxlApiPath.split("/")
-        _curApiVersion = _pxlApiList[len(_pxlApiList)-1].replace("libPxLApi.so.", "").replace("libPxLApiLite.so.", "").strip()
-        # Checks if the loaded Pixelink API is supported
-        if _isApiSupported(_minApiVersion.split("."), _curApiVersion.split(".")):
-            print("\nWARNING: Pixelink API Version {0} detected. This Python wrapper was designed to\n" 
-                  "API Version {1} – upgrade to the latest Linux SDK for full functionality and "
-                  "performance.\n".format(_curApiVersion, _minApiVersion))
+    class _ApiLoader:
+        """
+        Stands in for the Pixelink API library until the first Pixelink API function is called. The
+        library is then loaded (and its version checked) exactly once, and its functions, prototyped
+        as per _apiPrototypes, are cached on the loader, so later calls don't come through here again.
+        """
+        def __init__(self):
+            self._lock = threading.Lock()
+            self._library = None
+            self._curApiVersion = None
+
+        def __getattr__(self, name):
+            if name.startswith("_"):
+                raise AttributeError(name)
+            function = getattr(self._load(), name)
+            setattr(self, name, function)
+            return function
+
+        def _load(self):
+            with self._lock:
+                if None == self._library:
+                    if "simulator" == os.environ.get("PIXELINK_API_BACKEND", ""):
+                        from . simulator import SimulatedApi
+                        self._library = SimulatedApi()
+                        return self._library
+                    if os.name == 'nt':
+                        library = WinDLL(PxLApi._apiLibraryName)
+                    else:
+                        library = CDLL(PxLApi._apiLibraryName)
+                    if os.environ.get("PIXELINK_SKIP_VERSION_CHECK", "0") in ("", "0"):
+                        self._curApiVersion = PxLApi._checkApiVersion(library)
+                    # Builds the function table
+                    for name, argtypes in PxLApi._apiPrototypes.items():
+                        try:
+                            function = getattr(library, name)
+                        except AttributeError:
+                            continue # not exported by this version of the library
+                        function.argtypes = argtypes
+                        function.restype = c_int
+                        setattr(self, name, function)
+                    self._library = library
+            return self._library
+
+    ## Pixelink API library, loaded on first use
+    _Api = _ApiLoader()
+
+    ## Per thread data, such as the reused frame descriptor of getNextFrame
+    _threadData = threading.local()
 
     """
     Pixelink API class defines
@@ -703,6 +803,60 @@ class PxLApi:
         ApiH264FrameTooLargeError = ApiVideoFrameTooLargeError
         ApiH264InsufficientDataError = ApiVideoInsufficientDataError
 
+    ## Return codes of getNextFrame and the like that end an acquisition, as there is no sense in continuing
+    _fatalStreamReturnCodes = frozenset((ReturnCode.ApiStreamStopped,
+                                         ReturnCode.ApiNoCameraError,
+                                         ReturnCode.ApiNoCameraAvailableError))
+
+    """
+    ApiError is raised by the helper classes of this package (such as FramePool) that, unlike the 
+    Pixelink API functions, can't return a return code. The failing return code is held in rc.
+    """
+    class ApiError(Exception):
+        def __init__(self, rc, functionName=None):
+            self.rc = rc
+            self.functionName = functionName
+            if None == functionName:
+                super().__init__("Pixelink API error {0}".format(rc))
+            else:
+                super().__init__("{0} failed with Pixelink API error {1}".format(functionName, rc))
+
+    """
+    Frame geometry tracking
+    The size of the frames a camera delivers only changes with the features listed in _sizeFeatures 
+    (or when settings are loaded). Whenever one of them is set, the camera is given a new geometry 
+    generation, so that anything derived from the frame size, such as the buffers of a FramePool, 
+    knows to recalculate it.
+    """
+    _sizeFeatures = (FeatureId.ROI, FeatureId.PIXEL_ADDRESSING, FeatureId.PIXEL_FORMAT, FeatureId.GAIN_HDR)
+    _geometryGenerations = {}
+    _nextGeometryGeneration = itertools.count(1)
+
+    ## Returns the current geometry generation of a camera
+    def _geometryGeneration(hCamera):
+        return PxLApi._geometryGenerations.get(hCamera, 0)
+
+    ## Notes that the frame geometry of a camera (may have) changed
+    def _geometryChanged(hCamera):
+        PxLApi._geometryGenerations[hCamera] = next(PxLApi._nextGeometryGeneration)
+        PxLApi._outputSizes.pop(("getCameraXml", hCamera), None)
+
+    """
+    Connection tracking
+    A camera handle is given a new connection generation whenever it is initialized or uninitialized, 
+    so that anything learnt about the camera once per connection, such as its FeatureCatalog, knows 
+    when the handle may be that of another (or a reconnected) camera.
+    """
+    _connectionGenerations = {}
+
+    ## Returns the current connection generation of a camera
+    def _connectionGeneration(hCamera):
+        return PxLApi._connectionGenerations.get(hCamera, 0)
+
+    ## Notes that a camera handle was (re)connected or disconnected
+    def _connectionChanged(hCamera):
+        PxLApi._connectionGenerations[hCamera] = next(PxLApi._nextGeometryGeneration)
+
     """
     The following Pixelink API classes represent wrapped structures.
     Equivalent Pixelink 4.0 API structures and their additional information
@@ -1046,6 +1200,56 @@ class PxLApi:
         # setEventCallback
         _eventProcessFunction = CFUNCTYPE(c_uint, c_uint, c_uint, c_double, c_uint, POINTER(c_ubyte), c_void_p)
 
+    """
+    Pixelink 4.0 API function prototypes
+    The argument types of each Pixelink 4.0 API function wrapped by this module, as declared in 
+    PixeLINKApi.h. They are applied to the library functions once, when the library gets loaded, 
+    so that ctypes doesn't have to guess argument conversions on every call. All of the functions 
+    return a PXL_RETURN_CODE. Data buffers and callback functions are passed as void pointers; 
+    frame descriptors (and other structures) may be passed either by reference or as is.
+    """
+    _apiPrototypes = {
+        "PxLAssignController": (c_void_p, c_uint),
+        "PxLCreateDescriptor": (c_void_p, POINTER(c_void_p), c_uint),
+        "PxLDecompressFrame": (c_void_p, POINTER(_FrameDesc), c_void_p, c_void_p, POINTER(c_uint)),
+        "PxLFormatClipEx": (c_char_p, c_char_p, c_uint, c_uint),
+        "PxLFormatImage": (c_void_p, POINTER(_FrameDesc), c_uint, c_void_p, POINTER(c_uint)),
+        "PxLGetActions": (c_void_p, POINTER(c_double), POINTER(c_uint)),
+        "PxLGetCameraFeatures": (c_void_p, c_uint, c_void_p, POINTER(c_uint)),
+        "PxLGetCameraInfoEx": (c_void_p, POINTER(_CameraInfo), c_uint),
+        "PxLGetCameraXML": (c_void_p, c_void_p, POINTER(c_uint)),
+        "PxLGetClip": (c_void_p, c_uint, c_char_p, c_void_p),
+        "PxLGetCurrentTimestamp": (c_void_p, POINTER(c_double)),
+        "PxLGetEncodedClip": (c_void_p, c_uint, c_char_p, POINTER(ClipEncodingInfo), c_void_p),
+        "PxLGetErrorReport": (c_void_p, POINTER(_ErrorReport)),
+        "PxLGetFeature": (c_void_p, c_uint, POINTER(c_uint), POINTER(c_uint), c_void_p),
+        "PxLGetNextCompressedFrame": (c_void_p, c_uint, c_void_p, POINTER(_FrameDesc), c_void_p, POINTER(c_uint)),
+        "PxLGetNextFrame": (c_void_p, c_uint, c_void_p, POINTER(_FrameDesc)),
+        "PxLGetNumberCamerasEx": (c_void_p, POINTER(c_uint)),
+        "PxLGetNumberControllers": (c_void_p, c_uint, POINTER(c_uint)),
+        "PxLGetStreamState": (c_void_p, POINTER(c_uint), POINTER(c_uint)),
+        "PxLInitializeEx": (c_uint, POINTER(c_void_p), c_uint),
+        "PxLLoadSettings": (c_void_p, c_uint),
+        "PxLPrivateCmd": (c_void_p, c_uint, c_void_p),
+        "PxLRemoveDescriptor": (c_void_p, c_void_p),
+        "PxLResetPreviewWindow": (c_void_p,),
+        "PxLSaveSettings": (c_void_p, c_uint),
+        "PxLSetActions": (c_uint, c_double),
+        "PxLSetCallback": (c_void_p, c_uint, c_void_p, c_void_p),
+        "PxLSetCameraIpAddress": (c_void_p, c_void_p, c_void_p, c_void_p, c_int),
+        "PxLSetCameraName": (c_void_p, c_char_p),
+        "PxLSetEventCallback": (c_void_p, c_uint, c_void_p, c_void_p),
+        "PxLSetFeature": (c_void_p, c_uint, c_uint, c_uint, c_void_p),
+        "PxLSetFrameBufferPolicy": (c_void_p, c_uint, c_uint, c_uint),
+        "PxLSetPreviewSettings": (c_void_p, c_char_p, c_uint, c_int, c_int, c_uint, c_uint, c_void_p, c_uint),
+        "PxLSetPreviewState": (c_void_p, c_uint, POINTER(c_void_p)),
+        "PxLSetPreviewStateEx": (c_void_p, c_uint, POINTER(c_void_p), c_void_p, c_void_p),
+        "PxLSetStreamState": (c_void_p, c_uint),
+        "PxLUnassignController": (c_void_p, c_uint),
+        "PxLUninitialize": (c_void_p,),
+        "PxLUpdateDescriptor": (c_void_p, c_void_p, c_uint),
+    }
+
     """ 
     Pixelink API functions
     Many of these functions are equivalent to functions found in the native Pixelink 4.0 API.
@@ -1094,6 +1298,44 @@ class PxLApi:
             return (rc,)
         return (rc, ctDescriptorHandle.value)
 
+    """
+    createFrameDesc creates a frame descriptor that can be passed to, and reused by, getNextFrame and
+    getNextNumPyFrame.
+    There is no equivalent function in Pixelink 4.0 API.
+    """
+    def createFrameDesc():
+        ctFrameDesc = PxLApi._FrameDesc()
+        ctFrameDesc.uSize = sizeof(ctFrameDesc) # The API needs to know the version of descriptor
+        return ctFrameDesc
+
+    ## Returns the frame descriptor reused by the calling thread
+    def _threadFrameDesc():
+        try:
+            return PxLApi._threadData.frameDesc
+        except AttributeError:
+            PxLApi._threadData.frameDesc = PxLApi.createFrameDesc()
+            return PxLApi._threadData.frameDesc
+
+    """
+    Output size cache
+    decompressFrame, formatImage, formatNumPyImage, formatToArray and getCameraXml learn the size of 
+    their output from a first, probing, call of the native function. As that size only depends on the 
+    frame geometry (ROI, pixel addressing, pixel format and HDR mode) of the frame descriptor and on 
+    the output format, it is cached in _outputSizes, keyed by those, so that only the first call for 
+    a frame geometry probes. Image formats of a variable size, such as PNG and JPEG, are never cached. 
+    The camera XML size is cached per camera, and forgotten when the frame geometry of the camera 
+    changes. Should a cached size ever turn out to be too small, it is dropped and the size probed again.
+    """
+    _outputSizes = {}
+    _fixedSizeImageFormats = frozenset((ImageFormat.BMP, ImageFormat.RAW_MONO8, ImageFormat.RAW_RGB24_DIB, 
+                                        ImageFormat.RAW_RGB24_NON_DIB, ImageFormat.RAW_BGR24_NON_DIB, 
+                                        ImageFormat.RAW_RGB48))
+
+    ## Returns the frame geometry of a frame descriptor as a tuple, usable as a key
+    def _frameDescGeometryKey(frameDesc):
+        return (frameDesc.Roi.fWidth, frameDesc.Roi.fHeight, frameDesc.PixelAddressingValue.fHorizontal,
+                frameDesc.PixelAddressingValue.fVertical, frameDesc.PixelFormat.fValue, frameDesc.HDRInfo.uMode)
+
     def decompressFrame(srcFrame, srcFrameDesc, compressionDesc, destBuffer=None):
         """
 		decompressFrame expects compressed frame and uncompressed frame data buffer arguments being passed as mutable 
@@ -1105,9 +1347,13 @@ class PxLApi:
         """
         ctBufferSize = c_uint(0)
         if (None == destBuffer or 0 == destBuffer):
+            key = ("decompressFrame", PxLApi._frameDescGeometryKey(srcFrameDesc))
+            if key in PxLApi._outputSizes:
+                return (PxLApi.ReturnCode.ApiSuccess, PxLApi._outputSizes[key])
             rc = PxLApi._Api.PxLDecompressFrame(byref(srcFrame), byref(srcFrameDesc), compressionDesc, None, byref(ctBufferSize))
             if(not(PxLApi.apiSuccess(rc))):
                 return (rc,)
+            PxLApi._outputSizes[key] = ctBufferSize.value
             return (rc, ctBufferSize.value)
         ctBufferSize.value = len(destBuffer)
         rc = PxLApi._Api.PxLDecompressFrame(byref(srcFrame), byref(srcFrameDesc), compressionDesc, byref(destBuffer), byref(ctBufferSize))
@@ -1128,12 +1374,20 @@ class PxLApi:
         using the ctypes.create_string_buffer() function.
         For example, see getSnapshot.py sample that uses this function.
         """
-        ctBufferSize = c_uint(0)
-        rc = PxLApi._Api.PxLFormatImage(byref(srcImage), byref(srcFrameDesc), outputFormat, None, byref(ctBufferSize))
-        if(not(PxLApi.apiSuccess(rc))):
-            return (rc,)
-        ctbDstImage = create_string_buffer(ctBufferSize.value)
-        rc = PxLApi._Api.PxLFormatImage(byref(srcImage), byref(srcFrameDesc), outputFormat, byref(ctbDstImage), byref(ctBufferSize))
+        key = (PxLApi._frameDescGeometryKey(srcFrameDesc), outputFormat)
+        for attempt in range(2):
+            ctBufferSize = c_uint(PxLApi._outputSizes.get(key, 0))
+            if 0 == ctBufferSize.value:
+                rc = PxLApi._Api.PxLFormatImage(byref(srcImage), byref(srcFrameDesc), outputFormat, None, byref(ctBufferSize))
+                if(not(PxLApi.apiSuccess(rc))):
+                    return (rc,)
+                if outputFormat in PxLApi._fixedSizeImageFormats:
+                    PxLApi._outputSizes[key] = ctBufferSize.value
+            ctbDstImage = create_string_buffer(ctBufferSize.value)
+            rc = PxLApi._Api.PxLFormatImage(byref(srcImage), byref(srcFrameDesc), outputFormat, byref(ctbDstImage), byref(ctBufferSize))
+            # A cached size that is too small is dropped, and the size probed again (once)
+            if PxLApi.ReturnCode.ApiBufferTooSmall != rc or None == PxLApi._outputSizes.pop(key, None):
+                break
         if(not(PxLApi.apiSuccess(rc))):
             return (rc,)
         return (rc, ctbDstImage)
@@ -1145,15 +1399,98 @@ class PxLApi:
 
         See getNumPySnapshot.py sample as an example on how to use this function.
         """
-        ctBufferSize = c_uint(0)
-        rc = PxLApi._Api.PxLFormatImage(srcImage.ctypes.data_as(c_void_p), byref(srcFrameDesc), outputFormat, None, byref(ctBufferSize))
+        key = (PxLApi._frameDescGeometryKey(srcFrameDesc), outputFormat)
+        for attempt in range(2):
+            ctBufferSize = c_uint(PxLApi._outputSizes.get(key, 0))
+            if 0 == ctBufferSize.value:
+                rc = PxLApi._Api.PxLFormatImage(srcImage.ctypes.data_as(c_void_p), byref(srcFrameDesc), outputFormat, None, byref(ctBufferSize))
+                if(not(PxLApi.apiSuccess(rc))):
+                    return (rc,)
+                if outputFormat in PxLApi._fixedSizeImageFormats:
+                    PxLApi._outputSizes[key] = ctBufferSize.value
+            ctbDstImage = create_string_buffer(ctBufferSize.value)
+            rc = PxLApi._Api.PxLFormatImage(srcImage.ctypes.data_as(c_void_p), byref(srcFrameDesc), outputFormat, byref(ctbDstImage), byref(ctBufferSize))
+            # A cached size that is too small is dropped, and the size probed again (once)
+            if PxLApi.ReturnCode.ApiBufferTooSmall != rc or None == PxLApi._outputSizes.pop(key, None):
+                break
         if(not(PxLApi.apiSuccess(rc))):
             return (rc,)
-        ctbDstImage = create_string_buffer(ctBufferSize.value)
-        rc = PxLApi._Api.PxLFormatImage(srcImage.ctypes.data_as(c_void_p), byref(srcFrameDesc), outputFormat, byref(ctbDstImage), byref(ctBufferSize))
+        return (rc, ctbDstImage)
+
+    ## The number of channels and the NumPy data type of the pixels of the RAW_* image formats
+    _rawImageFormats = {
+        ImageFormat.RAW_MONO8: (1, "uint8"),
+        ImageFormat.RAW_RGB24_DIB: (3, "uint8"),
+        ImageFormat.RAW_RGB24_NON_DIB: (3, "uint8"),
+        ImageFormat.RAW_BGR24_NON_DIB: (3, "uint8"),
+        ImageFormat.RAW_RGB48: (3, "uint16"),
+    }
+    def formatToArray(srcImage, srcFrameDesc, outputFormat, dstArray=None, reuseArray=False):
+        """
+        formatToArray converts an image, like formatNumPyImage, but into a NumPy array of the image,
+        shaped (height, width) for ImageFormat.RAW_MONO8 and (height, width, 3) for the other RAW_*
+        formats, the only image formats it supports. The image data buffer argument can be a contiguous
+        NumPy array or a mutable ctypes character buffer instance.
+        The size of the formatted image is taken from the output size cache. The image is formatted
+        straight into dstArray, a contiguous NumPy array of at least that size, if one is given.
+        Otherwise, a new array is created for the image or, with reuseArray, an array cached for the
+        calling thread is reused; that array is overwritten by the next formatToArray call that uses it.
+        Like all pixelinkWrapper functions, formatToArray returns a tuple of the return code and, on
+        success, the formatted image, which is dstArray (or a view of it).
+        There is no equivalent function in Pixelink 4.0 API.
+        """
+        import numpy
+        if outputFormat not in PxLApi._rawImageFormats:
+            return (PxLApi.ReturnCode.ApiInvalidParameterError,)
+        if isinstance(srcImage, numpy.ndarray):
+            if not srcImage.flags.c_contiguous:
+                return (PxLApi.ReturnCode.ApiInvalidParameterError,)
+            srcImage = srcImage.ctypes.data
+        else:
+            srcImage = byref(srcImage)
+
+        key = (PxLApi._frameDescGeometryKey(srcFrameDesc), outputFormat)
+        size = PxLApi._outputSizes.get(key)
+        if None == size:
+            ctBufferSize = c_uint(0)
+            rc = PxLApi._Api.PxLFormatImage(srcImage, byref(srcFrameDesc), outputFormat, None, byref(ctBufferSize))
+            if(not(PxLApi.apiSuccess(rc))):
+                return (rc,)
+            size = PxLApi._outputSizes[key] = ctBufferSize.value
+        channels, dtype = PxLApi._rawImageFormats[outputFormat]
+        height = int(srcFrameDesc.Roi.fHeight / srcFrameDesc.PixelAddressingValue.fVertical)
+        width = int(srcFrameDesc.Roi.fWidth / srcFrameDesc.PixelAddressingValue.fHorizontal)
+        # The rows may be padded (as DIB rows are, to a multiple of 4 bytes)
+        width = min(width, size // height // (channels * numpy.dtype(dtype).itemsize))
+        shape = (height, width) if 1 == channels else (height, width, channels)
+
+        if dstArray is None:
+            if reuseArray:
+                try:
+                    formatArrays = PxLApi._threadData.formatArrays
+                except AttributeError:
+                    formatArrays = PxLApi._threadData.formatArrays = {}
+                dstArray = formatArrays.get(key)
+                if dstArray is None:
+                    dstArray = formatArrays[key] = numpy.empty(size, numpy.uint8)
+            else:
+                dstArray = numpy.empty(size, numpy.uint8)
+        elif not dstArray.flags.c_contiguous:
+            return (PxLApi.ReturnCode.ApiInvalidParameterError,)
+        elif dstArray.nbytes < size:
+            return (PxLApi.ReturnCode.ApiBufferTooSmall,)
+
+        ctBufferSize = c_uint(size)
+        rc = PxLApi._Api.PxLFormatImage(srcImage, byref(srcFrameDesc), outputFormat, dstArray.ctypes.data, byref(ctBufferSize))
         if(not(PxLApi.apiSuccess(rc))):
+            if PxLApi.ReturnCode.ApiBufferTooSmall == rc:
+                PxLApi._outputSizes.pop(key, None)
             return (rc,)
-        return (rc, ctbDstImage)
+        if dstArray.shape == shape and dstArray.dtype == dtype and dstArray.nbytes == size:
+            return (rc, dstArray)
+        rows = dstArray.reshape(-1).view(numpy.uint8)[:size].reshape(shape[0], -1)
+        image = rows[:, :shape[1] * numpy.dtype(dtype).itemsize * (shape[2] if 3 == len(shape) else 1)]
+        return (rc, image.view(dtype).reshape(shape))
 
     def getActions(hCamera):
         ctScheduledTimestamps = c_double(0)
@@ -1237,12 +1574,19 @@ class PxLApi:
         return (rc, ctCameraInfo)
 
     def getCameraXml(hCamera):
-        ctBufferSize = c_uint(0)
-        rc = PxLApi._Api.PxLGetCameraXML(hCamera, None, byref(ctBufferSize))
-        if(not(PxLApi.apiSuccess(rc))):
-            return (rc,)
-        ctbXml = create_string_buffer(ctBufferSize.value)
-        rc = PxLApi._Api.PxLGetCameraXML(hCamera, byref(ctbXml), byref(ctBufferSize))
+        key = ("getCameraXml", hCamera)
+        for attempt in range(2):
+            ctBufferSize = c_uint(PxLApi._outputSizes.get(key, 0))
+            if 0 == ctBufferSize.value:
+                rc = PxLApi._Api.PxLGetCameraXML(hCamera, None, byref(ctBufferSize))
+                if(not(PxLApi.apiSuccess(rc))):
+                    return (rc,)
+                PxLApi._outputSizes[key] = ctBufferSize.value
+            ctbXml = create_string_buffer(ctBufferSize.value)
+            rc = PxLApi._Api.PxLGetCameraXML(hCamera, byref(ctbXml), byref(ctBufferSize))
+            # A cached size that is too small is dropped, and the size probed again (once)
+            if PxLApi.ReturnCode.ApiBufferTooSmall != rc or None == PxLApi._outputSizes.pop(key, None):
+                break
         if(not(PxLApi.apiSuccess(rc))):
             return (rc,)
         return (rc, ctbXml)
@@ -1250,10 +1594,7 @@ class PxLApi:
     def getClip(hCamera, numberOfFramesToCapture, fileName, terminationFunction):
         ctafileName = (c_char * len(fileName))()
         ctafileName.value = bytes(fileName, 'utf-8')
-        _ctPxLGetClip = PxLApi._Api.PxLGetClip
-        _ctPxLGetClip.argtypes = c_uint, c_uint, c_char_p, PxLApi._terminationFunction
-        _ctPxLGetClip.restype = c_int
-        rc = _ctPxLGetClip(hCamera, numberOfFramesToCapture, ctafileName.value, terminationFunction)
+        rc = PxLApi._Api.PxLGetClip(hCamera, numberOfFramesToCapture, ctafileName.value, terminationFunction)
         return (rc,)
     
     def getCurrentTimestamp(hCamera):
@@ -1266,10 +1607,7 @@ class PxLApi:
     def getEncodedClip(hCamera, numberOfFramesToCapture, fileName, clipInfo, terminationFunction):
         ctafileName = (c_char * len(fileName))()
         ctafileName.value = bytes(fileName, 'utf-8')
-        _ctPxLGetEncodedClip = PxLApi._Api.PxLGetEncodedClip
-        _ctPxLGetEncodedClip.argtypes = c_uint, c_uint, c_char_p, POINTER(PxLApi.ClipEncodingInfo), PxLApi._terminationFunction
-        _ctPxLGetEncodedClip.restype = c_int
-        rc = _ctPxLGetEncodedClip(hCamera, numberOfFramesToCapture, ctafileName.value, byref(clipInfo), terminationFunction)
+        rc = PxLApi._Api.PxLGetEncodedClip(hCamera, numberOfFramesToCapture, ctafileName.value, byref(clipInfo), terminationFunction)
         return (rc,)
 
     def getErrorReport(hCamera):
@@ -1305,7 +1643,7 @@ class PxLApi:
             params.append(ctaParams[i])
         return (rc, ctFlags.value, params)
 
-    def getNextCompressedFrame(hCamera, frame, compressionDesc):
+    def getNextCompressedFrame(hCamera, frame, compressionDesc, frameDesc=None):
         """
         getNextCompressedFrame expects a frame data buffer and a compression descriptor arguments being passed 
         as mutable ctypes character buffer instances. Such mutable ctypes character buffers can be created using 
@@ -1319,9 +1657,16 @@ class PxLApi:
             ret[2] - Number of bytes in a compression descriptor
 
         For example, see getCompressedImage.py sample that uses both functions.
+
+        Like with getNextFrame, a frame descriptor created with PxLApi.createFrameDesc() can be passed as 
+        the frameDesc argument to have it reused, rather than a new one returned with every frame.
         """
-        ctFrameDesc = PxLApi._FrameDesc()
-        ctFrameDesc.uSize = sizeof(ctFrameDesc) # The API needs to know the version of descriptor
+        if None == frameDesc:
+            ctFrameDesc = PxLApi.createFrameDesc()
+        else:
+            ctFrameDesc = frameDesc
+            if 0 == ctFrameDesc.uSize:
+                ctFrameDesc.uSize = sizeof(ctFrameDesc) # The API needs to know the version of descriptor
         ctCompressionDescSize = c_uint(0)
         if (None == frame or 0 == frame):
             # Special case where the user doesn't want a frame with this call -- rather just (sw) triggers a frame for a callback
@@ -1344,50 +1689,60 @@ class PxLApi:
                 return (rc,)
         return (rc, ctFrameDesc, ctCompressionDescSize.value)
 
-    def getNextFrame(hCamera, frame=None):
+    def getNextFrame(hCamera, frame=None, frameDesc=None, reuseFrameDesc=False):
         """
         getNextFrame expects a frame data buffer argument being passed as a mutable ctypes character buffer
         instance. Such mutable ctypes character buffer can be created using the ctypes.create_string_buffer() 
         function. When this function gets returned with the success code, this buffer holds frame data that 
         can be further passed to the formatImage function.
         For example, see getSnapshot.py sample that uses both functions.
+
+        By default, each call returns a new frame descriptor. Grab loops can avoid that allocation by either
+        passing a frame descriptor created with PxLApi.createFrameDesc() as frameDesc, or by setting 
+        reuseFrameDesc, in which case a frame descriptor cached for the calling thread is used. Either way, 
+        the frame descriptor returned is overwritten by the next call that uses it.
         """
-        ctFrameDesc = PxLApi._FrameDesc()
-        ctFrameDesc.uSize = sizeof(ctFrameDesc) # The API needs to know the version of descriptor
+        if None == frameDesc:
+            frameDesc = PxLApi._threadFrameDesc() if reuseFrameDesc else PxLApi.createFrameDesc()
+        elif 0 == frameDesc.uSize:
+            frameDesc.uSize = sizeof(frameDesc) # The API needs to know the version of descriptor
         if (None == frame or 0 == frame):
             # Special case where the user doesn't want a frame with this call -- rather just (sw) triggers a frame for a callback
             ctBufferSize = -1
-            rc = PxLApi._Api.PxLGetNextFrame(hCamera, ctBufferSize, 0, byref(ctFrameDesc))
+            rc = PxLApi._Api.PxLGetNextFrame(hCamera, ctBufferSize, 0, frameDesc)
             if(not(PxLApi.apiSuccess(rc))):
                 return (rc,)
         else:
             ctBufferSize = len(frame)
-            rc = PxLApi._Api.PxLGetNextFrame(hCamera, ctBufferSize, byref(frame), byref(ctFrameDesc))
+            rc = PxLApi._Api.PxLGetNextFrame(hCamera, ctBufferSize, frame, frameDesc)
             if(not(PxLApi.apiSuccess(rc))):
                 return (rc,)
-        return (rc, ctFrameDesc)
+        return (rc, frameDesc)
     
-    def getNextNumPyFrame(hCamera, frame=None):
+    def getNextNumPyFrame(hCamera, frame=None, frameDesc=None, reuseFrameDesc=False):
         """
         getNextNumPyFrame can be used to grab images from the camera, just like getNextFrame. However, 
         getNextNumPyFrame will fill a (supplied) NumPy 2D array (numpy.ndarray) with the image data.
+        The frameDesc and reuseFrameDesc parameters work just as they do with getNextFrame.
         
         For example, see getNumpySnapshot.py sample for an example on the use of this function.
         """
-        ctFrameDesc = PxLApi._FrameDesc()
-        ctFrameDesc.uSize = sizeof(ctFrameDesc) # The API needs to know the version of descriptor
+        if None == frameDesc:
+            frameDesc = PxLApi._threadFrameDesc() if reuseFrameDesc else PxLApi.createFrameDesc()
+        elif 0 == frameDesc.uSize:
+            frameDesc.uSize = sizeof(frameDesc) # The API needs to know the version of descriptor
         if (frame is None or (0 == frame.size)):
             # Special case where the user doesn't want a frame with this call -- rather just (sw) triggers a frame for a callback
             ctBufferSize = -1
-            rc = PxLApi._Api.PxLGetNextFrame(hCamera, ctBufferSize, 0, byref(ctFrameDesc))
+            rc = PxLApi._Api.PxLGetNextFrame(hCamera, ctBufferSize, 0, frameDesc)
             if(not(PxLApi.apiSuccess(rc))):
                 return (rc,)
         else:
-            ctBufferSize = frame.size
-            rc = PxLApi._Api.PxLGetNextFrame(hCamera, ctBufferSize, frame.ctypes.data_as(c_void_p), byref(ctFrameDesc))
+            ctBufferSize = frame.nbytes
+            rc = PxLApi._Api.PxLGetNextFrame(hCamera, ctBufferSize, frame.ctypes.data, frameDesc)
             if(not(PxLApi.apiSuccess(rc))):
                 return (rc,)
-        return (rc, ctFrameDesc)
+        return (rc, frameDesc)
     
     def getNumberCameras():
         """
@@ -1451,10 +1806,13 @@ class PxLApi:
         rc = PxLApi._Api.PxLInitializeEx(serialNumber, byref(cthCamera), flags)
         if(not(PxLApi.apiSuccess(rc))):
             return (rc,)
+        PxLApi._connectionChanged(cthCamera.value)
         return (rc, cthCamera.value)
 
     def loadSettings(hCamera, channel):
         rc = PxLApi._Api.PxLLoadSettings(hCamera, channel)
+        if PxLApi.apiSuccess(rc):
+            PxLApi._geometryChanged(hCamera)
         return (rc,)
 
     def privateCmd(hCamera, buffer):
@@ -1484,21 +1842,75 @@ class PxLApi:
         rc = PxLApi._Api.PxLSetActions(actionType, ctScheduledTimestamps)
         return (rc,)
     
-    def setCallback(hCamera, callbackType, context, dataProcessFunction):
+    """
+    setApiBackend replaces the library that all of the Pixelink API functions are called on. The backend 
+    must provide the PxLXxx functions of the Pixelink 4.0 API, with the same parameters. Calling it with 
+    None restores the Pixelink API library (which then gets loaded on the next function call).
+    There is no equivalent function in Pixelink 4.0 API.
+    For example, PxLApi.setApiBackend(SimulatedApi()) runs the wrapper on a simulated camera.
+    """
+    def setApiBackend(backend=None):
+        if None == backend:
+            PxLApi._Api = PxLApi._ApiLoader()
+        else:
+            PxLApi._Api = backend
+        return (PxLApi.ReturnCode.ApiSuccess,)
 
+    def setCallback(hCamera, callbackType, context, dataProcessFunction, stats=None):
+        """
+        With stats, a CallbackStats (see callbackStats.py), dataProcessFunction gets wrapped with instrumentation 
+        that records the rate, timing, latency and lost frames of its callbacks into stats, and the camera clock 
+        of hCamera gets calibrated for the latencies. The wrapped function is kept by stats, which must therefore 
+        stay referenced for as long as the callback is set.
+        """
         if callbackType == PxLApi.Callback.COMPRESSED_FRAME:
             context = pointer(context)
 
-        _ctPxLSetCallback = PxLApi._Api.PxLSetCallback
         if 0 == dataProcessFunction or None == dataProcessFunction:
-            _ctPxLSetCallback.argtypes = c_uint, c_uint, c_void_p, c_uint
-            _ctPxLSetCallback.restype = c_int
-            rc = _ctPxLSetCallback(hCamera, callbackType, context, 0)
-        else:
-            _ctPxLSetCallback.argtypes = c_uint, c_uint, c_void_p, PxLApi._dataProcessFunction
-            _ctPxLSetCallback.restype = c_int
-            rc = _ctPxLSetCallback(hCamera, callbackType, context, dataProcessFunction)
+            dataProcessFunction = None
+        elif None != stats:
+            if isinstance(dataProcessFunction, int):
+                dataProcessFunction = PxLApi._dataProcessFunction(dataProcessFunction) # A native function
+            dataProcessFunction = stats._dataProcessFunction = stats.wrap(dataProcessFunction)
+            stats.calibrate(hCamera)
+        rc = PxLApi._Api.PxLSetCallback(hCamera, callbackType, context, dataProcessFunction)
         return (rc,)
+
+    # A writable memoryview of a block of memory, used to wrap the frame data of frame callbacks
+    _memoryViewFromMemory = PYFUNCTYPE(py_object, c_void_p, c_ssize_t, c_int)(("PyMemoryView_FromMemory", pythonapi))
+    _PyBUF_WRITE = 0x200
+
+    def numPyFrameCallback(function):
+        """
+        numPyFrameCallback is a decorator that turns function into a callback function for setCallback, like
+        @PxLApi._dataProcessFunction does, but that gets the frame as a NumPy array rather than as a pointer
+        to the frame data, and the frame descriptor itself rather than a pointer to it:
+            @PxLApi.numPyFrameCallback
+            def frameCallback(hCamera, frame, dataFormat, frameDesc, userData):
+                ...
+                return PxLApi.ReturnCode.ApiSuccess
+        The frame is a writable view of the frame data of the API, shaped and typed as per its FrameGeometry
+        (see framePool.py) in the pixel format dataFormat of the callback, which isn't necessarily that of the
+        frame descriptor (PREVIEW callbacks may get RGB24 frames of a mono camera, for instance). Packed pixel
+        formats get their raw (height, row size) bytes. The shape and type are only worked out again when the
+        pixel format or geometry of the frames changes, not for every frame.
+        Neither the frame nor the frame descriptor are valid once function returns; copy them to keep them.
+        There is no equivalent function in Pixelink 4.0 API.
+        """
+        import numpy
+        from . framePool import getFrameDescGeometry
+        layout = [None, 0, None, None] # The geometry key, frame size, NumPy dtype and shape of the last frame
+        
+        def dataProcessFunction(hCamera, frameData, dataFormat, frameDesc, userData):
+            descriptor = frameDesc.contents
+            key = (PxLApi._frameDescGeometryKey(descriptor), dataFormat)
+            if key != layout[0]:
+                geometry = getFrameDescGeometry(descriptor)._replace(pixelFormat=dataFormat)
+                layout[:] = [key, geometry.frameSize(), numpy.dtype(geometry.numPyDtype()), geometry.numPyShape()]
+            frame = numpy.ndarray(layout[3], layout[2], PxLApi._memoryViewFromMemory(frameData, layout[1], PxLApi._PyBUF_WRITE))
+            return function(hCamera, frame, dataFormat, descriptor, userData)
+
+        return PxLApi._dataProcessFunction(dataProcessFunction)
     
     def setCameraIpAddress(cameraMac, cameraIp, cameraSubnetMask, cameraDefaultGateway, persistent):
         ctCameraMac = PxLApi._MacAddress()
@@ -1531,15 +1943,9 @@ class PxLApi:
         return (rc,)
 
     def setEventCallback(hCamera, eventId, context, eventProcessFunction):
-        _ctPxLSetEventCallback = PxLApi._Api.PxLSetEventCallback
         if 0 == eventProcessFunction or None == eventProcessFunction:
-            _ctPxLSetEventCallback.argtypes = c_uint, c_uint, c_void_p, c_uint
-            _ctPxLSetEventCallback.restype = c_int
-            rc = _ctPxLSetEventCallback(hCamera, eventId, context, 0)
-        else:
-            _ctPxLSetEventCallback.argtypes = c_uint, c_uint, c_void_p, PxLApi._eventProcessFunction
-            _ctPxLSetEventCallback.restype = c_int
-            rc = _ctPxLSetEventCallback(hCamera, eventId, context, eventProcessFunction)
+            eventProcessFunction = None
+        rc = PxLApi._Api.PxLSetEventCallback(hCamera, eventId, context, eventProcessFunction)
         return (rc,)
 
     def setFeature(hCamera, featureId, flags, params):
@@ -1550,6 +1956,8 @@ class PxLApi:
                 break
             ctaParams[i] = params[i]
         rc = PxLApi._Api.PxLSetFeature(hCamera, featureId, flags, ctNumParams, byref(ctaParams))
+        if PxLApi.apiSuccess(rc) and featureId in PxLApi._sizeFeatures:
+            PxLApi._geometryChanged(hCamera)
         return (rc,)
 
     def setFrameBufferPolicy(hCamera, nonTriggeredFrames, triggeredFrames, totalFrameBufferSizeInMs):
@@ -1578,10 +1986,7 @@ class PxLApi:
 
     def setPreviewStateEx(hCamera, previewState, context, changeFunction):
         cthWnd = c_void_p(None)
-        _ctPxLSetPreviewStateEx = PxLApi._Api.PxLSetPreviewStateEx
-        _ctPxLSetPreviewStateEx.argtypes = c_uint, c_uint, c_void_p, c_void_p, PxLApi._changeFunction
-        _ctPxLSetPreviewStateEx.restype = c_int
-        rc = _ctPxLSetPreviewStateEx(hCamera, previewState, byref(cthWnd), context, changeFunction)
+        rc = PxLApi._Api.PxLSetPreviewStateEx(hCamera, previewState, byref(cthWnd), context, changeFunction)
         if(not(PxLApi.apiSuccess(rc))):
             return (rc,)
         return (rc, cthWnd.value)
@@ -1590,12 +1995,60 @@ class PxLApi:
         rc = PxLApi._Api.PxLSetStreamState(hCamera, streamState)
         return (rc,)
 
+    def stream(hCamera, count=None, timeout=None, maxTries=4, bufferCount=2):
+        """
+        stream is a generator that starts the stream of the camera, yields a (frame, frameDesc) tuple for
+        each of count frames (or forever, if count is None), and stops the stream again once the loop over
+        it ends. For example:
+            for frame, frameDesc in PxLApi.stream(hCamera, count=100):
+                ...
+        The frames are NumPy arrays from a FramePool of bufferCount buffers, and the frame descriptors
+        are reused too, so nothing is allocated per frame. A frame (and its frame descriptor) remains
+        valid for bufferCount - 1 iterations; copy it to keep it any longer.
+        ApiCameraTimeoutError is retried up to maxTries times in a row or, if timeout is given, for up to
+        timeout seconds. That, or any other error, raises a PxLApi.ApiError.
+        There is no equivalent function in Pixelink 4.0 API.
+        """
+        from . framePool import FramePool
+        import time
+        framePool = FramePool(hCamera, count=bufferCount, useNumPy=True)
+        inUse = []
+        rc = PxLApi.setStreamState(hCamera, PxLApi.StreamState.START)[0]
+        if not PxLApi.apiSuccess(rc):
+            raise PxLApi.ApiError(rc, "setStreamState")
+        try:
+            frameCount = 0
+            while None == count or frameCount < count:
+                if len(inUse) == bufferCount:
+                    framePool.release(inUse.pop(0))
+                frame = framePool.acquire()
+                inUse.append(frame)
+                frameDesc = framePool.frameDesc(frame)
+                tries = 0
+                deadline = None if None == timeout else time.monotonic() + timeout
+                while True:
+                    rc = PxLApi.getNextNumPyFrame(hCamera, frame, frameDesc)[0]
+                    if PxLApi.apiSuccess(rc):
+                        break
+                    tries += 1
+                    if PxLApi.ReturnCode.ApiCameraTimeoutError != rc or \
+                        (None == deadline and tries >= maxTries) or \
+                        (None != deadline and time.monotonic() >= deadline):
+                        raise PxLApi.ApiError(rc, "getNextNumPyFrame")
+                frameCount += 1
+                yield (frame, frameDesc)
+        finally:
+            PxLApi.setStreamState(hCamera, PxLApi.StreamState.STOP)
+
     def unassignController(hCamera, controllerSerialNumber):
         rc = PxLApi._Api.PxLUnassignController(hCamera, controllerSerialNumber)
         return (rc,)
 
     def uninitialize(hCamera):
         rc = PxLApi._Api.PxLUninitialize(hCamera)
+        # The handle may get reused for another camera
+        PxLApi._geometryChanged(hCamera)
+        PxLApi._connectionChanged(hCamera)
         return (rc,)
 
     def updateDescriptor(hCamera, hDescriptor, updateMode):
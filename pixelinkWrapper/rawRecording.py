@@ -0,0 +1,234 @@
+"""
+Lossless recording of raw frames into a memory-mapped file.
+
+getClip and getEncodedClip record PDS or H.264 files through the Pixelink API, and PDS files have
+to be converted with formatClip before their frames can be looked at. A RawRecordingWriter records
+the raw frames themselves instead, into a file of fixed-size frame slots that is allocated up front
+and memory-mapped, so that getNextNumPyFrame reads each frame straight into its slot. Alongside the
+frames, a sidecar index (a NumPy .npy file) holds the frame number, frame time and a few feature
+values of each frame, as reported in its frame descriptor.
+
+A RawRecordingReader maps a recording back, and returns any of its frames as a NumPy array viewing
+the mapping; seeking to a frame costs nothing, and no frame is copied.
+
+A recording is a 4096 byte header, followed by the frame slots:
+    header: b"PXLR", the recording version, the frame width, height, pixel format and HDR
+            interleaving (uint32 each), and the frame size, slot size and number of frames (uint64 each)
+The slots are a multiple of 64 bytes long, so every frame is aligned on a 64 byte boundary.
+
+NumPy is required for this module.
+"""
+
+from . pixelink import PxLApi
+from . framePool import FrameGeometry
+import mmap
+import numpy
+import os
+import struct
+
+
+_RECORDING_MAGIC = b"PXLR"
+_RECORDING_VERSION = 1
+_header = struct.Struct("<4sIIIIIQQQ")
+_headerSize = 4096
+_frameCountOffset = _header.size - 8
+_slotAlignment = 64
+
+"""
+The fields of the sidecar index, and the frame descriptor field each of them is taken from.
+"""
+_indexFields = (
+    ("frameNumber", numpy.uint32, lambda frameDesc: frameDesc.uFrameNumber),
+    ("frameTime", numpy.float64, lambda frameDesc: frameDesc.dFrameTime),
+    ("u64FrameNumber", numpy.uint64, lambda frameDesc: frameDesc.u64FrameNumber),
+    ("shutter", numpy.float32, lambda frameDesc: frameDesc.Shutter.fValue),
+    ("gain", numpy.float32, lambda frameDesc: frameDesc.Gain.fValue),
+    ("frameRate", numpy.float32, lambda frameDesc: frameDesc.FrameRate.fValue),
+    ("actualFrameRate", numpy.float32, lambda frameDesc: frameDesc.ActualFrameRate.fValue),
+    ("temperature", numpy.float32, lambda frameDesc: frameDesc.Temperature.fValue),
+)
+indexDtype = numpy.dtype([(name, dtype) for name, dtype, field in _indexFields])
+
+
+def _indexFileName(fileName):
+    return fileName + ".index.npy"
+
+
+class RawRecordingWriter:
+    """
+    Records up to capacity frames of the FrameGeometry geometry (as returned by getFrameGeometry) into
+    the file fileName, and its index into fileName + ".index.npy". The space for all of the frames is
+    allocated when the writer is created; closing the writer gives back the space of the slots that
+    were not used. A RawRecordingWriter can be used as a context manager, which closes it.
+
+    Raises ValueError if the frame size of the pixel format of geometry is not known.
+    """
+    def __init__(self, fileName, geometry, capacity):
+        assert 1 <= capacity
+        if 0 == geometry.frameSize():
+            raise ValueError("frames of pixel format {0} can't be recorded".format(geometry.pixelFormat))
+        self.fileName = fileName
+        self.geometry = geometry
+        self.capacity = capacity
+        self.frameCount = 0
+        self.errorCount = 0
+        self.frameSize = geometry.frameSize()
+        self.slotSize = -(-self.frameSize // _slotAlignment) * _slotAlignment
+        fileSize = _headerSize + capacity * self.slotSize
+        with open(fileName, "wb") as file:
+            if hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(file.fileno(), 0, fileSize)
+            else:
+                file.truncate(fileSize)
+        self._file = open(fileName, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), fileSize)
+        self._map[:_header.size] = _header.pack(_RECORDING_MAGIC, _RECORDING_VERSION, geometry.width, geometry.height,
+                                                geometry.pixelFormat, int(geometry.hdrInterleaved),
+                                                self.frameSize, self.slotSize, 0)
+        self._index = numpy.lib.format.open_memmap(_indexFileName(fileName), "w+", indexDtype, (capacity,))
+        self._frameDesc = PxLApi.createFrameDesc()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    def _slot(self, index):
+        frame = numpy.frombuffer(self._map, numpy.uint8, self.frameSize, _headerSize + index * self.slotSize)
+        return frame.view(self.geometry.numPyDtype()).reshape(self.geometry.numPyShape())
+
+    def _commit(self, frameDesc):
+        entry = self._index[self.frameCount]
+        for name, dtype, field in _indexFields:
+            entry[name] = field(frameDesc)
+        self.frameCount += 1
+        struct.pack_into("<Q", self._map, _frameCountOffset, self.frameCount)
+
+    def isFull(self):
+        return self.frameCount >= self.capacity
+
+    def append(self, frame, frameDesc):
+        """
+        Copies frame, a NumPy array of the frame size of the recording, into the next slot, and records
+        its frame descriptor in the index. Returns the index of the frame. Raises ValueError if the
+        recording is full, or if frame isn't of the frame size of the recording.
+        """
+        if self.isFull():
+            raise ValueError("the recording is full")
+        if frame.nbytes != self.frameSize:
+            raise ValueError("frame must be {0} bytes long".format(self.frameSize))
+        slot = self._slot(self.frameCount)
+        slot[...] = frame.reshape(slot.shape).view(slot.dtype)
+        del slot
+        self._commit(frameDesc)
+        return self.frameCount - 1
+
+    def record(self, hCamera, count=None):
+        """
+        Reads count frames (by default, as many as the recording has room for) from the camera hCamera
+        straight into the slots of the recording, with getNextNumPyFrame. The stream of the camera must
+        be started. Frames that fail to be read are skipped (and counted in errorCount). Returns the
+        number of frames recorded; raises PxLApi.ApiError if the stream stops or the camera is lost.
+        """
+        remaining = self.capacity - self.frameCount if None == count else min(count, self.capacity - self.frameCount)
+        recorded = 0
+        while recorded < remaining:
+            slot = self._slot(self.frameCount)
+            ret = PxLApi.getNextNumPyFrame(hCamera, slot, self._frameDesc)
+            del slot
+            if not PxLApi.apiSuccess(ret[0]):
+                self.errorCount += 1
+                if ret[0] in PxLApi._fatalStreamReturnCodes:
+                    raise PxLApi.ApiError(ret[0], "getNextNumPyFrame")
+                continue
+            self._commit(self._frameDesc)
+            recorded += 1
+        return recorded
+
+    def close(self):
+        """
+        Writes the recording out, trims the unused slots off the file and the index, and closes both.
+        """
+        if None == self._map:
+            return
+        self._map.flush()
+        self._map.close()
+        self._map = None
+        self._file.truncate(_headerSize + self.frameCount * self.slotSize)
+        self._file.close()
+        index = numpy.array(self._index[:self.frameCount])
+        self._index.flush()
+        self._index = None
+        if self.frameCount < self.capacity:
+            numpy.save(_indexFileName(self.fileName), index)
+
+
+class RawRecordingReader:
+    """
+    Maps the recording fileName, and its index, for reading. The frames are NumPy arrays, shaped and
+    typed as per the FrameGeometry of the recording, viewing the mapped file; they are read-only, and
+    remain valid even after the reader is closed. The index is a NumPy structured array of indexDtype,
+    with an entry for each frame. A recording that is still being written, or whose writer was never
+    closed, can be read up to the last frame that was completely written. A RawRecordingReader can be
+    used as a context manager, which closes it.
+
+    Raises ValueError if fileName is not a recording.
+    """
+    def __init__(self, fileName):
+        self.fileName = fileName
+        with open(fileName, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            (magic, version, width, height, pixelFormat, hdrInterleaved,
+             self.frameSize, self.slotSize, frameCount) = _header.unpack_from(self._map)
+        except struct.error:
+            magic = None
+        if _RECORDING_MAGIC != magic or version > _RECORDING_VERSION:
+            self._map.close()
+            raise ValueError("{0} is not a raw recording".format(fileName))
+        self.geometry = FrameGeometry(width, height, pixelFormat, bool(hdrInterleaved))
+        index = numpy.load(_indexFileName(fileName), mmap_mode="r")
+        self.frameCount = min(frameCount, len(index), (len(self._map) - _headerSize) // self.slotSize)
+        self.index = index[:self.frameCount]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    def close(self):
+        try:
+            self._map.close()
+        except BufferError:
+            pass # Frames handed out still view the mapping, which is then unmapped along with the last of them
+
+    def __len__(self):
+        return self.frameCount
+
+    def frame(self, index):
+        """
+        Returns the frame index as a NumPy array viewing the mapped file.
+        """
+        if index < 0:
+            index += self.frameCount
+        if not 0 <= index < self.frameCount:
+            raise IndexError("frame index out of range")
+        frame = numpy.frombuffer(self._map, numpy.uint8, self.frameSize, _headerSize + index * self.slotSize)
+        return frame.view(self.geometry.numPyDtype()).reshape(self.geometry.numPyShape())
+
+    def __getitem__(self, index):
+        return self.frame(index)
+
+    def __iter__(self):
+        for index in range(self.frameCount):
+            yield self.frame(index)
+
+    def findFrameNumber(self, frameNumber):
+        """
+        Returns the index of the frame with the (u64FrameNumber) frame number frameNumber, or None if
+        there is no such frame in the recording.
+        """
+        matches = numpy.flatnonzero(self.index["u64FrameNumber"] == frameNumber)
+        return int(matches[0]) if len(matches) else None
@@ -0,0 +1,844 @@
+"""
+An in-process, pure Python stand-in for the Pixelink 4.0 API library.
+
+SimulatedApi exposes the same PxLXxx functions that PxLApi calls on the native library, and
+it follows the same calling conventions (handles, buffer sizes, and out-parameters passed by
+reference), so the whole wrapper can run without a camera attached. It is intended for tests
+and for reproducible throughput baselines on machines that have no cameras.
+
+Select it with
+    PxLApi.setApiBackend(SimulatedApi())
+or by setting the PIXELINK_API_BACKEND environment variable to 'simulator' before the first
+Pixelink API function call.
+
+Each SimulatedCamera has a configurable sensor size, ROI, pixel format and frame rate. Frames
+are produced on a virtual clock at the current frame rate into a small frame buffer, so a
+consumer that falls behind sees ApiSuccessWithFrameLoss, gaps in u64FrameNumber and FRAMES_SKIPPED
+events, just like with a real camera. A frame rate of 0 produces frames as fast as they are
+requested. Errors can be injected for any API function, either for the next N calls or at random
+with a fixed seed, events can be raised at will, and the data of any frame can be had from
+frameData to check frames against.
+
+Pixelink10 compression is emulated with zlib; the simulated compressed frames can only be
+decompressed by the simulator.
+"""
+
+from ctypes import*
+from . pixelink import PxLApi
+import collections
+import random
+import struct
+import threading
+import time
+import zlib
+
+_CArgObject = type(byref(c_int()))
+# The base class of all pointer types (ctypes._Pointer)
+_PointerType = type(pointer(c_int())).__base__
+# Identifies compression descriptors created by the simulator
+_SIMULATED_COMPRESSION_MAGIC = 0x53584C50
+
+def _address(arg):
+    """
+    Returns the address that the native library would have received for a pointer argument.
+    """
+    if None == arg:
+        return 0
+    if isinstance(arg, int):
+        return arg
+    if isinstance(arg, _CArgObject):
+        return addressof(arg._obj)
+    if isinstance(arg, c_void_p):
+        return arg.value or 0
+    if isinstance(arg, _PointerType):
+        return cast(arg, c_void_p).value or 0
+    return addressof(arg)
+
+def _writeUint(arg, value):
+    if 0 != _address(arg):
+        c_uint.from_address(_address(arg)).value = value
+
+def _readUint(arg):
+    if 0 == _address(arg):
+        return 0
+    return c_uint.from_address(_address(arg)).value
+
+
+class _Feature:
+    """
+    State and limits of a single simulated camera feature.
+    """
+    def __init__(self, params, limits, flags=PxLApi.FeatureFlags.MANUAL, settableWhileStreaming=True, readOnly=False):
+        self.params = [float(param) for param in params]
+        self.limits = limits
+        self.flags = PxLApi.FeatureFlags.PRESENCE | flags
+        self.supportedFlags = PxLApi.FeatureFlags.PRESENCE | PxLApi.FeatureFlags.MANUAL | PxLApi.FeatureFlags.OFF
+        if settableWhileStreaming:
+            self.supportedFlags |= PxLApi.FeatureFlags.SETTABLE_WHILE_STREAMING
+        if readOnly:
+            self.supportedFlags |= PxLApi.FeatureFlags.READ_ONLY
+
+
+class SimulatedCamera:
+    """
+    A single simulated camera. The constructor arguments set its initial state; everything
+    else is changed through PxLApi.setFeature, exactly as with a real camera.
+
+    PREVIEW callbacks get their frames in the pixel format previewFormat (by default, that of the
+    camera), as the preview of a real camera formats its frames for display (typically as RGB24).
+    """
+    def __init__(self, serialNumber=1000, sensorWidth=1280, sensorHeight=1024,
+                 pixelFormat=PxLApi.PixelFormat.MONO8, frameRate=30.0, roi=None,
+                 supportedPixelFormats=None, frameBuffers=4, seed=0, modelName="PL-SIM",
+                 previewFormat=None):
+        self.serialNumber = serialNumber
+        self.sensorWidth = sensorWidth
+        self.sensorHeight = sensorHeight
+        self.modelName = modelName
+        self.frameBuffers = frameBuffers
+        self.previewFormat = previewFormat
+        if None == supportedPixelFormats:
+            supportedPixelFormats = (PxLApi.PixelFormat.MONO8, PxLApi.PixelFormat.MONO16,
+                                     PxLApi.PixelFormat.MONO12_PACKED, PxLApi.PixelFormat.MONO12_PACKED_MSFIRST,
+                                     PxLApi.PixelFormat.MONO10_PACKED_MSFIRST, PxLApi.PixelFormat.BAYER8_GRBG,
+                                     PxLApi.PixelFormat.BAYER8_RGGB, PxLApi.PixelFormat.BAYER8_GBRG,
+                                     PxLApi.PixelFormat.BAYER8_BGGR, PxLApi.PixelFormat.BAYER16_GRBG,
+                                     PxLApi.PixelFormat.BAYER16_RGGB, PxLApi.PixelFormat.BAYER16_GBRG,
+                                     PxLApi.PixelFormat.BAYER16_BGGR, PxLApi.PixelFormat.RGB24)
+        self.supportedPixelFormats = tuple(supportedPixelFormats)
+        if None == roi:
+            roi = (0, 0, sensorWidth, sensorHeight)
+
+        self._lock = threading.RLock()
+        self._random = random.Random(seed)
+        self._injectedErrors = collections.defaultdict(collections.deque)
+        self._errorRates = {}
+        self._patterns = {}
+        self.hCamera = None
+        self.connected = True
+        self.streamState = PxLApi.StreamState.STOP
+        self.previewState = PxLApi.PreviewState.STOP
+        self.callbacks = {}
+        self.eventCallbacks = {}
+        self._clockStart = time.perf_counter() # The camera clock, which the frame times are taken from
+        self._streamStart = self._clockStart
+        self._cursors = {}
+        self._callbackThread = None
+
+        Id = PxLApi.FeatureId
+        self.features = {
+            Id.SHUTTER: _Feature([0.01], [(0.00001, 10.0)]),
+            Id.GAIN: _Feature([0.0], [(0.0, 24.0)]),
+            Id.FRAME_RATE: _Feature([frameRate], [(0.0, 10000.0)]),
+            Id.ACTUAL_FRAME_RATE: _Feature([frameRate], [(0.0, 10000.0)], readOnly=True),
+            Id.ROI: _Feature(roi, [(0, sensorWidth), (0, sensorHeight), (8, sensorWidth), (8, sensorHeight)],
+                             settableWhileStreaming=False),
+            Id.PIXEL_ADDRESSING: _Feature([1, PxLApi.PixelAddressingModes.DECIMATE, 1, 1],
+                                          [(1, 4), (0, 3), (1, 4), (1, 4)], settableWhileStreaming=False),
+            Id.PIXEL_FORMAT: _Feature([pixelFormat], [(0, PxLApi.PixelFormat.ABGR)], settableWhileStreaming=False),
+            Id.GAIN_HDR: _Feature([PxLApi.GainHdr.NONE], [(0, PxLApi.GainHdr.INTERLEAVED)],
+                                  flags=PxLApi.FeatureFlags.OFF, settableWhileStreaming=False),
+            Id.COMPRESSION: _Feature([pixelFormat, PxLApi.CompressionStrategy.NONE],
+                                     [(0, PxLApi.PixelFormat.ABGR), (0, PxLApi.CompressionStrategy.PIXELINK10)],
+                                     flags=PxLApi.FeatureFlags.OFF, settableWhileStreaming=False),
+            Id.TRIGGER: _Feature([0, PxLApi.TriggerTypes.FREE_RUNNING, 0, 0, 0],
+                                 [(0, 14), (0, 6), (0, 1), (0, 10), (0, 10000)],
+                                 flags=PxLApi.FeatureFlags.OFF, settableWhileStreaming=False),
+            Id.FLIP: _Feature([0, 0], [(0, 1), (0, 1)], settableWhileStreaming=False),
+            Id.SENSOR_TEMPERATURE: _Feature([42.0], [(-40.0, 120.0)], readOnly=True),
+        }
+
+    """
+    Error injection
+    """
+    def injectError(self, functionName, returnCode, count=1):
+        """
+        Makes the next count calls of the API function (e.g. 'PxLGetNextFrame') fail with returnCode.
+        """
+        with self._lock:
+            self._injectedErrors[functionName].extend([returnCode] * count)
+
+    def setErrorRate(self, functionName, returnCode, probability):
+        """
+        Makes calls of the API function fail with returnCode with the given probability. The
+        camera's seed makes the sequence of failures reproducible. A probability of 0 disables it.
+        """
+        with self._lock:
+            if 0 >= probability:
+                self._errorRates.pop(functionName, None)
+            else:
+                self._errorRates[functionName] = (returnCode, probability)
+
+    def disconnect(self):
+        """
+        Simulates unplugging the camera; a CAMERA_DISCONNECTED event is raised if requested.
+        """
+        with self._lock:
+            self.connected = False
+        self._stopStream(PxLApi.StreamState.STOP)
+        self.raiseEvent(PxLApi.EventId.CAMERA_DISCONNECTED)
+
+    def _injectedError(self, functionName):
+        with self._lock:
+            injected = self._injectedErrors.get(functionName)
+            if injected:
+                return injected.popleft()
+            if functionName in self._errorRates:
+                returnCode, probability = self._errorRates[functionName]
+                if self._random.random() < probability:
+                    return returnCode
+        if not self.connected:
+            return PxLApi.ReturnCode.ApiNoCameraError
+        return None
+
+    """
+    Camera state
+    """
+    def param(self, featureId, index=0):
+        return self.features[featureId].params[index]
+
+    def frameGeometry(self):
+        """
+        Returns (width, height, pixelFormat, frameSize) of a frame with the current settings.
+        """
+        with self._lock:
+            roi = self.features[PxLApi.FeatureId.ROI].params
+            addressing = self.features[PxLApi.FeatureId.PIXEL_ADDRESSING].params
+            pixelFormat = int(self.param(PxLApi.FeatureId.PIXEL_FORMAT))
+            width = int(roi[PxLApi.RoiParams.WIDTH] / addressing[PxLApi.PixelAddressingParams.X_VALUE])
+            height = int(roi[PxLApi.RoiParams.HEIGHT] / addressing[PxLApi.PixelAddressingParams.Y_VALUE])
+            frameSize = int(width * height * PxLApi.getBytesPerPixel(pixelFormat))
+            if PxLApi.GainHdr.INTERLEAVED == int(self.param(PxLApi.FeatureId.GAIN_HDR)):
+                frameSize *= 2
+            return (width, height, pixelFormat, frameSize)
+
+    def compressionEnabled(self):
+        return (PxLApi.CompressionStrategy.PIXELINK10 == int(self.param(PxLApi.FeatureId.COMPRESSION, 1)) and
+                0 == (self.features[PxLApi.FeatureId.COMPRESSION].flags & PxLApi.FeatureFlags.OFF))
+
+    def _pattern(self, frameSize):
+        # A diagonal gradient; each frame starts at a different offset into it, so consecutive frames differ
+        pattern = self._patterns.get(frameSize)
+        if None == pattern:
+            rowLength = max(1, self.frameGeometry()[0])
+            ramp = bytes(range(256)) * (rowLength // 256 + 2)
+            rows = []
+            length = 0
+            y = 0
+            while length < frameSize + 256:
+                rows.append(ramp[y % 256:y % 256 + rowLength])
+                length += rowLength
+                y += 1
+            pattern = create_string_buffer(b"".join(rows)[:frameSize + 256], frameSize + 256)
+            self._patterns = {frameSize: pattern}
+        return pattern
+
+    def _fillFrame(self, address, frameSize, frameNumber):
+        pattern = self._pattern(frameSize)
+        memmove(address, addressof(pattern) + frameNumber % 256, frameSize)
+
+    def frameData(self, frameNumber, frameSize=None):
+        """
+        Returns the bytes of the frame frameNumber, as the camera delivers it with the current settings.
+        frameSize is that of the frame by default, and can be that of the frames of another data format.
+        """
+        if None == frameSize:
+            frameSize = self.frameGeometry()[3]
+        buffer = create_string_buffer(frameSize)
+        self._fillFrame(addressof(buffer), frameSize, frameNumber)
+        return buffer.raw
+
+    def _fillFrameDesc(self, address, frameNumber, frameTime, compressedSize=0):
+        desc = PxLApi._FrameDesc.from_address(address)
+        width, height, pixelFormat, frameSize = self.frameGeometry()
+        roi = self.features[PxLApi.FeatureId.ROI].params
+        addressing = self.features[PxLApi.FeatureId.PIXEL_ADDRESSING].params
+        desc.fFrameTime = frameTime
+        desc.uFrameNumber = frameNumber & 0xFFFFFFFF
+        desc.dFrameTime = frameTime
+        desc.u64FrameNumber = frameNumber
+        desc.Shutter.fValue = self.param(PxLApi.FeatureId.SHUTTER)
+        desc.Gain.fValue = self.param(PxLApi.FeatureId.GAIN)
+        desc.FrameRate.fValue = self.param(PxLApi.FeatureId.FRAME_RATE)
+        desc.ActualFrameRate.fValue = self.param(PxLApi.FeatureId.ACTUAL_FRAME_RATE)
+        desc.Temperature.fValue = self.param(PxLApi.FeatureId.SENSOR_TEMPERATURE)
+        desc.Roi.fLeft = roi[PxLApi.RoiParams.LEFT]
+        desc.Roi.fTop = roi[PxLApi.RoiParams.TOP]
+        desc.Roi.fWidth = roi[PxLApi.RoiParams.WIDTH]
+        desc.Roi.fHeight = roi[PxLApi.RoiParams.HEIGHT]
+        desc.Flip.fHorizontal = self.param(PxLApi.FeatureId.FLIP, PxLApi.FlipParams.HORIZONTAL)
+        desc.Flip.fVertical = self.param(PxLApi.FeatureId.FLIP, PxLApi.FlipParams.VERTICAL)
+        desc.Decimation.fValue = addressing[PxLApi.PixelAddressingParams.VALUE]
+        desc.DecimationMode.fValue = addressing[PxLApi.PixelAddressingParams.MODE]
+        desc.PixelAddressingValue.fHorizontal = addressing[PxLApi.PixelAddressingParams.X_VALUE]
+        desc.PixelAddressingValue.fVertical = addressing[PxLApi.PixelAddressingParams.Y_VALUE]
+        desc.PixelFormat.fValue = pixelFormat
+        desc.Trigger.fMode = self.param(PxLApi.FeatureId.TRIGGER, PxLApi.TriggerParams.MODE)
+        desc.Trigger.fType = self.param(PxLApi.FeatureId.TRIGGER, PxLApi.TriggerParams.TYPE)
+        desc.HDRInfo.uMode = int(self.param(PxLApi.FeatureId.GAIN_HDR))
+        if compressedSize:
+            desc.CompressionInfo.fCompressionStrategy = PxLApi.CompressionStrategy.PIXELINK10
+            desc.CompressionInfo.fCompressedSize = compressedSize
+        else:
+            desc.CompressionInfo.fCompressionStrategy = PxLApi.CompressionStrategy.NONE
+            desc.CompressionInfo.fCompressedSize = frameSize
+
+    """
+    Virtual frame clock
+    Frame n is exposed at streamStart + n/frameRate and sits in one of frameBuffers buffers until
+    it gets read or overwritten. Each reader (getNextFrame and the callback thread) has its own
+    position in that sequence. Frame times, like getCurrentTimestamp, are read off a camera clock
+    that starts when the camera is created.
+    """
+    def _startStream(self):
+        self.streamState = PxLApi.StreamState.START
+        self._streamStart = time.perf_counter()
+        self._cursors = {}
+        if self.callbacks and None == self._callbackThread:
+            self._startCallbackThread()
+
+    def _stopStream(self, streamState):
+        self.streamState = streamState
+        callbackThread = self._callbackThread
+        if None != callbackThread and threading.current_thread() != callbackThread:
+            callbackThread.join()
+
+    def _nextFrame(self, reader):
+        """
+        Waits for the next frame of this reader. Returns (frameNumber, frameTime, framesLost),
+        or None if the stream stopped in the meantime.
+        """
+        frameRate = self.param(PxLApi.FeatureId.FRAME_RATE)
+        cursor = self._cursors.get(reader, 0)
+        if 0 >= frameRate:
+            # Unthrottled; frames are exposed on demand
+            self._cursors[reader] = cursor + 1
+            return (cursor, time.perf_counter() - self._clockStart, 0)
+        period = 1.0 / frameRate
+        while True:
+            if PxLApi.StreamState.START != self.streamState:
+                return None
+            elapsed = time.perf_counter() - self._streamStart
+            newest = int(elapsed / period)
+            if newest >= cursor:
+                break
+            time.sleep(min(cursor * period - elapsed, 0.05))
+        framesLost = 0
+        if newest - cursor >= self.frameBuffers:
+            framesLost = newest - self.frameBuffers + 1 - cursor
+            cursor += framesLost
+        self._cursors[reader] = cursor + 1
+        return (cursor, self._streamStart - self._clockStart + cursor * period, framesLost)
+
+    """
+    Callbacks and events
+    """
+    def _startCallbackThread(self):
+        self._callbackThread = threading.Thread(target=self._deliverCallbacks, name="SimulatedCameraCallbacks", daemon=True)
+        self._callbackThread.start()
+
+    def _deliverCallbacks(self):
+        buffer = None
+        previewBuffer = None
+        while PxLApi.StreamState.START == self.streamState and self.callbacks:
+            nextFrame = self._nextFrame("callback")
+            if None == nextFrame:
+                break
+            frameNumber, frameTime, framesLost = nextFrame
+            if framesLost:
+                self.raiseEvent(PxLApi.EventId.FRAMES_SKIPPED)
+            width, height, pixelFormat, frameSize = self.frameGeometry()
+            if None == buffer or len(buffer) < frameSize:
+                buffer = create_string_buffer(frameSize)
+            desc = PxLApi._FrameDesc()
+            desc.uSize = sizeof(desc)
+            self._fillFrame(addressof(buffer), frameSize, frameNumber)
+            types = [PxLApi.Callback.FRAME]
+            if PxLApi.PreviewState.START == self.previewState:
+                types += [PxLApi.Callback.PREVIEW, PxLApi.Callback.PREVIEW_RAW]
+            for callbackType in types:
+                registered = self.callbacks.get(callbackType)
+                if PxLApi.Callback.FRAME == callbackType and self.compressionEnabled() and \
+                   PxLApi.Callback.COMPRESSED_FRAME in self.callbacks:
+                    self._deliverCompressed(buffer, frameSize, frameNumber, frameTime)
+                    continue
+                if None == registered:
+                    continue
+                context, function = registered
+                self._fillFrameDesc(addressof(desc), frameNumber, frameTime)
+                dataFormat, data = pixelFormat, buffer
+                if PxLApi.Callback.PREVIEW == callbackType and None != self.previewFormat:
+                    dataFormat = self.previewFormat
+                    previewSize = int(width * height * PxLApi.getBytesPerPixel(dataFormat))
+                    if None == previewBuffer or len(previewBuffer) < previewSize:
+                        previewBuffer = create_string_buffer(previewSize)
+                    self._fillFrame(addressof(previewBuffer), previewSize, frameNumber)
+                    data = previewBuffer
+                function(self.hCamera, cast(data, POINTER(c_ubyte)), dataFormat, pointer(desc), context)
+        self._callbackThread = None
+
+    def _deliverCompressed(self, buffer, frameSize, frameNumber, frameTime):
+        contextAddress, function = self.callbacks[PxLApi.Callback.COMPRESSED_FRAME]
+        compressed = zlib.compress(string_at(buffer, frameSize), 1)
+        compressedBuffer = create_string_buffer(compressed, len(compressed))
+        if contextAddress:
+            compressionInfo = PxLApi.CompressionInfoPixelink10.from_address(contextAddress)
+            memmove(compressionInfo.CompressionDesc, self._compressionDesc(frameSize), PxLApi.CompressionDescSize.PIXELINK10)
+        desc = PxLApi._FrameDesc()
+        desc.uSize = sizeof(desc)
+        self._fillFrameDesc(addressof(desc), frameNumber, frameTime, len(compressed))
+        function(self.hCamera, cast(compressedBuffer, POINTER(c_ubyte)), self.frameGeometry()[2], pointer(desc), contextAddress)
+
+    def _compressionDesc(self, frameSize):
+        return struct.pack("<II", _SIMULATED_COMPRESSION_MAGIC, frameSize).ljust(PxLApi.CompressionDescSize.PIXELINK10, b"\0")
+
+    def raiseEvent(self, eventId):
+        """
+        Raises the event eventId, calling the event callbacks registered for it, or for any event.
+        """
+        for registeredId in (eventId, PxLApi.EventId.ANY):
+            registered = self.eventCallbacks.get(registeredId)
+            if None != registered:
+                context, function = registered
+                function(self.hCamera or 0, eventId, time.perf_counter(), 0, None, context)
+
+
+class SimulatedApi:
+    """
+    The simulated Pixelink API library. Pass it to PxLApi.setApiBackend.
+    API functions that are not simulated return ApiNotSupportedError.
+    """
+    _firstHandle = 0x5000
+
+    def __init__(self, cameras=None):
+        if None == cameras:
+            cameras = [SimulatedCamera()]
+        elif isinstance(cameras, SimulatedCamera):
+            cameras = [cameras]
+        self.cameras = list(cameras)
+        self._handles = {}
+
+    def __getattr__(self, name):
+        if not name.startswith("PxL"):
+            raise AttributeError(name)
+        def notSupported(*args):
+            return PxLApi.ReturnCode.ApiNotSupportedError
+        return notSupported
+
+    def _camera(self, hCamera, functionName):
+        """
+        Returns (camera, None) for a valid handle, or (None, return code) if the call should fail.
+        """
+        camera = self._handles.get(_address(hCamera))
+        if None == camera:
+            return (None, PxLApi.ReturnCode.ApiInvalidHandleError)
+        rc = camera._injectedError(functionName)
+        if None != rc:
+            return (None, rc)
+        return (camera, None)
+
+    """
+    Camera enumeration and initialization
+    """
+    def PxLGetNumberCamerasEx(self, pCameraIdInfo, pNumberCameraIds):
+        connected = [camera for camera in self.cameras if camera.connected]
+        address = _address(pCameraIdInfo)
+        if address:
+            for i, camera in enumerate(connected[:_readUint(pNumberCameraIds)]):
+                cameraIdInfo = PxLApi._CameraIdInfo.from_address(address + i * sizeof(PxLApi._CameraIdInfo))
+                cameraIdInfo.StructSize = sizeof(PxLApi._CameraIdInfo)
+                cameraIdInfo.CameraSerialNum = camera.serialNumber
+        _writeUint(pNumberCameraIds, len(connected))
+        return PxLApi.ReturnCode.ApiSuccess
+
+    def PxLInitializeEx(self, serialNumber, phCamera, flags):
+        serialNumber = _address(serialNumber)
+        for i, camera in enumerate(self.cameras):
+            if camera.connected and serialNumber in (0, camera.serialNumber):
+                rc = camera._injectedError("PxLInitializeEx")
+                if None != rc:
+                    return rc
+                if None != camera.hCamera:
+                    return PxLApi.ReturnCode.ApiCameraInUseError
+                camera.hCamera = SimulatedApi._firstHandle + i
+                self._handles[camera.hCamera] = camera
+                c_void_p.from_address(_address(phCamera)).value = camera.hCamera
+                return PxLApi.ReturnCode.ApiSuccess
+        return PxLApi.ReturnCode.ApiNoCameraError
+
+    def PxLUninitialize(self, hCamera):
+        camera = self._handles.pop(_address(hCamera), None)
+        if None == camera:
+            return PxLApi.ReturnCode.ApiInvalidHandleError
+        camera._stopStream(PxLApi.StreamState.STOP)
+        camera.callbacks = {}
+        camera.eventCallbacks = {}
+        camera.hCamera = None
+        return PxLApi.ReturnCode.ApiSuccess
+
+    def PxLGetCameraInfoEx(self, hCamera, pInformation, informationSize):
+        camera, rc = self._camera(hCamera, "PxLGetCameraInfoEx")
+        if None == camera:
+            return rc
+        cameraInfo = PxLApi._CameraInfo.from_address(_address(pInformation))
+        cameraInfo.VendorName = b"Pixelink"
+        cameraInfo.ModelName = camera.modelName.encode("utf-8")
+        cameraInfo.Description = b"Simulated camera"
+        cameraInfo.SerialNumber = str(camera.serialNumber).encode("utf-8")
+        cameraInfo.FirmwareVersion = b"0.0.0"
+        cameraInfo.CameraName = b"Simulated camera"
+        return PxLApi.ReturnCode.ApiSuccess
+
+    def PxLGetCameraXML(self, hCamera, pCameraXml, pXmlSize):
+        camera, rc = self._camera(hCamera, "PxLGetCameraXML")
+        if None == camera:
+            return rc
+        xml = ('<?xml version="1.0"?><Camera Model="{0}" SerialNumber="{1}"/>'.format(
+               camera.modelName, camera.serialNumber)).encode("utf-8") + b"\0"
+        if _address(pCameraXml):
+            if _readUint(pXmlSize) < len(xml):
+                return PxLApi.ReturnCode.ApiBufferTooSmall
+            memmove(_address(pCameraXml), xml, len(xml))
+        _writeUint(pXmlSize, len(xml))
+        return PxLApi.ReturnCode.ApiSuccess
+
+    def PxLGetCurrentTimestamp(self, hCamera, pCurrentTimestamp):
+        camera, rc = self._camera(hCamera, "PxLGetCurrentTimestamp")
+        if None == camera:
+            return rc
+        c_double.from_address(_address(pCurrentTimestamp)).value = time.perf_counter() - camera._clockStart
+        return PxLApi.ReturnCode.ApiSuccess
+
+    def PxLGetErrorReport(self, hCamera, pErrorReport):
+        PxLApi._ErrorReport.from_address(_address(pErrorReport)).strReport = b"Simulated camera"
+        return PxLApi.ReturnCode.ApiSuccess
+
+    def PxLLoadSettings(self, hCamera, channel):
+        camera, rc = self._camera(hCamera, "PxLLoadSettings")
+        if None == camera:
+            return rc
+        return PxLApi.ReturnCode.ApiSuccess
+
+    def PxLSaveSettings(self, hCamera, channel):
+        camera, rc = self._camera(hCamera, "PxLSaveSettings")
+        if None == camera:
+            return rc
+        return PxLApi.ReturnCode.ApiSuccess
+
+    def PxLSetFrameBufferPolicy(self, hCamera, nonTriggeredFrames, triggeredFrames, totalFrameBufferSizeInMs):
+        camera, rc = self._camera(hCamera, "PxLSetFrameBufferPolicy")
+        if None == camera:
+            return rc
+        return PxLApi.ReturnCode.ApiSuccess
+
+    """
+    Features
+    """
+    def PxLGetFeature(self, hCamera, featureId, pFlags, pNumberParms, pParams):
+        camera, rc = self._camera(hCamera, "PxLGetFeature")
+        if None == camera:
+            return rc
+        with camera._lock:
+            feature = camera.features.get(featureId)
+            if None == feature:
+                return PxLApi.ReturnCode.ApiNotSupportedError
+            if featureId == PxLApi.FeatureId.ACTUAL_FRAME_RATE:
+                feature.params[0] = camera.param(PxLApi.FeatureId.FRAME_RATE)
+            _writeUint(pFlags, feature.flags)
+            if _address(pParams):
+                numberParams = min(_readUint(pNumberParms), len(feature.params))
+                (c_float * numberParams).from_address(_address(pParams))[:] = feature.params[:numberParams]
+            _writeUint(pNumberParms, len(feature.params))
+        return PxLApi.ReturnCode.ApiSuccess
+
+    def PxLSetFeature(self, hCamera, featureId, flags, numberParms, pParams):
+        camera, rc = self._camera(hCamera, "PxLSetFeature")
+        if None == camera:
+            return rc
+        with camera._lock:
+            feature = camera.features.get(featureId)
+            if None == feature:
+                return PxLApi.ReturnCode.ApiNotSupportedError
+            if feature.supportedFlags & PxLApi.FeatureFlags.READ_ONLY:
+                return PxLApi.ReturnCode.ApiInvalidParameterError
+            if PxLApi.StreamState.START == camera.streamState and \
+               not (feature.supportedFlags & PxLApi.FeatureFlags.SETTABLE_WHILE_STREAMING):
+                return PxLApi.ReturnCode.ApiNotPermittedWhileStreaming
+            params = list((c_float * numberParms).from_address(_address(pParams)))
+            if len(params) < len(feature.params):
+                return PxLApi.ReturnCode.ApiInvalidParameterError
+            for value, (minValue, maxValue) in zip(params, feature.limits):
+                if value < minValue or value > maxValue:
+                    return PxLApi.ReturnCode.ApiOutOfRangeError
+            if featureId == PxLApi.FeatureId.PIXEL_FORMAT and int(params[0]) not in camera.supportedPixelFormats:
+                return PxLApi.ReturnCode.ApiOutOfRangeError
+            if featureId == PxLApi.FeatureId.ROI:
+                if params[PxLApi.RoiParams.LEFT] + params[PxLApi.RoiParams.WIDTH] > camera.sensorWidth or \
+                   params[PxLApi.RoiParams.TOP] + params[PxLApi.RoiParams.HEIGHT] > camera.sensorHeight:
+                    return PxLApi.ReturnCode.ApiOutOfRangeError
+            feature.params = params[:len(feature.params)]
+            feature.flags = PxLApi.FeatureFlags.PRESENCE | (flags & PxLApi.FeatureFlags.MOD_BITS)
+        return PxLApi.ReturnCode.ApiSuccess
+
+    def PxLGetCameraFeatures(self, hCamera, featureId, pFeatureInfo, pBufferSize):
+        camera, rc = self._camera(hCamera, "PxLGetCameraFeatures")
+        if None == camera:
+            return rc
+        if PxLApi.FeatureId.ALL == featureId:
+            featureIds = list(range(PxLApi.FeatureId.TOTAL))
+        else:
+            featureIds = [featureId]
+        # The features are laid out as in the native library: the header, then the array of
+        # features, then the parameter limits of each feature, all in the one buffer.
+        numberParams = sum(len(camera.features[i].params) for i in featureIds if i in camera.features)
+        featureOffset = sizeof(PxLApi._CameraFeatures)
+        paramOffset = featureOffset + len(featureIds) * sizeof(PxLApi._CameraFeatures._CameraFeature)
+        bufferSize = paramOffset + numberParams * sizeof(PxLApi._CameraFeatures._CameraFeature._FeatureParam)
+        address = _address(pFeatureInfo)
+        if address:
+            if _readUint(pBufferSize) < bufferSize:
+                return PxLApi.ReturnCode.ApiBufferTooSmall
+            cameraFeatures = PxLApi._CameraFeatures.from_address(address)
+            cameraFeatures.uSize = bufferSize
+            cameraFeatures.uNumberOfFeatures = len(featureIds)
+            cameraFeatures.Features = cast(address + featureOffset, POINTER(PxLApi._CameraFeatures._CameraFeature))
+            paramAddress = address + paramOffset
+            for i, id in enumerate(featureIds):
+                cameraFeature = cameraFeatures.Features[i]
+                cameraFeature.uFeatureId = id
+                feature = camera.features.get(id)
+                if None == feature:
+                    cameraFeature.uFlags = 0
+                    cameraFeature.uNumberOfParameters = 0
+                    cameraFeature.Params = None
+                    continue
+                cameraFeature.uFlags = feature.supportedFlags
+                cameraFeature.uNumberOfParameters = len(feature.params)
+                cameraFeature.Params = cast(paramAddress, POINTER(PxLApi._CameraFeatures._CameraFeature._FeatureParam))
+                for j, (minValue, maxValue) in enumerate(feature.limits):
+                    cameraFeature.Params[j].fMinValue = minValue
+                    cameraFeature.Params[j].fMaxValue = maxValue
+                paramAddress += len(feature.params) * sizeof(PxLApi._CameraFeatures._CameraFeature._FeatureParam)
+        _writeUint(pBufferSize, bufferSize)
+        return PxLApi.ReturnCode.ApiSuccess
+
+    """
+    Streaming
+    """
+    def PxLSetStreamState(self, hCamera, streamState):
+        camera, rc = self._camera(hCamera, "PxLSetStreamState")
+        if None == camera:
+            return rc
+        with camera._lock:
+            if PxLApi.StreamState.START == streamState:
+                if PxLApi.StreamState.START == camera.streamState:
+                    return PxLApi.ReturnCode.ApiSuccessAlreadyRunning
+                camera._startStream()
+        if PxLApi.StreamState.START != streamState:
+            camera._stopStream(streamState)
+        return PxLApi.ReturnCode.ApiSuccess
+
+    def PxLGetStreamState(self, hCamera, pStreamState, pNumberFrameBuffers):
+        camera, rc = self._camera(hCamera, "PxLGetStreamState")
+        if None == camera:
+            return rc
+        _writeUint(pStreamState, camera.streamState)
+        _writeUint(pNumberFrameBuffers, camera.frameBuffers)
+        return PxLApi.ReturnCode.ApiSuccess
+
+    def PxLSetPreviewState(self, hCamera, previewState, phWnd):
+        camera, rc = self._camera(hCamera, "PxLSetPreviewState")
+        if None == camera:
+            return rc
+        camera.previewState = previewState
+        if PxLApi.PreviewState.START == previewState and PxLApi.StreamState.START == camera.streamState and \
+           camera.callbacks and None == camera._callbackThread:
+            camera._startCallbackThread()
+        return PxLApi.ReturnCode.ApiSuccess
+
+    def PxLGetNextFrame(self, hCamera, bufferSize, pFrame, pDescriptor):
+        camera, rc = self._camera(hCamera, "PxLGetNextFrame")
+        if None == camera:
+            return rc
+        if PxLApi.StreamState.START != camera.streamState:
+            return PxLApi.ReturnCode.ApiStreamStopped
+        width, height, pixelFormat, frameSize = camera.frameGeometry()
+        frameAddress = _address(pFrame)
+        if frameAddress and (bufferSize & 0xFFFFFFFF) < frameSize:
+            return PxLApi.ReturnCode.ApiBufferTooSmall
+        nextFrame = camera._nextFrame("getNextFrame")
+        if None == nextFrame:
+            return PxLApi.ReturnCode.ApiStreamStopped
+        frameNumber, frameTime, framesLost = nextFrame
+        if frameAddress:
+            camera._fillFrame(frameAddress, frameSize, frameNumber)
+        camera._fillFrameDesc(_address(pDescriptor), frameNumber, frameTime)
+        if framesLost:
+            camera.raiseEvent(PxLApi.EventId.FRAMES_SKIPPED)
+            return PxLApi.ReturnCode.ApiSuccessWithFrameLoss
+        return PxLApi.ReturnCode.ApiSuccess
+
+    def PxLGetNextCompressedFrame(self, hCamera, bufferSize, pFrame, pDescriptor, pCompressionDesc, pCompressionDescSize):
+        camera, rc = self._camera(hCamera, "PxLGetNextCompressedFrame")
+        if None == camera:
+            return rc
+        if PxLApi.StreamState.START != camera.streamState:
+            return PxLApi.ReturnCode.ApiStreamStopped
+        if not camera.compressionEnabled():
+            return PxLApi.ReturnCode.ApiRequiresUncompressedFrameError
+        if not _address(pCompressionDesc):
+            _writeUint(pCompressionDescSize, PxLApi.CompressionDescSize.PIXELINK10)
+            return PxLApi.ReturnCode.ApiSuccess
+        if _readUint(pCompressionDescSize) < PxLApi.CompressionDescSize.PIXELINK10:
+            return PxLApi.ReturnCode.ApiBufferTooSmall
+        width, height, pixelFormat, frameSize = camera.frameGeometry()
+        nextFrame = camera._nextFrame("getNextFrame")
+        if None == nextFrame:
+            return PxLApi.ReturnCode.ApiStreamStopped
+        frameNumber, frameTime, framesLost = nextFrame
+        uncompressed = create_string_buffer(frameSize)
+        camera._fillFrame(addressof(uncompressed), frameSize, frameNumber)
+        compressed = zlib.compress(uncompressed.raw, 1)
+        frameAddress = _address(pFrame)
+        if frameAddress:
+            if (bufferSize & 0xFFFFFFFF) < len(compressed):
+                return PxLApi.ReturnCode.ApiBufferTooSmall
+            memmove(frameAddress, compressed, len(compressed))
+        memmove(_address(pCompressionDesc), camera._compressionDesc(frameSize), PxLApi.CompressionDescSize.PIXELINK10)
+        _writeUint(pCompressionDescSize, PxLApi.CompressionDescSize.PIXELINK10)
+        camera._fillFrameDesc(_address(pDescriptor), frameNumber, frameTime, len(compressed))
+        if framesLost:
+            camera.raiseEvent(PxLApi.EventId.FRAMES_SKIPPED)
+            return PxLApi.ReturnCode.ApiSuccessWithFrameLoss
+        return PxLApi.ReturnCode.ApiSuccess
+
+    def PxLDecompressFrame(self, pSrcFrame, pSrcFrameDesc, pCompressionDesc, pDstFrame, pDstFrameSize):
+        compressionDesc = string_at(_address(pCompressionDesc), 8)
+        magic, frameSize = struct.unpack("<II", compressionDesc)
+        if _SIMULATED_COMPRESSION_MAGIC != magic:
+            return PxLApi.ReturnCode.ApiDecompressionNotPossibleError
+        dstAddress = _address(pDstFrame)
+        if dstAddress:
+            srcAddress = _address(pSrcFrame)
+            if srcAddress % 64 or dstAddress % 64:
+                return PxLApi.ReturnCode.ApiMemoryBufferAlignmentError
+            if _readUint(pDstFrameSize) < frameSize:
+                return PxLApi.ReturnCode.ApiBufferTooSmall
+            srcFrameDesc = PxLApi._FrameDesc.from_address(_address(pSrcFrameDesc))
+            compressed = string_at(srcAddress, int(srcFrameDesc.CompressionInfo.fCompressedSize))
+            memmove(dstAddress, zlib.decompress(compressed), frameSize)
+        _writeUint(pDstFrameSize, frameSize)
+        return PxLApi.ReturnCode.ApiSuccess
+
+    def PxLSetCallback(self, hCamera, callbackType, context, function):
+        camera, rc = self._camera(hCamera, "PxLSetCallback")
+        if None == camera:
+            return rc
+        if PxLApi.Callback.FORMAT_CLIP == callbackType:
+            return PxLApi.ReturnCode.ApiNotSupportedError
+        with camera._lock:
+            if None == function or 0 == function:
+                camera.callbacks.pop(callbackType, None)
+            else:
+                if not callable(function):
+                    # A native function pointer
+                    function = PxLApi._dataProcessFunction(_address(function))
+                camera.callbacks[callbackType] = (_address(context), function)
+                if PxLApi.StreamState.START == camera.streamState and None == camera._callbackThread:
+                    camera._startCallbackThread()
+        return PxLApi.ReturnCode.ApiSuccess
+
+    def PxLSetEventCallback(self, hCamera, eventId, context, function):
+        camera, rc = self._camera(hCamera, "PxLSetEventCallback")
+        if None == camera:
+            return rc
+        with camera._lock:
+            if None == function or 0 == function:
+                camera.eventCallbacks.pop(eventId, None)
+            else:
+                if not callable(function):
+                    function = PxLApi._eventProcessFunction(_address(function))
+                camera.eventCallbacks[eventId] = (_address(context), function)
+        return PxLApi.ReturnCode.ApiSuccess
+
+    """
+    Image formatting
+    Only 8 and 16 bit monochrome-like data (mono and Bayer) is formatted, to BMP, PNG and the RAW_ formats.
+    """
+    def PxLFormatImage(self, pSrcImage, pSrcFrameDesc, outputFormat, pDstImage, pDstImageSize):
+        srcFrameDesc = PxLApi._FrameDesc.from_address(_address(pSrcFrameDesc))
+        pixelFormat = int(srcFrameDesc.PixelFormat.fValue)
+        bytesPerPixel = PxLApi.getBytesPerPixel(pixelFormat)
+        if bytesPerPixel not in (1, 2):
+            return PxLApi.ReturnCode.ApiNotSupportedError
+        width = int(srcFrameDesc.Roi.fWidth / srcFrameDesc.PixelAddressingValue.fHorizontal)
+        height = int(srcFrameDesc.Roi.fHeight / srcFrameDesc.PixelAddressingValue.fVertical)
+        imageSize = self._formattedImageSize(outputFormat, width, height, bytesPerPixel)
+        if None == imageSize:
+            return PxLApi.ReturnCode.ApiNotSupportedError
+        dstAddress = _address(pDstImage)
+        if not dstAddress:
+            if 0 == imageSize:
+                imageSize = len(self._formatImage(pSrcImage, outputFormat, width, height, bytesPerPixel))
+            _writeUint(pDstImageSize, imageSize)
+            return PxLApi.ReturnCode.ApiSuccess
+        image = self._formatImage(pSrcImage, outputFormat, width, height, bytesPerPixel)
+        if _readUint(pDstImageSize) < len(image):
+            return PxLApi.ReturnCode.ApiBufferTooSmall
+        memmove(dstAddress, image, len(image))
+        _writeUint(pDstImageSize, len(image))
+        return PxLApi.ReturnCode.ApiSuccess
+
+    def _formattedImageSize(self, outputFormat, width, height, bytesPerPixel):
+        # PNG output is data dependent, hence 0 (i.e. format to find out)
+        rowSize = (width + 3) & ~3
+        sizes = {
+            PxLApi.ImageFormat.BMP: 54 + 1024 + rowSize * height,
+            PxLApi.ImageFormat.PNG: 0,
+            PxLApi.ImageFormat.RAW_MONO8: width * height,
+            PxLApi.ImageFormat.RAW_RGB24: width * height * 3,
+            PxLApi.ImageFormat.RAW_RGB24_NON_DIB: width * height * 3,
+            PxLApi.ImageFormat.RAW_BGR24: width * height * 3,
+            PxLApi.ImageFormat.RAW_RGB48: width * height * 6,
+        }
+        return sizes.get(outputFormat)
+
+    def _formatImage(self, pSrcImage, outputFormat, width, height, bytesPerPixel):
+        pixels = string_at(_address(pSrcImage), width * height * bytesPerPixel)
+        if 2 == bytesPerPixel:
+            # Keep the most significant byte of each (little endian) 16 bit pixel
+            mono8 = pixels[1::2]
+        else:
+            mono8 = pixels
+        if PxLApi.ImageFormat.RAW_MONO8 == outputFormat:
+            return mono8
+        if outputFormat in (PxLApi.ImageFormat.RAW_RGB24, PxLApi.ImageFormat.RAW_RGB24_NON_DIB, PxLApi.ImageFormat.RAW_BGR24):
+            rgb = bytearray(len(mono8) * 3)
+            rgb[0::3] = rgb[1::3] = rgb[2::3] = mono8
+            return bytes(rgb)
+        if PxLApi.ImageFormat.RAW_RGB48 == outputFormat:
+            if 2 == bytesPerPixel:
+                mono16 = pixels
+            else:
+                widened = bytearray(len(mono8) * 2)
+                widened[1::2] = mono8
+                mono16 = bytes(widened)
+            rgb = bytearray(len(mono16) * 3)
+            for channel in range(3):
+                rgb[channel * 2::6] = mono16[0::2]
+                rgb[channel * 2 + 1::6] = mono16[1::2]
+            return bytes(rgb)
+        if PxLApi.ImageFormat.PNG == outputFormat:
+            rows = b"".join(b"\0" + mono8[y * width:(y + 1) * width] for y in range(height))
+            def chunk(chunkType, data):
+                return struct.pack(">I", len(data)) + chunkType + data + struct.pack(">I", zlib.crc32(chunkType + data))
+            return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)) +
+                    chunk(b"IDAT", zlib.compress(rows, 6)) + chunk(b"IEND", b""))
+        # BMP; 8 bit grey scale, bottom-up
+        rowSize = (width + 3) & ~3
+        padding = b"\0" * (rowSize - width)
+        palette = b"".join(bytes((i, i, i, 0)) for i in range(256))
+        pixelData = b"".join(mono8[y * width:(y + 1) * width] + padding for y in range(height - 1, -1, -1))
+        header = struct.pack("<2sIHHI", b"BM", 54 + 1024 + len(pixelData), 0, 0, 54 + 1024)
+        infoHeader = struct.pack("<IiiHHIIiiII", 40, width, height, 1, 8, 0, len(pixelData), 2835, 2835, 256, 0)
+        return header + infoHeader + palette + pixelData
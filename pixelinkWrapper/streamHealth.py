@@ -0,0 +1,238 @@
+"""
+Monitoring of the frame loss of a stream.
+
+A camera that can't deliver its frames fast enough drops them quietly: getNextFrame still succeeds,
+if with ApiSuccessWithFrameLoss, the frame numbers (u64FrameNumber) of the frames that do arrive skip
+a few, and the camera raises FRAMES_SKIPPED events. A StreamHealth keeps track of all of that for a
+camera. It is fed the results of getNextFrame (or getNextNumPyFrame, getNextCompressedFrame) and/or
+the frames of a frame callback, and listens to FRAMES_SKIPPED events itself:
+    health = StreamHealth(hCamera, threshold=0.01, onThreshold=alarm)
+    health.start()
+    ret = health.update(PxLApi.getNextFrame(hCamera, frame))
+
+On top of the totals, the frames received and lost, the timeouts and the FRAMES_SKIPPED events are
+counted over rolling windows of the last few seconds (1, 10 and 60 by default), in buckets of a tenth
+of the shortest window. Whenever a bucket is complete, the loss rate of each window (the frames lost
+over the frames expected) is checked against the threshold, and onThreshold is called on the windows
+that exceed it, once per breach.
+"""
+
+from . pixelink import PxLApi
+import collections
+import threading
+import time
+
+
+class StreamHealth:
+    """
+    Monitors the frame loss of the stream of the camera hCamera over the rolling windows windows, in
+    seconds. When the loss rate of a window exceeds threshold, onThreshold(health, window, lossRate)
+    is called, on whichever thread fed the monitor at the time. It isn't called again for that window
+    until its loss rate has come back down to the threshold.
+
+    All of the counters are totals since the monitor was created, or reset:
+        framesReceived      - the frames read, or called back
+        framesLost          - the frames missing from the sequence of frame numbers, and
+        gaps                - the number of places where frames are missing
+        lossReports         - the reads that returned ApiSuccessWithFrameLoss
+        framesSkippedEvents - the FRAMES_SKIPPED events of the camera
+        timeouts            - the reads that timed out (ApiCameraTimeoutError, or ApiTimeoutError)
+        errorCount          - the reads that failed otherwise, the last of them with lastError
+
+    A StreamHealth can be used as a context manager, which starts and stops it.
+    """
+    def __init__(self, hCamera=None, windows=(1.0, 10.0, 60.0), threshold=None, onThreshold=None):
+        assert windows and 0 < min(windows)
+        self.hCamera = hCamera
+        self.windows = tuple(sorted(windows))
+        self.threshold = threshold
+        self.onThreshold = onThreshold
+        self._bucketLength = self.windows[0] / 10
+        self._windowBuckets = [int(round(window / self._bucketLength)) for window in self.windows]
+        self._eventCallback = None
+        self._lock = threading.Lock()
+        self.reset()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.stop()
+
+    def reset(self):
+        """
+        Clears all of the counters and the windows.
+        """
+        with self._lock:
+            self.framesReceived = 0
+            self.framesLost = 0
+            self.gaps = 0
+            self.lossReports = 0
+            self.framesSkippedEvents = 0
+            self.timeouts = 0
+            self.errorCount = 0
+            self.lastError = PxLApi.ReturnCode.ApiSuccess
+            self._lastFrameNumber = None
+            self._buckets = collections.deque() # [bucket, received, lost, timeouts, framesSkippedEvents]
+            self._breached = set()
+
+    def start(self):
+        """
+        Registers an event callback for the FRAMES_SKIPPED events of the camera, replacing any other
+        one. Raises PxLApi.ApiError on failure.
+        """
+        if None == self.hCamera or None != self._eventCallback:
+            return
+        self._eventCallback = PxLApi._eventProcessFunction(self._onEvent)
+        ret = PxLApi.setEventCallback(self.hCamera, PxLApi.EventId.FRAMES_SKIPPED, 0, self._eventCallback)
+        if not PxLApi.apiSuccess(ret[0]):
+            self._eventCallback = None
+            raise PxLApi.ApiError(ret[0], "setEventCallback")
+
+    def stop(self):
+        """
+        Cancels the event callback of start.
+        """
+        if None == self._eventCallback:
+            return
+        PxLApi.setEventCallback(self.hCamera, PxLApi.EventId.FRAMES_SKIPPED, 0, None)
+        self._eventCallback = None
+
+    def update(self, ret):
+        """
+        Records ret, the tuple returned by getNextFrame, getNextNumPyFrame or getNextCompressedFrame.
+        Returns ret.
+        """
+        rc = ret[0]
+        if PxLApi.apiSuccess(rc):
+            self._frame(ret[1] if 1 < len(ret) else None, PxLApi.ReturnCode.ApiSuccessWithFrameLoss == rc)
+        elif rc in (PxLApi.ReturnCode.ApiCameraTimeoutError, PxLApi.ReturnCode.ApiTimeoutError):
+            self._count(timeouts=1)
+        else:
+            with self._lock:
+                self.errorCount += 1
+                self.lastError = rc
+        return ret
+
+    def wrap(self, function=None):
+        """
+        Returns a data process function (as created with @PxLApi._dataProcessFunction) that records each
+        frame and then calls function, if any. function can itself be a data process function, or a plain
+        Python function with the same arguments.
+        """
+        def dataProcessFunction(hCamera, frameData, dataFormat, frameDesc, userData):
+            self._frame(frameDesc.contents, False)
+            if None == function:
+                return PxLApi.ReturnCode.ApiSuccess
+            return function(hCamera, frameData, dataFormat, frameDesc, userData)
+
+        return PxLApi._dataProcessFunction(dataProcessFunction)
+
+    def _onEvent(self, hCamera, eventId, eventTimestamp, numDataBytes, data, userData):
+        if PxLApi.EventId.FRAMES_SKIPPED == eventId:
+            self._count(framesSkippedEvents=1)
+        return PxLApi.ReturnCode.ApiSuccess
+
+    def _frame(self, frameDesc, lossReported):
+        lost = 0
+        with self._lock:
+            if None != frameDesc:
+                frameNumber = frameDesc.u64FrameNumber
+                if None != self._lastFrameNumber and frameNumber > self._lastFrameNumber + 1:
+                    lost = frameNumber - self._lastFrameNumber - 1
+                    self.gaps += 1
+                # A frame number that goes back is that of a restarted stream
+                self._lastFrameNumber = frameNumber
+            if lossReported:
+                self.lossReports += 1
+                if 0 == lost:
+                    lost = 1 # At least one frame was lost, even though it doesn't show in the frame numbers
+                    self.gaps += 1
+            self.framesLost += lost
+        self._count(received=1, lost=lost)
+
+    def _count(self, received=0, lost=0, timeouts=0, framesSkippedEvents=0):
+        breaches = None
+        bucket = int(time.monotonic() / self._bucketLength)
+        with self._lock:
+            self.framesReceived += received
+            self.timeouts += timeouts
+            self.framesSkippedEvents += framesSkippedEvents
+            buckets = self._buckets
+            if not buckets or buckets[-1][0] != bucket:
+                while buckets and buckets[0][0] <= bucket - self._windowBuckets[-1]:
+                    buckets.popleft()
+                # The buckets so far are complete, so the windows ending with them can be checked
+                breaches = self._checkThreshold(bucket - 1)
+                buckets.append([bucket, 0, 0, 0, 0])
+            counts = buckets[-1]
+            counts[1] += received
+            counts[2] += lost
+            counts[3] += timeouts
+            counts[4] += framesSkippedEvents
+        if breaches:
+            for window, lossRate in breaches:
+                self.onThreshold(self, window, lossRate)
+
+    def _windowCounts(self, lastBucket):
+        # The counts of each window ending with the bucket lastBucket
+        windowCounts = []
+        for window, windowBuckets in zip(self.windows, self._windowBuckets):
+            counts = [0, 0, 0, 0]
+            for bucketCounts in self._buckets:
+                if lastBucket - windowBuckets < bucketCounts[0] <= lastBucket:
+                    for i in range(4):
+                        counts[i] += bucketCounts[i + 1]
+            windowCounts.append((window, counts))
+        return windowCounts
+
+    def _checkThreshold(self, lastBucket):
+        if None == self.threshold or None == self.onThreshold:
+            return None
+        breaches = []
+        for window, counts in self._windowCounts(lastBucket):
+            lossRate = _lossRate(counts[0], counts[1])
+            if None != lossRate and lossRate > self.threshold:
+                if window not in self._breached:
+                    self._breached.add(window)
+                    breaches.append((window, lossRate))
+            elif None != lossRate:
+                self._breached.discard(window)
+        return breaches
+
+    def lossRate(self, window=None):
+        """
+        Returns the loss rate of the window window (by default, the shortest one) up to now, or None if no
+        frame was expected in that time.
+        """
+        window = self.windows[0] if None == window else window
+        return self.windowStats()[window]["lossRate"]
+
+    def windowStats(self):
+        """
+        Returns the frames received and lost, the timeouts, the FRAMES_SKIPPED events and the loss rate of
+        each window up to now, as a dictionary of dictionaries by window.
+        """
+        bucket = int(time.monotonic() / self._bucketLength)
+        with self._lock:
+            windowCounts = self._windowCounts(bucket)
+        return {window: {"framesReceived": counts[0], "framesLost": counts[1], "timeouts": counts[2],
+                         "framesSkippedEvents": counts[3], "lossRate": _lossRate(counts[0], counts[1])}
+                for window, counts in windowCounts}
+
+    def stats(self):
+        """
+        Returns all of the counters, and the windowStats as "windows", as a dictionary.
+        """
+        windows = self.windowStats()
+        with self._lock:
+            return {"framesReceived": self.framesReceived, "framesLost": self.framesLost, "gaps": self.gaps,
+                    "lossReports": self.lossReports, "framesSkippedEvents": self.framesSkippedEvents,
+                    "timeouts": self.timeouts, "errorCount": self.errorCount, "lastError": self.lastError,
+                    "windows": windows}
+
+
+def _lossRate(received, lost):
+    expected = received + lost
+    return lost / expected if expected else None
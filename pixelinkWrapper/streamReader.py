@@ -0,0 +1,205 @@
+"""
+Background frame acquisition into a ring of NumPy frames.
+
+A StreamReader runs the getNextNumPyFrame loop of a camera on a thread of its own, so that the
+processing done by the consumers of the frames does not hold up the acquisition. Each frame, and
+its frame descriptor, is written into one of the preallocated slots of a ring; nothing is allocated
+per frame. Consumers either pull the next frame in sequence, or just the latest one.
+
+When the consumers fall behind, what happens depends on the policy of the reader:
+    - StreamReader.Policy.OVERWRITE: the oldest unread frames get overwritten (and counted in
+      framesOverwritten), so that the ring always holds the most recent frames.
+    - StreamReader.Policy.BLOCK: the acquisition thread waits for a slot to be read before reusing
+      it, so no frame in the ring is ever lost. The camera will drop frames instead once its own
+      frame buffers fill up.
+
+The slots are handed over between the acquisition thread and the consumer under a threading.Condition,
+rather than through a lock-free ring. The GIL serializes the two threads anyway, so a lock-free ring
+would only save an uncontended lock per frame, while the BLOCK policy, and consumers waiting in next,
+need a condition to wait on without polling.
+
+NumPy is required for this module.
+"""
+
+from . pixelink import PxLApi
+from . framePool import createAlignedNumPyBuffer, getFrameGeometry
+import threading
+import time
+
+
+class StreamReader:
+    """
+    Reads frames from the camera hCamera into a ring of count NumPy frames, shaped and typed as per
+    the FrameGeometry of the camera when the reader is started. With startStream, the reader starts
+    the stream of the camera when it is started and stops it when it is stopped.
+
+    The frame and frame descriptor returned by next and latest are views of a ring slot, not copies.
+    They remain valid until the following call to next or latest, as the acquisition thread won't
+    write into the slot last handed out. Only one thread should therefore consume frames from a reader.
+
+    A StreamReader can be used as a context manager, which starts and stops it.
+    """
+
+    class Policy:
+        OVERWRITE = 0
+        BLOCK = 1
+
+    def __init__(self, hCamera, count=4, policy=Policy.OVERWRITE, startStream=True):
+        assert 2 <= count
+        self.hCamera = hCamera
+        self.count = count
+        self.policy = policy
+        self.startStream = startStream
+        self.geometry = None
+        self.framesRead = 0
+        self.framesOverwritten = 0
+        self.errorCount = 0
+        self.lastError = PxLApi.ReturnCode.ApiSuccess
+        self._frames = []
+        self._frameDescs = []
+        self._sequence = []     # Sequence number of the frame in each slot, 0 if none
+        self._writeSequence = 0 # Sequence number of the last frame written
+        self._readSequence = 0  # Sequence number of the last frame handed out
+        self._writeSlot = -1    # Slot last written
+        self._heldSlot = None   # Slot last handed out to the consumer
+        self._running = False
+        self._thread = None
+        self._condition = threading.Condition()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.stop()
+
+    def start(self):
+        """
+        Allocates the ring for the current frame geometry of the camera and starts the acquisition
+        thread (and the stream, with startStream). Raises PxLApi.ApiError on failure.
+        """
+        if self._running:
+            return
+        ret = getFrameGeometry(self.hCamera)
+        if not PxLApi.apiSuccess(ret[0]):
+            raise PxLApi.ApiError(ret[0], "getFrameGeometry")
+        if ret[1] != self.geometry:
+            self.geometry = ret[1]
+            shape = self.geometry.numPyShape()
+            dtype = self.geometry.numPyDtype()
+            self._frames = [createAlignedNumPyBuffer(self.geometry.frameSize(), 64).view(dtype).reshape(shape)
+                            for i in range(self.count)]
+            self._frameDescs = [PxLApi.createFrameDesc() for i in range(self.count)]
+        self._sequence = [0] * self.count
+        self._writeSequence = self._readSequence = 0
+        self._writeSlot = -1
+        self._heldSlot = None
+        self.lastError = PxLApi.ReturnCode.ApiSuccess
+
+        if self.startStream:
+            ret = PxLApi.setStreamState(self.hCamera, PxLApi.StreamState.START)
+            if not PxLApi.apiSuccess(ret[0]):
+                raise PxLApi.ApiError(ret[0], "setStreamState")
+        self._running = True
+        self._thread = threading.Thread(target=self._acquire, name="StreamReader", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the acquisition thread (and the stream, with startStream). Frames already in the ring can
+        still be read after that.
+        """
+        with self._condition:
+            if not self._running and None == self._thread:
+                return
+            self._running = False
+            self._condition.notify_all()
+        # Stopping the stream also ends a getNextFrame the acquisition thread may be waiting in
+        if self.startStream:
+            PxLApi.setStreamState(self.hCamera, PxLApi.StreamState.STOP)
+        if None != self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def isRunning(self):
+        return self._running
+
+    def _nextSlot(self):
+        # Called with the condition held. Picks the slot after the one last written, skipping the
+        # slot held by the consumer; with the BLOCK policy, waits while that slot holds an unread frame.
+        # The slot is picked again after each wait, as the consumer may have taken hold of it meanwhile.
+        while True:
+            slot = (self._writeSlot + 1) % self.count
+            if slot == self._heldSlot:
+                slot = (slot + 1) % self.count
+            if self.Policy.BLOCK != self.policy or self._sequence[slot] <= self._readSequence or not self._running:
+                return slot
+            self._condition.wait()
+
+    def _acquire(self):
+        while self._running:
+            with self._condition:
+                slot = self._nextSlot()
+                if not self._running:
+                    break
+                if self._sequence[slot] > self._readSequence:
+                    self.framesOverwritten += 1
+                # The slot is not readable while it is being written
+                self._sequence[slot] = 0
+            ret = PxLApi.getNextNumPyFrame(self.hCamera, self._frames[slot], self._frameDescs[slot])
+            with self._condition:
+                if PxLApi.apiSuccess(ret[0]):
+                    self._writeSequence += 1
+                    self._sequence[slot] = self._writeSequence
+                    self._writeSlot = slot
+                    self.framesRead += 1
+                    self._condition.notify_all()
+                    continue
+                if not self._running:
+                    break # Stopped while waiting for the frame
+                self.errorCount += 1
+                self.lastError = ret[0]
+                if ret[0] in PxLApi._fatalStreamReturnCodes:
+                    self._running = False
+                    self._condition.notify_all()
+                    break
+
+    def _hand(self, slot):
+        # Called with the condition held
+        self._heldSlot = slot
+        self._readSequence = max(self._readSequence, self._sequence[slot])
+        self._condition.notify_all()
+        return (self._frames[slot], self._frameDescs[slot])
+
+    def _read(self, pick, timeout):
+        deadline = None if None == timeout else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                unread = [(self._sequence[slot], slot) for slot in range(self.count)
+                          if self._sequence[slot] > self._readSequence]
+                if unread:
+                    return self._hand(pick(unread)[1])
+                if not self._running:
+                    if not PxLApi.apiSuccess(self.lastError):
+                        raise PxLApi.ApiError(self.lastError, "getNextNumPyFrame")
+                    return None
+                remaining = None if None == deadline else deadline - time.monotonic()
+                if None != remaining and remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+
+    def next(self, timeout=None):
+        """
+        Returns the (frame, frameDesc) of the oldest frame not handed out yet, waiting for at most
+        timeout seconds for one to arrive. Returns None on a timeout, and raises PxLApi.ApiError if the
+        acquisition ended because of an error and all frames were read.
+        """
+        return self._read(min, timeout)
+
+    def latest(self, timeout=None):
+        """
+        Returns the (frame, frameDesc) of the most recent frame, skipping any frames not read yet. If
+        there are no new frames, waits for at most timeout seconds for one to arrive. Returns None on a
+        timeout, and raises PxLApi.ApiError just like next does.
+        """
+        return self._read(max, timeout)
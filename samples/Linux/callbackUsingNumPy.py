@@ -52,53 +52,30 @@ def get_pixel_format_as_string(dataFormat):
         }
     return switcher.get(dataFormat, "Unknown data format")
 
-"""
-Creates a NumPy 2D array representation of a byte pointer used the the Pixelink API.
-    frameData: Byte pointer to the image provided by the Pixelink API
-    width:     Width of the image (in pixels)
-    height:    Height of the image (in pixels)
-    bytesPerPixel: the number of bytes per pixel
-""" 
-def numPy_image (frameData, width, height, bytesPerPixel):
-    buffer_from_memory = pythonapi.PyMemoryView_FromMemory
-    buffer_from_memory.restype = py_object
-    pBuffer = buffer_from_memory(frameData, width * height * bytesPerPixel, 0x200) # 0x200 == writable
-    return np.frombuffer(pBuffer, np.uint8).reshape(height, width * bytesPerPixel)
-   
 """
 Callback function called by the API just before an image is displayed in the preview window. 
+The @PxLApi.numPyFrameCallback decorator hands it the image as a NumPy array, shaped and typed 
+for the pixel format, that can be modified in place.
 N.B. This is called by the API on a thread created in the API.
 """
-@PxLApi._dataProcessFunction
-def callback_format_preview(hCamera, frameData, dataFormat, frameDesc, userData):
-    # Copy frame descriptor information
-    frameDescriptor = frameDesc.contents
-    # Find image dimensions
-    width = int(frameDescriptor.Roi.fWidth / frameDescriptor.PixelAddressingValue.fHorizontal)
-    height = int(frameDescriptor.Roi.fHeight / frameDescriptor.PixelAddressingValue.fVertical)
-    bytesPerPixel = PxLApi.getBytesPerPixel(dataFormat)
-
-
-    # Recast the returned image as a NumPy 2-Darray, that we can modify
-    npFrame = numPy_image (frameData, width, height, bytesPerPixel)
-
-    print("callback_format_image: hCamera = {0}, frameData = {1}".format(hex(hCamera),
-                                                                         hex(id(frameData))))
-    print("    dataFormat = {0} {1}, FrameDesc = {2}".format(dataFormat,
-                                                             get_pixel_format_as_string(dataFormat),
-                                                             hex(id(frameDesc))))
+@PxLApi.numPyFrameCallback
+def callback_format_preview(hCamera, npFrame, dataFormat, frameDesc, userData):
+    height = npFrame.shape[0]
+    width = npFrame.shape[1]
+
+    print("callback_format_image: hCamera = {0}, frame = {1} {2}".format(hex(hCamera), npFrame.shape, npFrame.dtype))
+    print("    dataFormat = {0} {1}, FrameNumber = {2}".format(dataFormat, get_pixel_format_as_string(dataFormat),
+                                                           frameDesc.uFrameNumber))
     print("    userData = {0}, threadId = {1}".format(hex(userData), hex(id(threading.current_thread()))))
-    print("    imageData = {0} {1} {2} {3} {4} {5} {6} {7}\n".format(hex(frameData[0]), hex(frameData[1]), hex(frameData[2]),
-                                                                   hex(frameData[3]), hex(frameData[4]), hex(frameData[5]),
-                                                                   hex(frameData[6]), hex(frameData[7])))
+    print("    imageData = {0}\n".format(" ".join(hex(value) for value in npFrame.reshape(-1)[:8])))
     
     # Just to see the effect of the callback, increase intensity of the middle 20% of the pixels, to 100%
     startRow = int((height/5)*2)
     endRow = int((height/5)*3)
-    startCol = int(((width*bytesPerPixel)/5)*2)
-    endCol = int(((width*bytesPerPixel)/5)*3)
+    startCol = int((width/5)*2)
+    endCol = int((width/5)*3)
 
-    npFrame[startRow:endRow,startCol:endCol] = 0xff
+    npFrame[startRow:endRow,startCol:endCol] = np.iinfo(npFrame.dtype).max
 
     return 0
 
@@ -88,13 +88,14 @@ def effective_frame_rate(hCamera):
     frameRateFeature = PxLApi.FeatureId.FRAME_RATE
 
     # Step 1
-    # Determine if the camera supports PxLApi.FeatureId.ACTUAL_FRAME_RATE
-    ret = PxLApi.getCameraFeatures(hCamera, PxLApi.FeatureId.ACTUAL_FRAME_RATE)
+    # Determine if the camera supports PxLApi.FeatureId.ACTUAL_FRAME_RATE. The feature catalog of
+    # the camera is only read once, so asking again costs nothing.
+    ret = getFeatureCatalog(hCamera)
     if PxLApi.apiSuccess(ret[0]):
         # Step 2
         # Get the 'best available' frame rate of the camera
-        cameraFeatures = ret[1]
-        if cameraFeatures.Features[0].uFlags & PxLApi.FeatureFlags.PRESENCE:
+        featureCatalog = ret[1]
+        if featureCatalog.supports(PxLApi.FeatureId.ACTUAL_FRAME_RATE):
             frameRateFeature = PxLApi.FeatureId.ACTUAL_FRAME_RATE
         
     ret = PxLApi.getFeature(hCamera, frameRateFeature)
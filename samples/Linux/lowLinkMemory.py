@@ -50,10 +50,10 @@ def main():
     if PxLApi.apiSuccess(ret[0]):
         hCamera = ret[1]
 
-        ret = PxLApi.getCameraFeatures(hCamera, PxLApi.FeatureId.FRAME_RATE)
+        ret = getFeatureCatalog(hCamera)
         if PxLApi.apiSuccess(ret[0]):
-            cameraFeatures = ret[1]
-            minFrameRate = cameraFeatures.Features[0].Params[0].fMinValue
+            featureCatalog = ret[1]
+            minFrameRate = featureCatalog.range(PxLApi.FeatureId.FRAME_RATE)[0]
             
             ret = PxLApi.getFeature(hCamera, PxLApi.FeatureId.FRAME_RATE)
             if not PxLApi.apiSuccess(ret[0]):
@@ -2,7 +2,8 @@
 measureCallbackRate.py
 
 Sample code to show how to create a simple callback. This program simply
-calculates the frame rate of the camera (via callbacks).
+calculates the frame rate of the camera (via callbacks), using the statistics
+that setCallback records into a CallbackStats.
 """
 
 from pixelinkWrapper import*
@@ -15,9 +16,6 @@ import termios
 
 @PxLApi._dataProcessFunction
 def simple_callback(hCamera, frameData, dataFormat, frameDesc, userData):
-
-    global gCallbackCount
-    gCallbackCount += 1
     
     return 0
 
@@ -33,7 +31,8 @@ def main():
 
     hCamera = ret[1]
 
-    ret = PxLApi.setCallback(hCamera, PxLApi.Callback.FRAME, None, simple_callback)
+    stats = CallbackStats()
+    ret = PxLApi.setCallback(hCamera, PxLApi.Callback.FRAME, None, simple_callback, stats=stats)
     if PxLApi.apiSuccess(ret[0]):
         ret = PxLApi.setStreamState(hCamera,PxLApi.StreamState.START)
         if PxLApi.apiSuccess(ret[0]):
@@ -41,11 +40,13 @@ def main():
             print("Counting the number of images over a 20 second period...")
 
             time.sleep(20) # Delay 20 seconds
-            callbackCount = gCallbackCount
+            callbackCount = stats.callbacks
 
             PxLApi.setStreamState(hCamera,PxLApi.StreamState.STOP)
             PxLApi.setCallback(hCamera, PxLApi.Callback.FRAME, None, None) # Remove the callback
             print("    Received %i frames, or %8.2f frames/second" % (callbackCount, (float)(callbackCount/20.0)))
+            print("    Lost %i frames; callbacks took %s us (median), frames arrived %s us (median) after their timestamp" %
+                  (stats.framesLost, stats.callbackTime.percentile(50), stats.latency.percentile(50)))
             print("Press any key to exit")
 
             setUnbufKb(True)
@@ -80,5 +81,4 @@ def kbHit():
 
 
 if __name__ == "__main__":
-    gCallbackCount = 0 # Careful -- this global is not protected by a mutex
     main()
\ No newline at end of file
@@ -28,10 +28,6 @@ def main():
 
     getNextFramesPerItteration = 1
 
-    # Just going to declare a very large buffer here
-    # One that's large enough for any PixeLINK 4.0 camera
-    frame = create_string_buffer(5000 * 5000 * 2)
-
     sys.stdin.flush()
 
     ret = PxLApi.initialize(0)
@@ -41,6 +37,15 @@ def main():
 
     hCamera = ret[1]
 
+    # A frame buffer of exactly the size of the frames the camera currently delivers
+    try:
+        framePool = FramePool(hCamera, count=1)
+    except PxLApi.ApiError as e:
+        print("Could not determine the frame size! rc = %i" % e.rc)
+        PxLApi.uninitialize(hCamera)
+        return 1
+    frame = framePool.acquire()
+
     ret = PxLApi.setStreamState(hCamera, PxLApi.StreamState.START)
     if not(PxLApi.apiSuccess(ret[0])):
         print("Could not stream the camera! rc = %i" % ret[0])
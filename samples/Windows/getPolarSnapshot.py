@@ -28,17 +28,15 @@ def is_polar_camera(hCamera):
 
     assert 0 != hCamera
 
-    # Read the polar weightings feature information
-    ret = PxLApi.getCameraFeatures(hCamera, PxLApi.FeatureId.POLAR_WEIGHTINGS)
+    isSupported = False
+
+    # Read the feature information of the camera (only once; the feature catalog is kept)
+    ret = getFeatureCatalog(hCamera)
     if PxLApi.apiSuccess(ret[0]):
-        cameraFeatures = ret[1]
-        
-        # Do a few sanity checks
-        assert 1 == cameraFeatures.uNumberOfFeatures                                # We only asked about one feature...
-        assert PxLApi.FeatureId.POLAR_WEIGHTINGS == cameraFeatures.Features[0].uFeatureId    # ... and that feature is polar weightings
+        featureCatalog = ret[1]
         
         # Is the polar weightings feature supported?
-        isSupported = ((cameraFeatures.Features[0].uFlags & PxLApi.FeatureFlags.PRESENCE) != 0)
+        isSupported = featureCatalog.supports(PxLApi.FeatureId.POLAR_WEIGHTINGS)
     
     return isSupported
 
@@ -103,25 +103,14 @@ def main():
         # Convert it to a formatedImage. Note that frame can be in any one of a large number of pixel
         # formats, so we will simplify things by converting all mono to mono8, and all color to rgb24
         if PT_MONO == pixelType:
-            ret = PxLApi.formatImage(rawFrame, frameDesc, PxLApi.ImageFormat.RAW_MONO8)
+            ret = PxLApi.formatToArray(rawFrame, frameDesc, PxLApi.ImageFormat.RAW_MONO8)
         else:
-            ret = PxLApi.formatImage(rawFrame, frameDesc, PxLApi.ImageFormat.RAW_BGR24)
+            ret = PxLApi.formatToArray(rawFrame, frameDesc, PxLApi.ImageFormat.RAW_BGR24)
         if PxLApi.apiSuccess(ret[0]):
-            formatedImage = ret[1]
-            
             # Step 4
-            # 'convert' the formatedImage buffer to a numpy ndarray that OpenCV can manipulate
-            npFormatedImage = numpy.full_like(formatedImage, formatedImage, order="C") # a numpy ndarray
-            npFormatedImage.dtype = numpy.uint8
-            # Reshape the numpy ndarray into multidimensional array
-            imageHeight = int(frameDesc.Roi.fHeight)
-            imageWidth = int(frameDesc.Roi.fWidth)
-            # color has 3 channels, mono just 1
-            if PT_MONO == pixelType:
-                newShape = (imageHeight, imageWidth)
-            else:
-                newShape = (imageHeight, imageWidth, 3)
-            npFormatedImage = numpy.reshape(npFormatedImage, newShape)
+            # formatToArray returns a numpy ndarray that OpenCV can manipulate, already shaped as 
+            # (height, width) for mono, and as (height, width, 3) for color
+            npFormatedImage = ret[1]
 
             # Step 5
             # Do OpenCV manipulations on the numpy ndarray here.
@@ -156,10 +156,10 @@ setup(
     #
     # Similar to `install_requires` above, these must be valid existing
     # projects.
-    # extras_require={  # Optional
-        # 'dev': ['check-manifest'],
-        # 'test': ['coverage'],
-    # },
+    extras_require={  # Optional
+        'numpy': ['numpy'],
+        'numba': ['numpy', 'numba'],
+    },
 
     # If there are data files included in your packages that need to be
     # installed, specify them here.
@@ -189,6 +189,11 @@ setup(
     #         'sample=sample:main',
     #     ],
     # },
+    entry_points={  # Optional
+        'console_scripts': [
+            'pixelinkBench=pixelinkWrapper.bench:main',
+        ],
+    },
 
     # List additional URLs that are relevant to your project as a dict.
     #
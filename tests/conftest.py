@@ -0,0 +1,61 @@
+"""
+Fixtures that run the wrapper against the simulated Pixelink API library, so that the tests need
+no camera.
+"""
+
+import numpy
+import pytest
+from pixelinkWrapper import PxLApi, SimulatedApi, SimulatedCamera
+
+
+@pytest.fixture
+def simulatedCamera(request):
+    """
+    An unthrottled simulated camera, selected as the API backend for the duration of a test. Tests
+    can pass other SimulatedCamera arguments through indirect parametrization:
+        @pytest.mark.parametrize("simulatedCamera", [{"previewFormat": PxLApi.PixelFormat.RGB24}], indirect=True)
+    """
+    arguments = dict(sensorWidth=64, sensorHeight=48, frameRate=0)
+    arguments.update(getattr(request, "param", {}))
+    camera = SimulatedCamera(**arguments)
+    PxLApi.setApiBackend(SimulatedApi([camera]))
+    yield camera
+    PxLApi.setApiBackend(None)
+
+
+@pytest.fixture
+def hCamera(simulatedCamera):
+    """
+    The handle of the simulated camera, initialized for the duration of a test.
+    """
+    ret = PxLApi.initialize(0)
+    assert PxLApi.apiSuccess(ret[0])
+    yield ret[1]
+    PxLApi.uninitialize(ret[1])
+
+
+@pytest.fixture
+def streamingCamera(hCamera):
+    """
+    The handle of the simulated camera, streaming for the duration of a test.
+    """
+    ret = PxLApi.setStreamState(hCamera, PxLApi.StreamState.START)
+    assert PxLApi.apiSuccess(ret[0])
+    yield hCamera
+    PxLApi.setStreamState(hCamera, PxLApi.StreamState.STOP)
+
+
+@pytest.fixture
+def expectedFrame(simulatedCamera):
+    """
+    A function that returns the frame frameNumber of the simulated camera as a uint8 NumPy array of
+    the shape shape (by default, that of a MONO8 frame).
+    """
+    def expectedFrame(frameNumber, shape=None):
+        if None == shape:
+            width, height = simulatedCamera.frameGeometry()[:2]
+            shape = (height, width)
+        frameData = simulatedCamera.frameData(frameNumber, int(numpy.prod(shape)))
+        return numpy.frombuffer(frameData, numpy.uint8).reshape(shape)
+
+    return expectedFrame
@@ -0,0 +1,140 @@
+import os
+import pytest
+import subprocess
+import sys
+from pixelinkWrapper import PxLApi
+from pixelinkWrapper import pixelink
+
+linuxOnly = pytest.mark.skipif(os.name == 'nt', reason="Linux library version lookup")
+
+
+class _FakeLibrary:
+    _handle = 0x1234
+
+    def __init__(self):
+        def PxLInitialize(*args):
+            return PxLApi.ReturnCode.ApiSuccess
+        self.PxLInitialize = PxLInitialize
+
+
+@pytest.fixture
+def fakeLibrary(monkeypatch):
+    """
+    Makes the API loader load a fake library, and records the libraries loaded and the version checks.
+    """
+    loads = []
+    checks = []
+
+    def loadLibrary(name):
+        loads.append(name)
+        return _FakeLibrary()
+
+    monkeypatch.setattr(pixelink, "CDLL", loadLibrary)
+    monkeypatch.setattr(pixelink, "WinDLL", loadLibrary, raising=False)
+    monkeypatch.setattr(PxLApi, "_checkApiVersion", lambda library: checks.append(library) or "4.2.2.11")
+    monkeypatch.delenv("PIXELINK_SKIP_VERSION_CHECK", raising=False)
+    return loads, checks
+
+
+def test_noLibraryLoadedAtImport():
+    script = ("import os, sys\n"
+              "from pixelinkWrapper import PxLApi\n"
+              "maps = open('/proc/self/maps').read() if os.path.exists('/proc/self/maps') else ''\n"
+              "sys.exit(0 if None == PxLApi._Api._library and 'libPxLApi' not in maps else 1)\n")
+    projectPath = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    environment = dict(os.environ, PYTHONPATH=projectPath)
+    assert 0 == subprocess.call([sys.executable, "-c", script], env=environment)
+
+
+def test_loadedOnceOnFirstCall(fakeLibrary):
+    loads, checks = fakeLibrary
+    loader = PxLApi._ApiLoader()
+    assert [] == loads
+    assert PxLApi.ReturnCode.ApiSuccess == loader.PxLInitialize(0, None)
+    assert PxLApi.ReturnCode.ApiSuccess == loader.PxLInitialize(0, None)
+    assert [PxLApi._apiLibraryName] == loads
+    assert 1 == len(checks)
+    assert "4.2.2.11" == loader._curApiVersion
+
+
+@pytest.mark.parametrize("skipVersionCheck, checked", [("1", False), ("yes", False), ("0", True), ("", True)])
+def test_skipVersionCheck(fakeLibrary, monkeypatch, skipVersionCheck, checked):
+    loads, checks = fakeLibrary
+    monkeypatch.setenv("PIXELINK_SKIP_VERSION_CHECK", skipVersionCheck)
+    PxLApi._ApiLoader().PxLInitialize
+    assert checked == (1 == len(checks))
+
+
+def test_oldVersionWarning(monkeypatch, capsys):
+    monkeypatch.setattr(PxLApi, "_getLinuxApiVersion", lambda library: "4.1.0.0")
+    monkeypatch.setattr(PxLApi, "_getWindowsApiVersion", lambda library: "4.1.0.0")
+    assert "4.1.0.0" == PxLApi._checkApiVersion(_FakeLibrary())
+    assert "WARNING" in capsys.readouterr().out
+    monkeypatch.setattr(PxLApi, "_getLinuxApiVersion", lambda library: None)
+    monkeypatch.setattr(PxLApi, "_getWindowsApiVersion", lambda library: None)
+    assert None == PxLApi._checkApiVersion(_FakeLibrary())
+
+
+@pytest.fixture
+def versionedLibrary(tmp_path, monkeypatch):
+    """
+    A libPxLApi.so soname symbolic link to a versioned library file, the only one to be found.
+    """
+    monkeypatch.delenv("PIXELINK_SDK_LIB", raising=False)
+    versioned = tmp_path / "libPxLApi.so.4.2.5.7"
+    versioned.write_bytes(b"")
+    soname = tmp_path / "libPxLApi.so.4"
+    soname.symlink_to(versioned)
+    return str(soname)
+
+
+class _FakeLibc:
+    def __init__(self, dlinfo):
+        if None != dlinfo:
+            self.dlinfo = dlinfo
+
+
+def _mapsOpener(lines):
+    def openMaps(fileName, *args):
+        assert "/proc/self/maps" == fileName
+        import io
+        return io.StringIO("".join(line + "\n" for line in lines))
+    return openMaps
+
+
+@linuxOnly
+def test_versionFromDlinfo(monkeypatch, versionedLibrary):
+    def dlinfo(handle, request, pLinkMap):
+        linkMapPointer = pLinkMap._obj
+        dlinfo.linkMap = linkMapPointer._type_(None, versionedLibrary.encode())
+        linkMapPointer.contents = dlinfo.linkMap
+        return 0
+
+    monkeypatch.setattr(pixelink, "CDLL", lambda name: _FakeLibc(dlinfo))
+    monkeypatch.setattr(pixelink, "open", _mapsOpener([]), raising=False)
+    assert "4.2.5.7" == PxLApi._getLinuxApiVersion(_FakeLibrary())
+
+
+@linuxOnly
+@pytest.mark.parametrize("dlinfo", [None, lambda handle, request, pLinkMap: -1])
+def test_versionFromProcMaps(monkeypatch, versionedLibrary, dlinfo):
+    # Without dlinfo, or when it fails, the library is found among the mappings of the process
+    maps = ["7f0000000000-7f0000001000 r-xp 00000000 08:01 1234 /usr/lib/libc.so.6",
+            "7f0000002000-7f0000003000 r-xp 00000000 08:01 5678 " + versionedLibrary]
+    monkeypatch.setattr(pixelink, "CDLL", lambda name: _FakeLibc(dlinfo))
+    monkeypatch.setattr(pixelink, "open", _mapsOpener(maps), raising=False)
+    assert "4.2.5.7" == PxLApi._getLinuxApiVersion(_FakeLibrary())
+
+
+@linuxOnly
+def test_versionFromSdkLibraries(monkeypatch, tmp_path):
+    # An unversioned library, so the version comes from the versioned file in $PIXELINK_SDK_LIB
+    unversioned = tmp_path / "libPxLApi.so"
+    unversioned.write_bytes(b"")
+    (tmp_path / "libPxLApi.so.4.2.6.1").write_bytes(b"")
+    monkeypatch.setattr(pixelink, "CDLL", lambda name: _FakeLibc(None))
+    monkeypatch.setattr(pixelink, "open", _mapsOpener(["0-1 r-xp 0 0:0 0 " + str(unversioned)]), raising=False)
+    monkeypatch.setenv("PIXELINK_SDK_LIB", str(tmp_path))
+    assert "4.2.6.1" == PxLApi._getLinuxApiVersion(_FakeLibrary())
+    monkeypatch.delenv("PIXELINK_SDK_LIB")
+    assert None == PxLApi._getLinuxApiVersion(_FakeLibrary())
@@ -0,0 +1,30 @@
+import asyncio
+from pixelinkWrapper import PxLApi, AsyncCamera
+
+
+def test_framesInOrder(hCamera, monkeypatch):
+    created = []
+    createFrameDesc = PxLApi.createFrameDesc
+    monkeypatch.setattr(PxLApi, "createFrameDesc", lambda: created.append(1) or createFrameDesc())
+
+    async def read():
+        frameNumbers = []
+        async with AsyncCamera(hCamera, maxQueued=2) as camera:
+            for i in range(20):
+                frame, frameDesc = await camera.nextFrame()
+                frameNumbers.append(frameDesc.u64FrameNumber)
+        return frameNumbers
+
+    frameNumbers = asyncio.run(read())
+    assert frameNumbers == sorted(frameNumbers)
+    assert len(created) <= 4 # One per pooled frame
+
+
+def test_events(hCamera, simulatedCamera):
+    async def read():
+        async with AsyncCamera(hCamera, eventId=PxLApi.EventId.ANY) as camera:
+            await asyncio.sleep(0.01)
+            simulatedCamera.raiseEvent(PxLApi.EventId.FRAMES_SKIPPED)
+            return await asyncio.wait_for(camera.nextEvent(), 5)
+
+    assert PxLApi.EventId.FRAMES_SKIPPED == asyncio.run(read()).eventId
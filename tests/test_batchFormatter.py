@@ -0,0 +1,102 @@
+import ctypes
+import random
+import threading
+import time
+import numpy
+import pytest
+from pixelinkWrapper import PxLApi, BatchFormatter
+
+
+@pytest.fixture
+def frames(streamingCamera):
+    """
+    A burst of frames of the simulated camera, as (frame, frameDesc) tuples; every other frame is a
+    ctypes buffer rather than a NumPy array.
+    """
+    frames = []
+    for i in range(12):
+        npFrame = numpy.zeros((48, 64), numpy.uint8)
+        ret = PxLApi.getNextNumPyFrame(streamingCamera, npFrame)
+        assert PxLApi.apiSuccess(ret[0])
+        if i % 2:
+            frame = PxLApi.createByteAlignedBuffer(npFrame.nbytes, 64)
+            ctypes.memmove(frame, npFrame.ctypes.data, npFrame.nbytes)
+            frames.append((frame, ret[1]))
+        else:
+            frames.append((npFrame, ret[1]))
+    return frames
+
+
+@pytest.fixture
+def slowFormat(simulatedCamera, monkeypatch):
+    """
+    Makes formatting take a random time, so that the frames are formatted out of order, and returns
+    the largest number of frames formatted at once.
+    """
+    api = PxLApi._Api
+    formatImage = api.PxLFormatImage
+    lock = threading.Lock()
+    active = [0]
+    maxActive = [0]
+    randomDelay = random.Random(1)
+
+    def slowFormatImage(*args):
+        with lock:
+            active[0] += 1
+            maxActive[0] = max(maxActive[0], active[0])
+            delay = randomDelay.uniform(0, 0.005)
+        time.sleep(delay)
+        try:
+            return formatImage(*args)
+        finally:
+            with lock:
+                active[0] -= 1
+
+    monkeypatch.setattr(api, "PxLFormatImage", slowFormatImage, raising=False)
+    return maxActive
+
+
+def frameData(frame):
+    return bytes(frame) if isinstance(frame, numpy.ndarray) else frame.raw
+
+
+def test_imagesInOrder(frames, slowFormat):
+    images = list(BatchFormatter(PxLApi.ImageFormat.RAW_MONO8, threads=4).format(frames))
+    assert len(frames) == len(images)
+    for (frame, frameDesc), ret in zip(frames, images):
+        assert PxLApi.apiSuccess(ret[0])
+        assert frameData(frame) == ret[1].raw
+    assert 1 < slowFormat[0] <= 4
+
+
+def test_pendingFramesAreBounded(frames, slowFormat):
+    received = [0]
+
+    def burst():
+        for index, frame in enumerate(frames):
+            # The frames still in progress when the next one is taken
+            assert index - received[0] <= 3
+            yield frame
+
+    for ret in BatchFormatter(PxLApi.ImageFormat.RAW_MONO8, threads=2, maxPending=3).format(burst()):
+        assert PxLApi.apiSuccess(ret[0])
+        received[0] += 1
+    assert len(frames) == received[0]
+
+
+def test_failedFrame(frames, tmp_path):
+    # The simulator does not format RGB24 frames
+    frameDesc = PxLApi.createFrameDesc()
+    ctypes.pointer(frameDesc)[0] = frames[5][1]
+    frameDesc.PixelFormat.fValue = PxLApi.PixelFormat.RGB24
+    frames[5] = (frames[5][0], frameDesc)
+    formatter = BatchFormatter(PxLApi.ImageFormat.RAW_MONO8, threads=3)
+    images = list(formatter.format(frames))
+    assert (PxLApi.ReturnCode.ApiNotSupportedError,) == images[5]
+    assert all(PxLApi.apiSuccess(ret[0]) for index, ret in enumerate(images) if 5 != index)
+
+    returnCodes = formatter.formatToFiles(frames, str(tmp_path / "frame{0:02d}.raw"))
+    assert PxLApi.ReturnCode.ApiNotSupportedError == returnCodes[5]
+    assert not (tmp_path / "frame05.raw").exists()
+    assert frameData(frames[6][0]) == (tmp_path / "frame06.raw").read_bytes()
+    assert len(frames) - 1 == len(list(tmp_path.iterdir()))
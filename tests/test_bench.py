@@ -0,0 +1,32 @@
+import json
+import pytest
+from pixelinkWrapper import PxLApi
+from pixelinkWrapper import bench
+
+
+@pytest.fixture
+def restoreApiBackend():
+    yield
+    PxLApi.setApiBackend(None)
+
+
+def test_simulatedBenchmarks(restoreApiBackend, capsys):
+    assert 0 == bench.main(["--simulate", "--duration", "0.05", "--json", "-"])
+    document = json.loads(capsys.readouterr().out)
+    assert "simulator" == document["backend"]
+    assert 1280 == document["camera"]["width"]
+    results = document["results"]
+    assert list(bench.benchmarks) == list(results)
+    # The simulator supports every benchmark
+    for name, result in results.items():
+        assert "error" not in result, name
+        assert "skipped" not in result, name
+        assert 0 < result["iterations"]
+    for name in ("unpack10", "unpack12"):
+        assert results[name]["compiled"] in (True, False)
+
+
+def test_unknownBenchmark(restoreApiBackend, capsys):
+    with pytest.raises(SystemExit):
+        bench.main(["--simulate", "getNothing"])
+    assert "unknown benchmark getNothing" in capsys.readouterr().err
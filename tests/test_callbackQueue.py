@@ -0,0 +1,71 @@
+import pytest
+import threading
+from pixelinkWrapper import PxLApi, CallbackQueue
+
+# A simulated mono camera whose PREVIEW callbacks get RGB24 frames, as with a real preview
+previewCamera = pytest.mark.parametrize("simulatedCamera", [{"previewFormat": PxLApi.PixelFormat.RGB24}], indirect=True)
+
+
+def test_framesInOrder(hCamera, expectedFrame):
+    with CallbackQueue(hCamera, maxQueued=3) as frameQueue:
+        lastFrameNumber = None
+        for i in range(20):
+            frame, frameDesc = frameQueue.get(timeout=5)
+            frameNumber = frameDesc.u64FrameNumber
+            if None != lastFrameNumber:
+                assert frameNumber > lastFrameNumber
+            lastFrameNumber = frameNumber
+            assert (expectedFrame(frameNumber) == frame).all()
+    assert 20 <= frameQueue.framesQueued
+
+
+def _previewFrames(hCamera, frameQueue, count):
+    frames = []
+    with frameQueue:
+        ret = PxLApi.setPreviewState(hCamera, PxLApi.PreviewState.START)
+        assert PxLApi.apiSuccess(ret[0])
+        try:
+            for i in range(count):
+                item = frameQueue.get(timeout=5)
+                assert None != item
+                frames.append((item[0].copy(), item[1].u64FrameNumber))
+        finally:
+            PxLApi.setPreviewState(hCamera, PxLApi.PreviewState.STOP)
+    return frames
+
+
+@previewCamera
+@pytest.mark.parametrize("dataFormat", [PxLApi.PixelFormat.RGB24, None])
+def test_previewFramesOfAnotherDataFormat(hCamera, expectedFrame, dataFormat):
+    frameQueue = CallbackQueue(hCamera, maxQueued=3, callbackType=PxLApi.Callback.PREVIEW, dataFormat=dataFormat)
+    for frame, frameNumber in _previewFrames(hCamera, frameQueue, 10):
+        assert (expectedFrame(frameNumber, (48, 64, 3)) == frame).all()
+    assert PxLApi.PixelFormat.RGB24 == frameQueue.dataFormat
+
+
+@previewCamera
+def test_callbackDoesNotCallApiOrAllocate(hCamera, monkeypatch):
+    threads = set()
+
+    def recording(function):
+        def recordingFunction(*args):
+            threads.add(threading.current_thread().name)
+            return function(*args)
+        return recordingFunction
+
+    monkeypatch.setattr(PxLApi, "getFeature", recording(PxLApi.getFeature))
+    monkeypatch.setattr(PxLApi, "createFrameDesc", recording(PxLApi.createFrameDesc))
+    frameQueue = CallbackQueue(hCamera, maxQueued=2, callbackType=PxLApi.Callback.PREVIEW)
+    _previewFrames(hCamera, frameQueue, 5)
+    assert threading.current_thread().name in threads
+    assert "SimulatedCameraCallbacks" not in threads
+
+
+def test_stopEndsFrames(hCamera):
+    frameQueue = CallbackQueue(hCamera, maxQueued=2)
+    frameQueue.start()
+    assert None != frameQueue.get(timeout=5)
+    frameQueue.stop()
+    # At most all of the buffers of the pool were left queued
+    assert len(list(frameQueue.frames())) <= frameQueue.maxQueued + 1
+    assert None == frameQueue.get(timeout=0.1)
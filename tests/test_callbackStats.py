@@ -0,0 +1,124 @@
+import time
+import pytest
+from pixelinkWrapper import PxLApi, CallbackStats, Histogram
+
+
+def test_histogramBuckets():
+    histogram = Histogram(subBucketBits=5)
+    # Values below 32 have buckets of their own, then each power of 2 is split into 16 buckets
+    for value, index, highestValue in ((0, 0, 0), (31, 31, 31), (32, 32, 33), (33, 32, 33), (34, 33, 35),
+                                       (63, 47, 63), (64, 48, 67), (67, 48, 67), (68, 49, 71), (1 << 20, 272, (1 << 20) + (1 << 16) - 1)):
+        assert index == histogram._index(value)
+        assert highestValue == histogram._highestValue(index)
+    # The buckets are contiguous, and no wider than 1/16 of their values
+    for index in range(400):
+        highestValue = histogram._highestValue(index)
+        assert index == histogram._index(highestValue)
+        assert index + 1 == histogram._index(highestValue + 1)
+        if index >= 32:
+            lowestValue = histogram._highestValue(index - 1) + 1
+            assert highestValue - lowestValue + 1 <= lowestValue / 16
+
+
+def test_histogramPercentiles():
+    histogram = Histogram()
+    assert None == histogram.percentile(50)
+    assert None == histogram.mean()
+    for value in range(1, 101):
+        histogram.record(value)
+    histogram.record(-5) # Counted as 0
+    assert 101 == histogram.count
+    assert 0 == histogram.min
+    assert 100 == histogram.max
+    assert 0 == histogram.percentile(0)
+
+    def percentileOf(rank):
+        # The percentile of the rank-th smallest of the 101 values
+        return (rank - 0.5) * 100 / 101
+
+    assert 31 == histogram.percentile(percentileOf(32))
+    assert 51 == histogram.percentile(percentileOf(51)) # 50 shares its bucket with 51
+    assert 51 == histogram.percentile(percentileOf(52))
+    assert 53 == histogram.percentile(percentileOf(53))
+    assert 100 == histogram.percentile(100)
+    # Percentiles never go beyond the recorded values
+    histogram.reset()
+    histogram.record(1000)
+    assert 1000 == histogram.percentile(1)
+    assert 1000 == histogram.percentile(99)
+    summary = histogram.summary()
+    assert (1, 1000, 1000.0, 1000) == (summary["count"], summary["min"], summary["mean"], summary["p50"])
+
+
+def makeFrameDesc(frameNumber, frameTime):
+    frameDesc = PxLApi.createFrameDesc()
+    frameDesc.u64FrameNumber = frameNumber
+    frameDesc.dFrameTime = frameTime
+    return frameDesc
+
+
+def test_gapsAndLatency():
+    stats = CallbackStats()
+    stats._clockOffset = 100.0 # The host clock is 100 s ahead of the camera clock
+    for frameNumber in (1, 2, 3, 6, 7, 10):
+        frameTime = frameNumber * 0.01
+        start = 100.0 + frameTime + 0.002
+        stats._record(start, start + 0.0005, makeFrameDesc(frameNumber, frameTime))
+    assert 6 == stats.callbacks
+    assert 4 == stats.framesLost
+    assert 2 == stats.gaps
+    assert 6 == stats.latency.count
+    assert 1999 <= stats.latency.min <= stats.latency.max <= 2000
+    assert 499 <= stats.callbackTime.min <= stats.callbackTime.max <= 500
+    assert 5 == stats.interArrival.count
+    assert 9999 <= stats.interArrival.min <= 10000
+    assert 29999 <= stats.interArrival.max <= 30000
+    # The frames arrive as they were timestamped, however far apart
+    assert stats.jitter < 1
+    stats.reset()
+    assert (0, 0, 0, 0) == (stats.callbacks, stats.framesLost, stats.gaps, stats.latency.count)
+
+
+def test_jitter():
+    stats = CallbackStats()
+    start = 0.0
+    for frameNumber in range(1, 34):
+        # Frames 10 ms apart on the camera arrive 9 or 11 ms apart
+        start += 0.009 if frameNumber % 2 else 0.011
+        stats._record(start, start, makeFrameDesc(frameNumber, frameNumber * 0.01))
+    assert 1000 * (1 - (15 / 16) ** 32) == pytest.approx(stats.jitter, rel=1e-3)
+    assert 0 == stats.latency.count # Not calibrated
+
+
+def test_calibrationFailure(hCamera, simulatedCamera):
+    stats = CallbackStats()
+    assert PxLApi.apiSuccess(stats.calibrate(hCamera))
+    simulatedCamera.injectError("PxLGetCurrentTimestamp", PxLApi.ReturnCode.ApiNoCameraError)
+    assert PxLApi.ReturnCode.ApiNoCameraError == stats.calibrate(hCamera)
+    stats._record(1.0, 1.0, makeFrameDesc(1, 0.5))
+    assert 1 == stats.callbacks
+    assert 0 == stats.latency.count
+
+
+def test_setCallbackWithStats(streamingCamera):
+    stats = CallbackStats()
+    frameNumbers = []
+
+    def frameCallback(hCamera, frameData, dataFormat, frameDesc, userData):
+        frameNumbers.append(frameDesc.contents.u64FrameNumber)
+        return PxLApi.ReturnCode.ApiSuccess
+
+    ret = PxLApi.setCallback(streamingCamera, PxLApi.Callback.FRAME, None, frameCallback, stats=stats)
+    assert PxLApi.apiSuccess(ret[0])
+    deadline = time.monotonic() + 5
+    while len(frameNumbers) < 20 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    PxLApi.setCallback(streamingCamera, PxLApi.Callback.FRAME, None, None)
+    PxLApi.setStreamState(streamingCamera, PxLApi.StreamState.STOP)
+    assert 20 <= stats.callbacks == len(frameNumbers)
+    assert stats.callbacks == stats.callbackTime.count == stats.latency.count
+    assert stats.callbacks - 1 == stats.interArrival.count
+    assert frameNumbers[-1] - frameNumbers[0] + 1 - len(frameNumbers) == stats.framesLost
+    summary = stats.summary()
+    assert stats.callbacks == summary["callbacks"]
+    assert stats.latency.count == summary["latency"]["count"]
@@ -0,0 +1,121 @@
+import os
+import time
+import pytest
+from pixelinkWrapper import PxLApi, CompressedArchiveWriter, CompressedArchiveReader
+
+
+@pytest.fixture
+def compressingCamera(hCamera):
+    """
+    The handle of the simulated camera, streaming Pixelink10 compressed frames.
+    """
+    ret = PxLApi.setFeature(hCamera, PxLApi.FeatureId.COMPRESSION, PxLApi.FeatureFlags.MANUAL,
+                            [PxLApi.PixelFormat.MONO8, PxLApi.CompressionStrategy.PIXELINK10])
+    assert PxLApi.apiSuccess(ret[0])
+    assert PxLApi.apiSuccess(PxLApi.setStreamState(hCamera, PxLApi.StreamState.START)[0])
+    yield hCamera
+    PxLApi.setStreamState(hCamera, PxLApi.StreamState.STOP)
+
+
+@pytest.fixture
+def archive(compressingCamera, tmp_path):
+    """
+    The file name of a closed archive of the first 6 frames of the simulated camera.
+    """
+    fileName = str(tmp_path / "frames.pxlz")
+    frame = PxLApi.createByteAlignedBuffer(64 * 48, 64)
+    compressionDesc = PxLApi.createByteAlignedBuffer(PxLApi.CompressionDescSize.PIXELINK10, 64)
+    with CompressedArchiveWriter(fileName) as writer:
+        for i in range(6):
+            ret = PxLApi.getNextCompressedFrame(compressingCamera, frame, compressionDesc)
+            assert PxLApi.apiSuccess(ret[0])
+            writer.write(frame, ret[1], compressionDesc, ret[2])
+    assert 6 == writer.frameCount
+    return fileName
+
+
+def test_roundTrip(archive, expectedFrame):
+    for reopen in range(2):
+        with CompressedArchiveReader(archive) as reader:
+            assert 6 == len(reader)
+            frameNumbers = [frameDesc.u64FrameNumber for frame, frameDesc in reader]
+            assert list(range(frameNumbers[0], frameNumbers[0] + 6)) == frameNumbers
+            for frame, frameDesc in reader:
+                assert expectedFrame(frameDesc.u64FrameNumber).tobytes() == frame.raw
+    with CompressedArchiveReader(archive, useNumPy=True) as reader:
+        frame, frameDesc = reader[-1]
+        assert (48, 64) == frame.shape
+        assert (expectedFrame(frameDesc.u64FrameNumber) == frame).all()
+
+
+def test_framesAreDecompressedOnlyWhenRead(archive, monkeypatch):
+    api = PxLApi._Api
+    decompressed = []
+    decompressFrame = api.PxLDecompressFrame
+
+    def countedDecompressFrame(pSrcFrame, pSrcFrameDesc, pCompressionDesc, pDstFrame, pDstFrameSize):
+        if pDstFrame:
+            decompressed.append(pSrcFrameDesc._obj.u64FrameNumber)
+        return decompressFrame(pSrcFrame, pSrcFrameDesc, pCompressionDesc, pDstFrame, pDstFrameSize)
+
+    monkeypatch.setattr(api, "PxLDecompressFrame", countedDecompressFrame, raising=False)
+    with CompressedArchiveReader(archive) as reader:
+        frameNumbers = [reader.frameDesc(index).u64FrameNumber for index in range(len(reader))]
+        assert [] == decompressed
+        assert frameNumbers[3] == reader[3][1].u64FrameNumber
+        assert frameNumbers[5] == reader[-1][1].u64FrameNumber
+        assert [frameNumbers[3], frameNumbers[5]] == decompressed
+        with pytest.raises(IndexError):
+            reader[6]
+
+
+def test_truncatedArchive(archive, expectedFrame):
+    # Without its index, or with part of the last record missing, the complete records are still read
+    with open(archive, "rb") as file:
+        data = file.read()
+    indexSize = 6 * 8 + 20 # The offsets, and the trailer
+    headerSize = 12
+    for size, count in ((len(data) - 1, 6), (len(data) - indexSize, 6), (len(data) - indexSize - 1, 5), (headerSize, 0)):
+        with open(archive, "wb") as file:
+            file.write(data[:size])
+        with CompressedArchiveReader(archive) as reader:
+            assert count == len(reader)
+            for frame, frameDesc in reader:
+                assert expectedFrame(frameDesc.u64FrameNumber).tobytes() == frame.raw
+
+
+def test_corruptIndex(archive, expectedFrame):
+    with open(archive, "r+b") as file:
+        file.seek(-4, os.SEEK_END)
+        file.write(b"XXXX")
+    with CompressedArchiveReader(archive) as reader:
+        assert 6 == len(reader)
+        frame, frameDesc = reader[2]
+        assert expectedFrame(frameDesc.u64FrameNumber).tobytes() == frame.raw
+
+
+def test_notAnArchive(tmp_path):
+    fileName = str(tmp_path / "notAnArchive")
+    for data in (b"", b"PXL", b"RIFF" + bytes(64)):
+        with open(fileName, "wb") as file:
+            file.write(data)
+        with pytest.raises(ValueError):
+            CompressedArchiveReader(fileName)
+
+
+def test_compressedFrameCallback(compressingCamera, expectedFrame, tmp_path):
+    fileName = str(tmp_path / "callback.pxlz")
+    compressionInfo = PxLApi.CompressionInfoPixelink10()
+    with CompressedArchiveWriter(fileName) as writer:
+        ret = PxLApi.setCallback(compressingCamera, PxLApi.Callback.COMPRESSED_FRAME, compressionInfo,
+                                 writer.compressedFrameCallback)
+        assert PxLApi.apiSuccess(ret[0])
+        deadline = time.monotonic() + 5
+        while writer.frameCount < 4 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        PxLApi.setStreamState(compressingCamera, PxLApi.StreamState.STOP)
+        PxLApi.setCallback(compressingCamera, PxLApi.Callback.COMPRESSED_FRAME, compressionInfo, None)
+    with CompressedArchiveReader(fileName) as reader:
+        assert 4 <= len(reader)
+        for frame, frameDesc in reader:
+            assert expectedFrame(frameDesc.u64FrameNumber).tobytes() == frame.raw
@@ -0,0 +1,60 @@
+import pytest
+from pixelinkWrapper import PxLApi, DecompressionPipeline
+
+
+@pytest.fixture
+def compressingCamera(hCamera):
+    ret = PxLApi.setFeature(hCamera, PxLApi.FeatureId.COMPRESSION, PxLApi.FeatureFlags.MANUAL,
+                            [PxLApi.PixelFormat.MONO8, PxLApi.CompressionStrategy.PIXELINK10])
+    assert PxLApi.apiSuccess(ret[0])
+    return hCamera
+
+
+def test_framesInOrder(compressingCamera, expectedFrame, monkeypatch):
+    created = []
+    createFrameDesc = PxLApi.createFrameDesc
+    monkeypatch.setattr(PxLApi, "createFrameDesc", lambda: created.append(1) or createFrameDesc())
+    with DecompressionPipeline(compressingCamera, workers=3, maxPending=4) as pipeline:
+        lastFrameNumber = None
+        for i in range(40):
+            frame, frameDesc = pipeline.next(timeout=5)
+            frameNumber = frameDesc.u64FrameNumber
+            if None != lastFrameNumber:
+                assert frameNumber > lastFrameNumber
+            lastFrameNumber = frameNumber
+            assert (expectedFrame(frameNumber) == frame).all()
+    assert len(created) <= (3 + 1) + (4 + 2) # One per pooled buffer
+    assert 0 == pipeline.decompressionErrors
+
+
+def test_decompressionErrorsAreSkipped(compressingCamera, monkeypatch):
+    api = PxLApi._Api
+    failures = [PxLApi.ReturnCode.ApiDecompressionNotPossibleError] * 2
+    decompressFrame = api.PxLDecompressFrame
+
+    def failingDecompressFrame(*args):
+        if failures and args[3]:
+            return failures.pop()
+        return decompressFrame(*args)
+
+    monkeypatch.setattr(api, "PxLDecompressFrame", failingDecompressFrame, raising=False)
+    pipeline = DecompressionPipeline(compressingCamera, workers=1, maxPending=2)
+    pipeline.start()
+    for i in range(5):
+        assert None != pipeline.next(timeout=5)
+    pipeline.stop()
+    # A normal stop, after decompression errors, ends the frames without raising
+    while None != pipeline.next(timeout=5):
+        pass
+    assert 2 == pipeline.decompressionErrors
+    assert PxLApi.ReturnCode.ApiDecompressionNotPossibleError == pipeline.lastDecompressionError
+    assert PxLApi.apiSuccess(pipeline.lastError)
+
+
+def test_fatalErrorIsRaised(compressingCamera, simulatedCamera):
+    with DecompressionPipeline(compressingCamera, workers=2) as pipeline:
+        assert None != pipeline.next(timeout=5)
+        simulatedCamera.injectError("PxLGetNextCompressedFrame", PxLApi.ReturnCode.ApiNoCameraError)
+        with pytest.raises(PxLApi.ApiError):
+            while True:
+                pipeline.next(timeout=5)
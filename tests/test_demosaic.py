@@ -0,0 +1,102 @@
+import numpy
+import pytest
+from pixelinkWrapper import PxLApi, Demosaic, demosaic, demosaicFrame, getColorFilterArray
+
+
+cfas = {
+    PxLApi.ColorFilterArray.CFA_RGGB: "RGGB",
+    PxLApi.ColorFilterArray.CFA_GBRG: "GBRG",
+    PxLApi.ColorFilterArray.CFA_GRBG: "GRBG",
+    PxLApi.ColorFilterArray.CFA_BGGR: "BGGR",
+}
+methods = (Demosaic.BILINEAR, Demosaic.GRADIENT, Demosaic.HALF)
+
+
+def mosaic(cfa, colors, shape=(8, 12), dtype=numpy.uint8):
+    """
+    The raw frame of an image of a single RGB color, colors, for the color filter array cfa.
+    """
+    raw = numpy.empty(shape, dtype)
+    order = cfas[cfa]
+    for y in range(2):
+        for x in range(2):
+            raw[y::2, x::2] = colors["RGB".index(order[2 * y + x])]
+    return raw
+
+
+@pytest.mark.parametrize("cfa", cfas)
+@pytest.mark.parametrize("method", methods)
+@pytest.mark.parametrize("dtype", (numpy.uint8, numpy.uint16))
+def test_constantField(cfa, method, dtype):
+    maxValue = numpy.iinfo(dtype).max
+    for value in (0, 77, maxValue):
+        rgb = demosaic(numpy.full((8, 12), value, dtype), cfa, method=method)
+        assert dtype == rgb.dtype
+        assert (value == rgb).all()
+
+
+@pytest.mark.parametrize("cfa", cfas)
+@pytest.mark.parametrize("method", methods)
+@pytest.mark.parametrize("dtype", (numpy.uint8, numpy.uint16))
+def test_singleColor(cfa, method, dtype):
+    # Every method recovers the color of an image of a single color exactly, edges included
+    colors = (200, 40, 120) if numpy.uint8 == dtype else (50000, 1000, 30000)
+    rgb = demosaic(mosaic(cfa, colors, dtype=dtype), cfa, method=method)
+    assert (numpy.array(colors, dtype) == rgb).all()
+
+
+@pytest.mark.parametrize("cfa", cfas)
+def test_half(cfa):
+    raw = numpy.random.default_rng(1).integers(0, 256, (8, 12), numpy.uint8)
+    rgb = demosaic(raw, cfa, method=Demosaic.HALF)
+    assert (4, 6, 3) == rgb.shape
+    order = cfas[cfa]
+    planes = {}
+    for y in range(2):
+        for x in range(2):
+            planes.setdefault(order[2 * y + x], []).append(raw[y::2, x::2].astype(numpy.uint16))
+    assert (planes["R"][0] == rgb[:, :, 0]).all()
+    assert ((planes["G"][0] + planes["G"][1]) // 2 == rgb[:, :, 1]).all()
+    assert (planes["B"][0] == rgb[:, :, 2]).all()
+
+
+@pytest.mark.parametrize("method", methods)
+def test_out(method):
+    cfa = PxLApi.ColorFilterArray.CFA_GRBG
+    raw = mosaic(cfa, (10, 20, 30))
+    demosaicer = Demosaic(cfa, method)
+    out = numpy.zeros(demosaicer.outputShape(raw), numpy.uint8)
+    assert out is demosaicer(raw, out)
+    assert (numpy.array((10, 20, 30), numpy.uint8) == out).all()
+    with pytest.raises(ValueError):
+        demosaicer(raw, numpy.zeros((8, 12), numpy.uint8))
+
+
+@pytest.mark.parametrize("method", methods)
+def test_threads(method):
+    raw = numpy.random.default_rng(2).integers(0, 4096, (48, 64), numpy.uint16)
+    expected = demosaic(raw, PxLApi.ColorFilterArray.CFA_BGGR, method=method)
+    threaded = Demosaic(PxLApi.ColorFilterArray.CFA_BGGR, method, threads=3)
+    try:
+        for i in range(2):
+            assert (expected == threaded(raw)).all()
+    finally:
+        threaded.close()
+
+
+def test_invalidArguments():
+    with pytest.raises(ValueError):
+        Demosaic(PxLApi.ColorFilterArray.CFA_NONE)
+    with pytest.raises(ValueError):
+        demosaic(numpy.zeros((7, 12), numpy.uint8), PxLApi.ColorFilterArray.CFA_RGGB)
+    with pytest.raises(ValueError):
+        demosaic(numpy.zeros((8, 12, 3), numpy.uint8), PxLApi.ColorFilterArray.CFA_RGGB)
+
+
+def test_demosaicFrame():
+    assert PxLApi.ColorFilterArray.CFA_RGGB == getColorFilterArray(PxLApi.PixelFormat.BAYER12_RGGB_PACKED)
+    assert PxLApi.ColorFilterArray.CFA_NONE == getColorFilterArray(PxLApi.PixelFormat.MONO8)
+    frameDesc = PxLApi.createFrameDesc()
+    frameDesc.PixelFormat.fValue = PxLApi.PixelFormat.BAYER8_GBRG
+    rgb = demosaicFrame(mosaic(PxLApi.ColorFilterArray.CFA_GBRG, (1, 2, 3)), frameDesc)
+    assert (numpy.array((1, 2, 3), numpy.uint8) == rgb).all()
@@ -0,0 +1,61 @@
+import pytest
+from pixelinkWrapper import PxLApi, FeatureCatalog, getFeatureCatalog
+
+
+@pytest.fixture
+def featureReads(monkeypatch):
+    """
+    The number of calls to getCameraFeatures so far, as a one element list.
+    """
+    reads = [0]
+    getCameraFeatures = PxLApi.getCameraFeatures
+
+    def countingGetCameraFeatures(*args):
+        reads[0] += 1
+        return getCameraFeatures(*args)
+
+    monkeypatch.setattr(PxLApi, "getCameraFeatures", countingGetCameraFeatures)
+    return reads
+
+
+def test_featureInfo(hCamera):
+    catalog = FeatureCatalog(hCamera)
+    assert catalog.supports(PxLApi.FeatureId.FRAME_RATE)
+    assert (0.0, 10000.0) == catalog.range(PxLApi.FeatureId.FRAME_RATE)
+    assert None == catalog.range(PxLApi.FeatureId.FRAME_RATE, 1)
+    assert catalog.isReadOnly(PxLApi.FeatureId.ACTUAL_FRAME_RATE)
+    assert catalog.isSettableWhileStreaming(PxLApi.FeatureId.GAIN)
+    assert not catalog.isSettableWhileStreaming(PxLApi.FeatureId.ROI)
+    assert 4 == catalog.feature(PxLApi.FeatureId.ROI).numberOfParameters
+    assert all(info.isSupported() for info in catalog.features())
+
+
+def test_catalogReadOncePerConnection(hCamera, featureReads):
+    ret = getFeatureCatalog(hCamera)
+    assert PxLApi.apiSuccess(ret[0])
+    catalog = ret[1]
+    for i in range(3):
+        assert catalog is getFeatureCatalog(hCamera)[1]
+    assert 1 == featureReads[0]
+    assert catalog.isCurrent()
+
+
+def test_catalogInvalidatedByReconnection(hCamera, featureReads):
+    catalog = getFeatureCatalog(hCamera)[1]
+    assert PxLApi.apiSuccess(PxLApi.uninitialize(hCamera)[0])
+    assert not catalog.isCurrent()
+    ret = PxLApi.initialize(0)
+    assert PxLApi.apiSuccess(ret[0])
+    newCatalog = getFeatureCatalog(ret[1])[1]
+    assert newCatalog is not catalog
+    assert newCatalog.isCurrent()
+    assert 2 == featureReads[0]
+    PxLApi.uninitialize(ret[1])
+
+
+def test_catalogReadFailure(hCamera, simulatedCamera):
+    simulatedCamera.injectError("PxLGetCameraFeatures", PxLApi.ReturnCode.ApiNoCameraError)
+    assert (PxLApi.ReturnCode.ApiNoCameraError,) == getFeatureCatalog(hCamera)
+    with pytest.raises(PxLApi.ApiError):
+        simulatedCamera.injectError("PxLGetCameraFeatures", PxLApi.ReturnCode.ApiNoCameraError)
+        FeatureCatalog(hCamera)
@@ -0,0 +1,100 @@
+from ctypes import memmove
+import numpy
+import pytest
+from pixelinkWrapper import PxLApi
+
+
+@pytest.fixture
+def frame(streamingCamera):
+    """
+    A MONO8 frame of the simulated camera, as a NumPy array, and its frame descriptor.
+    """
+    npFrame = numpy.zeros((48, 64), numpy.uint8)
+    ret = PxLApi.getNextNumPyFrame(streamingCamera, npFrame)
+    assert PxLApi.apiSuccess(ret[0])
+    return npFrame, ret[1]
+
+
+def test_rawMono8(frame, expectedFrame):
+    npFrame, frameDesc = frame
+    ret = PxLApi.formatToArray(npFrame, frameDesc, PxLApi.ImageFormat.RAW_MONO8)
+    assert PxLApi.apiSuccess(ret[0])
+    assert (48, 64) == ret[1].shape
+    assert numpy.uint8 == ret[1].dtype
+    assert (expectedFrame(frameDesc.u64FrameNumber) == ret[1]).all()
+
+
+def test_rawRgb(frame):
+    npFrame, frameDesc = frame
+    ret = PxLApi.formatToArray(npFrame, frameDesc, PxLApi.ImageFormat.RAW_RGB24)
+    assert (48, 64, 3) == ret[1].shape
+    for channel in range(3):
+        assert (npFrame == ret[1][:, :, channel]).all()
+    ret = PxLApi.formatToArray(npFrame, frameDesc, PxLApi.ImageFormat.RAW_RGB48)
+    assert (48, 64, 3) == ret[1].shape
+    assert numpy.uint16 == ret[1].dtype
+    assert (npFrame.astype(numpy.uint16) << 8 == ret[1][:, :, 1]).all()
+
+
+def test_ctypesBuffer(frame):
+    npFrame, frameDesc = frame
+    buffer = PxLApi.createByteAlignedBuffer(npFrame.nbytes, 64)
+    buffer[:npFrame.nbytes] = npFrame.tobytes()
+    ret = PxLApi.formatToArray(buffer, frameDesc, PxLApi.ImageFormat.RAW_MONO8)
+    assert (npFrame == ret[1]).all()
+
+
+def test_dstArray(frame):
+    npFrame, frameDesc = frame
+    dstArray = numpy.empty(64 * 48 + 100, numpy.uint8)
+    ret = PxLApi.formatToArray(npFrame, frameDesc, PxLApi.ImageFormat.RAW_MONO8, dstArray)
+    assert PxLApi.apiSuccess(ret[0])
+    assert numpy.shares_memory(dstArray, ret[1])
+    assert (npFrame == ret[1]).all()
+    dstArray = numpy.empty((48, 64), numpy.uint8)
+    assert dstArray is PxLApi.formatToArray(npFrame, frameDesc, PxLApi.ImageFormat.RAW_MONO8, dstArray)[1]
+
+
+def test_reuseArray(frame):
+    npFrame, frameDesc = frame
+    first = PxLApi.formatToArray(npFrame, frameDesc, PxLApi.ImageFormat.RAW_MONO8, reuseArray=True)[1]
+    second = PxLApi.formatToArray(npFrame, frameDesc, PxLApi.ImageFormat.RAW_MONO8, reuseArray=True)[1]
+    assert numpy.shares_memory(first, second)
+    third = PxLApi.formatToArray(npFrame, frameDesc, PxLApi.ImageFormat.RAW_MONO8)[1]
+    assert not numpy.shares_memory(first, third)
+
+
+def test_invalidArguments(frame):
+    npFrame, frameDesc = frame
+    assert (PxLApi.ReturnCode.ApiBufferTooSmall,) == PxLApi.formatToArray(
+        npFrame, frameDesc, PxLApi.ImageFormat.RAW_MONO8, numpy.empty(64 * 48 - 1, numpy.uint8))
+    assert (PxLApi.ReturnCode.ApiInvalidParameterError,) == PxLApi.formatToArray(
+        npFrame, frameDesc, PxLApi.ImageFormat.RAW_MONO8, numpy.empty((48, 128), numpy.uint8)[:, ::2])
+    assert (PxLApi.ReturnCode.ApiInvalidParameterError,) == PxLApi.formatToArray(
+        numpy.empty((48, 128), numpy.uint8)[:, ::2], frameDesc, PxLApi.ImageFormat.RAW_MONO8)
+    for imageFormat in (PxLApi.ImageFormat.BMP, PxLApi.ImageFormat.PNG, PxLApi.ImageFormat.JPEG):
+        assert (PxLApi.ReturnCode.ApiInvalidParameterError,) == PxLApi.formatToArray(npFrame, frameDesc, imageFormat)
+
+
+def test_paddedRows(monkeypatch):
+    # A DIB image has its rows padded to a multiple of 4 bytes
+    width, height = 10, 4
+    rowSize = (width * 3 + 3) & ~3
+    image = numpy.zeros((height, rowSize), numpy.uint8)
+    image[:, :width * 3] = numpy.arange(width * 3 * height).reshape(height, -1)
+
+    class PaddingApi:
+        def PxLFormatImage(self, pSrcImage, pSrcFrameDesc, outputFormat, pDstImage, pDstImageSize):
+            if pDstImage:
+                memmove(pDstImage, image.tobytes(), image.nbytes)
+            pDstImageSize._obj.value = image.nbytes
+            return PxLApi.ReturnCode.ApiSuccess
+
+    monkeypatch.setattr(PxLApi, "_Api", PaddingApi())
+    frameDesc = PxLApi.createFrameDesc()
+    frameDesc.Roi.fWidth, frameDesc.Roi.fHeight = width, height
+    frameDesc.PixelAddressingValue.fHorizontal = frameDesc.PixelAddressingValue.fVertical = 1
+    ret = PxLApi.formatToArray(numpy.zeros((height, width), numpy.uint8), frameDesc, PxLApi.ImageFormat.RAW_RGB24_DIB)
+    assert PxLApi.apiSuccess(ret[0])
+    assert (height, width, 3) == ret[1].shape
+    assert (image[:, :width * 3].reshape(height, width, 3) == ret[1]).all()
@@ -0,0 +1,91 @@
+from ctypes import pointer, sizeof
+import numpy
+import pytest
+from pixelinkWrapper import PxLApi, FrameDescLog
+
+
+def makeFrameDesc(frameNumber):
+    frameDesc = PxLApi.createFrameDesc()
+    frameDesc.u64FrameNumber = frameNumber
+    frameDesc.uFrameNumber = frameNumber % 1000
+    frameDesc.dFrameTime = frameNumber / 100
+    frameDesc.Shutter.fValue = 0.001 * (frameNumber + 1)
+    frameDesc.Roi.fLeft = 8
+    frameDesc.Roi.fWidth = 64 + frameNumber
+    frameDesc.Roi.fHeight = 48
+    frameDesc.PixelFormat.fValue = PxLApi.PixelFormat.BAYER8_RGGB
+    return frameDesc
+
+
+@pytest.fixture
+def log():
+    """
+    A log of 10 descriptors, over 3 chunks of 4; the last one is a pointer, as given to a frame callback.
+    """
+    log = FrameDescLog(chunkSize=4)
+    for frameNumber in range(9):
+        log.append(makeFrameDesc(frameNumber))
+    log.append(pointer(makeFrameDesc(9)))
+    return log
+
+
+def checkLog(log):
+    assert 10 == len(log)
+    assert list(range(10)) == log.field("u64FrameNumber").tolist()
+    assert numpy.allclose(numpy.arange(10) / 100, log.field("dFrameTime"))
+    assert numpy.allclose(0.001 * numpy.arange(1, 11), log.field("Shutter.fValue"))
+    roi = log.field("Roi")
+    assert (64 + numpy.arange(10) == roi["fWidth"]).all()
+    assert (48 == roi["fHeight"]).all()
+    assert (8 == roi["fLeft"]).all()
+    assert (PxLApi.PixelFormat.BAYER8_RGGB == log.field("PixelFormat.fValue")).all()
+    for index in (0, 3, 4, 9, -1):
+        frameDesc = log.frameDesc(index)
+        assert isinstance(frameDesc, PxLApi._FrameDesc)
+        assert index % 10 == frameDesc.u64FrameNumber
+        assert 64 + index % 10 == frameDesc.Roi.fWidth
+        assert sizeof(frameDesc) == frameDesc.uSize
+    with pytest.raises(IndexError):
+        log.frameDesc(10)
+
+
+def test_fields(log):
+    checkLog(log)
+    frameDescs = log.frameDescs()
+    assert (10,) == frameDescs.shape
+    assert 6 == PxLApi._FrameDesc.from_buffer_copy(frameDescs[6].tobytes()).u64FrameNumber
+
+
+def test_save(log, tmp_path):
+    fileName = str(tmp_path / "frameDescs.npy")
+    log.save(fileName)
+    assert (log.frameDescs() == numpy.load(fileName)).all()
+    loaded = FrameDescLog.load(fileName, chunkSize=4)
+    checkLog(loaded)
+    # Descriptors appended to a loaded log go into chunks of their own
+    loaded.append(makeFrameDesc(10))
+    assert 11 == len(loaded)
+    assert 10 == loaded.field("u64FrameNumber")[-1]
+
+
+def test_saveRaw(log, tmp_path):
+    fileName = str(tmp_path / "frameDescs.raw")
+    log.saveRaw(fileName)
+    with open(fileName, "rb") as file:
+        assert 10 * sizeof(PxLApi._FrameDesc) == len(file.read())
+    checkLog(FrameDescLog.load(fileName, raw=True))
+
+
+def test_notALog(tmp_path):
+    fileName = str(tmp_path / "other.npy")
+    numpy.save(fileName, numpy.zeros(4))
+    with pytest.raises(ValueError):
+        FrameDescLog.load(fileName)
+
+
+def test_clear(log):
+    log.clear()
+    assert 0 == len(log)
+    assert (0,) == log.field("Shutter.fValue").shape
+    log.append(makeFrameDesc(3))
+    assert [3] == log.field("u64FrameNumber").tolist()
@@ -0,0 +1,58 @@
+import pytest
+from pixelinkWrapper import PxLApi, FrameGeometry, FramePool, getFrameGeometry
+
+
+def packedRowSize(width, bitsPerPixel):
+    return (width * bitsPerPixel + 7) // 8
+
+
+@pytest.mark.parametrize("pixelFormat, bitsPerPixel", [(PxLApi.PixelFormat.MONO12_PACKED, 12),
+                                                       (PxLApi.PixelFormat.MONO10_PACKED_MSFIRST, 10)])
+@pytest.mark.parametrize("width", [4, 5, 7, 8])
+def test_packedRowSize(pixelFormat, bitsPerPixel, width):
+    geometry = FrameGeometry(width, 3, pixelFormat, False)
+    assert packedRowSize(width, bitsPerPixel) == geometry.rowSize()
+    assert 3 * packedRowSize(width, bitsPerPixel) == geometry.frameSize()
+
+
+def test_geometry(hCamera):
+    ret = getFrameGeometry(hCamera)
+    assert PxLApi.apiSuccess(ret[0])
+    assert FrameGeometry(64, 48, PxLApi.PixelFormat.MONO8, False) == ret[1]
+    assert (48, 64) == ret[1].numPyShape()
+
+
+def test_poolResizes(hCamera):
+    framePool = FramePool(hCamera, count=2, useNumPy=True)
+    frame = framePool.acquire()
+    assert (48, 64) == frame.shape
+    framePool.release(frame)
+    assert PxLApi.apiSuccess(PxLApi.setFeature(hCamera, PxLApi.FeatureId.ROI, PxLApi.FeatureFlags.MANUAL,
+                                               [0, 0, 32, 16])[0])
+    frame = framePool.acquire()
+    assert (16, 32) == frame.shape
+
+
+def test_acquireTimesOut(hCamera):
+    framePool = FramePool(hCamera, count=1)
+    frame = framePool.acquire()
+    assert None == framePool.acquire(block=False)
+    assert None == framePool.acquire(timeout=0.01)
+    framePool.release(frame)
+    assert None != framePool.acquire(block=False)
+
+
+def test_frameDescs(hCamera):
+    framePool = FramePool(hCamera, count=2)
+    frames = [framePool.acquire(), framePool.acquire()]
+    frameDescs = [framePool.frameDesc(frame) for frame in frames]
+    assert frameDescs[0] is not frameDescs[1]
+    framePool.release(frames[0])
+    frame = framePool.acquire()
+    assert frame is frames[0]
+    assert frameDescs[0] is framePool.frameDesc(frame)
+    assert PxLApi.apiSuccess(PxLApi.setFeature(hCamera, PxLApi.FeatureId.ROI, PxLApi.FeatureFlags.MANUAL,
+                                               [0, 0, 32, 16])[0])
+    frame = framePool.acquire()
+    assert framePool.frameDesc(frame) not in frameDescs
+    assert framePool.frameDesc(frame) is framePool.frameDesc(frame)
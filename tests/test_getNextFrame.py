@@ -0,0 +1,39 @@
+import numpy
+import threading
+from pixelinkWrapper import PxLApi
+
+
+def test_newFrameDescByDefault(streamingCamera):
+    frame = PxLApi.createByteAlignedBuffer(64 * 48, 64)
+    first = PxLApi.getNextFrame(streamingCamera, frame)[1]
+    second = PxLApi.getNextFrame(streamingCamera, frame)[1]
+    assert first is not second
+    assert first.u64FrameNumber + 1 == second.u64FrameNumber
+
+
+def test_reuseFrameDesc(streamingCamera):
+    frame = PxLApi.createByteAlignedBuffer(64 * 48, 64)
+    npFrame = numpy.zeros((48, 64), numpy.uint8)
+    ret = PxLApi.getNextFrame(streamingCamera, frame, reuseFrameDesc=True)
+    frameDesc = ret[1]
+    for i in range(3):
+        ret = PxLApi.getNextFrame(streamingCamera, frame, reuseFrameDesc=True)
+        assert frameDesc is ret[1]
+        ret = PxLApi.getNextNumPyFrame(streamingCamera, npFrame, reuseFrameDesc=True)
+        assert frameDesc is ret[1]
+    assert 6 == frameDesc.u64FrameNumber
+    # Each thread has a frame descriptor of its own
+    otherFrameDescs = []
+    thread = threading.Thread(target=lambda: otherFrameDescs.append(
+        PxLApi.getNextFrame(streamingCamera, frame, reuseFrameDesc=True)[1]))
+    thread.start()
+    thread.join()
+    assert otherFrameDescs[0] is not frameDesc
+
+
+def test_frameDescPassedIn(streamingCamera):
+    frame = PxLApi.createByteAlignedBuffer(64 * 48, 64)
+    frameDesc = PxLApi._FrameDesc() # Without its size set
+    assert frameDesc is PxLApi.getNextFrame(streamingCamera, frame, frameDesc)[1]
+    assert frameDesc is PxLApi.getNextNumPyFrame(streamingCamera, numpy.zeros((48, 64), numpy.uint8), frameDesc)[1]
+    assert 1 == frameDesc.u64FrameNumber
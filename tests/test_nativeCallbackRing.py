@@ -0,0 +1,34 @@
+import pytest
+import time
+
+pytest.importorskip("numba")
+
+from pixelinkWrapper import PxLApi
+from pixelinkWrapper.nativeCallbackRing import NativeCallbackRing
+
+
+def test_framesInOrder(hCamera, expectedFrame):
+    with NativeCallbackRing(hCamera, count=4) as ring:
+        lastFrameNumber = None
+        for i in range(20):
+            frame, frameDesc = ring.next(timeout=5)
+            frameNumber = frameDesc.u64FrameNumber
+            if None != lastFrameNumber:
+                assert frameNumber > lastFrameNumber
+            lastFrameNumber = frameNumber
+            assert (expectedFrame(frameNumber) == frame).all()
+    assert 0 == ring.framesMismatched
+
+
+def test_heldSlotNotWritten(hCamera):
+    with NativeCallbackRing(hCamera, count=2) as ring:
+        frame, frameDesc = ring.next(timeout=5)
+        frameNumber = frameDesc.u64FrameNumber
+        pixels = frame.copy()
+        # The callback keeps running, and can only drop frames while the ring is full
+        deadline = time.monotonic() + 5
+        while ring.framesDropped < 10 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        assert 10 <= ring.framesDropped
+        assert frameNumber == frameDesc.u64FrameNumber
+        assert (pixels == frame).all()
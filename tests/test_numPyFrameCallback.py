@@ -0,0 +1,44 @@
+import pytest
+import threading
+from pixelinkWrapper import PxLApi
+
+
+def _callbackFrames(hCamera, callbackType, count):
+    frames = []
+    done = threading.Event()
+
+    @PxLApi.numPyFrameCallback
+    def frameCallback(hCamera, frame, dataFormat, frameDesc, userData):
+        if len(frames) < count:
+            frames.append((frame.copy(), frame.flags.writeable, dataFormat, frameDesc.u64FrameNumber))
+        else:
+            done.set()
+        return PxLApi.ReturnCode.ApiSuccess
+
+    assert PxLApi.apiSuccess(PxLApi.setCallback(hCamera, callbackType, 0, frameCallback)[0])
+    PxLApi.setStreamState(hCamera, PxLApi.StreamState.START)
+    if PxLApi.Callback.PREVIEW == callbackType:
+        PxLApi.setPreviewState(hCamera, PxLApi.PreviewState.START)
+    try:
+        assert done.wait(5)
+    finally:
+        PxLApi.setPreviewState(hCamera, PxLApi.PreviewState.STOP)
+        PxLApi.setStreamState(hCamera, PxLApi.StreamState.STOP)
+        PxLApi.setCallback(hCamera, callbackType, 0, None)
+    return frames
+
+
+def test_frameCallback(hCamera, expectedFrame):
+    for frame, writeable, dataFormat, frameNumber in _callbackFrames(hCamera, PxLApi.Callback.FRAME, 3):
+        assert writeable
+        assert PxLApi.PixelFormat.MONO8 == dataFormat
+        assert (expectedFrame(frameNumber) == frame).all()
+
+
+# The PREVIEW callbacks of a mono camera get RGB24 frames, as with a real preview
+@pytest.mark.parametrize("simulatedCamera", [{"previewFormat": PxLApi.PixelFormat.RGB24}], indirect=True)
+def test_previewCallbackOfAnotherDataFormat(hCamera, expectedFrame):
+    for frame, writeable, dataFormat, frameNumber in _callbackFrames(hCamera, PxLApi.Callback.PREVIEW, 3):
+        assert PxLApi.PixelFormat.RGB24 == dataFormat
+        assert (48, 64, 3) == frame.shape
+        assert (expectedFrame(frameNumber, (48, 64, 3)) == frame).all()
@@ -0,0 +1,108 @@
+import collections
+import numpy
+import pytest
+from pixelinkWrapper import PxLApi
+
+
+@pytest.fixture
+def apiCalls(simulatedCamera, monkeypatch):
+    """
+    Counts the calls of the native functions whose output sizes are cached, starting from an empty
+    cache.
+    """
+    monkeypatch.setattr(PxLApi, "_outputSizes", {})
+    calls = collections.Counter()
+    api = PxLApi._Api
+    for name in ("PxLFormatImage", "PxLDecompressFrame", "PxLGetCameraXML"):
+        def counted(*args, name=name, function=getattr(api, name)):
+            calls[name] += 1
+            return function(*args)
+        monkeypatch.setattr(api, name, counted, raising=False)
+    return calls
+
+
+def grabFrame(hCamera):
+    assert PxLApi.apiSuccess(PxLApi.setStreamState(hCamera, PxLApi.StreamState.START)[0])
+    frame = PxLApi.createByteAlignedBuffer(64 * 48, 64)
+    ret = PxLApi.getNextFrame(hCamera, frame)
+    PxLApi.setStreamState(hCamera, PxLApi.StreamState.STOP)
+    assert PxLApi.apiSuccess(ret[0])
+    return frame, ret[1]
+
+
+def setFeature(hCamera, featureId, params):
+    assert PxLApi.apiSuccess(PxLApi.setFeature(hCamera, featureId, PxLApi.FeatureFlags.MANUAL, params)[0])
+
+
+def test_formatImageProbesOncePerGeometry(hCamera, apiCalls):
+    frame, frameDesc = grabFrame(hCamera)
+    for i in range(3):
+        ret = PxLApi.formatImage(frame, frameDesc, PxLApi.ImageFormat.RAW_MONO8)
+        assert PxLApi.apiSuccess(ret[0])
+        assert 64 * 48 == len(ret[1])
+    assert 1 + 3 == apiCalls["PxLFormatImage"]
+    # Another ROI is another frame geometry, so its size is probed once more
+    setFeature(hCamera, PxLApi.FeatureId.ROI, [0, 0, 32, 16])
+    frame, frameDesc = grabFrame(hCamera)
+    npFrame = numpy.frombuffer(frame, numpy.uint8)[:32 * 16].reshape(16, 32).copy()
+    apiCalls.clear()
+    for i in range(3):
+        ret = PxLApi.formatNumPyImage(npFrame, frameDesc, PxLApi.ImageFormat.RAW_MONO8)
+        assert PxLApi.apiSuccess(ret[0])
+        assert 32 * 16 == len(ret[1])
+    assert 1 + 3 == apiCalls["PxLFormatImage"]
+
+
+def test_variableSizeFormatsAreNotCached(hCamera, apiCalls):
+    frame, frameDesc = grabFrame(hCamera)
+    for i in range(2):
+        ret = PxLApi.formatImage(frame, frameDesc, PxLApi.ImageFormat.PNG)
+        assert PxLApi.apiSuccess(ret[0])
+        assert ret[1].raw.startswith(b"\x89PNG")
+    assert 2 * 2 == apiCalls["PxLFormatImage"]
+    assert {} == PxLApi._outputSizes
+
+
+def test_tooSmallCachedSizeIsProbedOnce(hCamera, apiCalls, monkeypatch):
+    frame, frameDesc = grabFrame(hCamera)
+    key = (PxLApi._frameDescGeometryKey(frameDesc), PxLApi.ImageFormat.RAW_MONO8)
+    PxLApi._outputSizes[key] = 1
+    ret = PxLApi.formatImage(frame, frameDesc, PxLApi.ImageFormat.RAW_MONO8)
+    assert PxLApi.apiSuccess(ret[0])
+    assert 64 * 48 == PxLApi._outputSizes[key]
+    assert 1 + 1 + 1 == apiCalls["PxLFormatImage"] # Too small, probe, format
+    # A size that stays too small returns the error, after a single retry
+    api = PxLApi._Api
+    monkeypatch.setattr(api, "PxLFormatImage", lambda *args: PxLApi.ReturnCode.ApiBufferTooSmall if args[3]
+                        else api.__class__.PxLFormatImage(api, *args), raising=False)
+    ret = PxLApi.formatImage(frame, frameDesc, PxLApi.ImageFormat.RAW_MONO8)
+    assert (PxLApi.ReturnCode.ApiBufferTooSmall,) == ret
+    assert key not in PxLApi._outputSizes
+
+
+def test_decompressFrameSizeIsCached(hCamera, apiCalls):
+    setFeature(hCamera, PxLApi.FeatureId.COMPRESSION, [PxLApi.PixelFormat.MONO8, PxLApi.CompressionStrategy.PIXELINK10])
+    assert PxLApi.apiSuccess(PxLApi.setStreamState(hCamera, PxLApi.StreamState.START)[0])
+    frame = PxLApi.createByteAlignedBuffer(64 * 48, 64)
+    compressionDesc = PxLApi.createByteAlignedBuffer(PxLApi.CompressionDescSize.PIXELINK10, 64)
+    ret = PxLApi.getNextCompressedFrame(hCamera, frame, compressionDesc)
+    PxLApi.setStreamState(hCamera, PxLApi.StreamState.STOP)
+    assert PxLApi.apiSuccess(ret[0])
+    for i in range(3):
+        assert (PxLApi.ReturnCode.ApiSuccess, 64 * 48) == PxLApi.decompressFrame(frame, ret[1], compressionDesc)
+    assert 1 == apiCalls["PxLDecompressFrame"]
+
+
+def test_cameraXmlSizeIsForgottenWithTheGeometry(hCamera, apiCalls):
+    xml = PxLApi.getCameraXml(hCamera)[1].value
+    for i in range(2):
+        assert xml == PxLApi.getCameraXml(hCamera)[1].value
+    assert 1 + 3 == apiCalls["PxLGetCameraXML"]
+    # A feature that leaves the frame geometry alone keeps the size
+    setFeature(hCamera, PxLApi.FeatureId.EXPOSURE, [0.01])
+    PxLApi.getCameraXml(hCamera)
+    assert 1 + 4 == apiCalls["PxLGetCameraXML"]
+    setFeature(hCamera, PxLApi.FeatureId.ROI, [0, 0, 32, 16])
+    assert ("getCameraXml", hCamera) not in PxLApi._outputSizes
+    assert xml == PxLApi.getCameraXml(hCamera)[1].value
+    assert 1 + 4 + 2 == apiCalls["PxLGetCameraXML"]
@@ -0,0 +1,62 @@
+import numpy
+import pytest
+from pixelinkWrapper import PxLApi, unpack10, unpack12, unpackFrame
+from pixelinkWrapper.packedPixels import haveCompiledUnpackers, packedRowSize, unpackReference
+
+compiledChoices = [False, True] if haveCompiledUnpackers else [False]
+
+
+def _packed(width, height, bitsPerPixel, rowStride=None):
+    rowStride = rowStride or packedRowSize(width, bitsPerPixel)
+    return numpy.random.default_rng(width * height).integers(0, 256, rowStride * height, numpy.uint8)
+
+
+@pytest.mark.parametrize("compiled", compiledChoices)
+@pytest.mark.parametrize("msFirst", [False, True])
+@pytest.mark.parametrize("width", [2, 5, 8, 13])
+def test_unpack12(width, msFirst, compiled):
+    packed = _packed(width, 3, 12)
+    expected = unpackReference(packed, width, 3, 12, msFirst=msFirst)
+    assert (expected == unpack12(packed, width, 3, msFirst=msFirst, compiled=compiled)).all()
+    assert expected.max() <= 4095
+
+
+@pytest.mark.parametrize("compiled", compiledChoices)
+@pytest.mark.parametrize("width", [4, 5, 7, 16])
+def test_unpack10(width, compiled):
+    packed = _packed(width, 3, 10)
+    expected = unpackReference(packed, width, 3, 10)
+    assert (expected == unpack10(packed, width, 3, compiled=compiled)).all()
+    assert expected.max() <= 1023
+
+
+def test_defaultsAgree():
+    packed = _packed(6, 2, 12)
+    assert (unpackReference(packed, 6, 2, 12) == unpack12(packed, 6, 2)).all()
+
+
+@pytest.mark.parametrize("compiled", compiledChoices)
+def test_rowStrideAndOut(compiled):
+    rowStride = packedRowSize(6, 12) + 7
+    packed = _packed(6, 4, 12, rowStride)
+    big = numpy.zeros((10, 10), numpy.uint16)
+    out = big[2:6, 3:9]
+    unpack12(packed, 6, 4, out=out, rowStride=rowStride, compiled=compiled)
+    assert (unpackReference(packed, 6, 4, 12, rowStride=rowStride) == out).all()
+    assert 0 == big[:2].sum() and 0 == big[6:].sum()
+
+
+def test_knownValues():
+    # LS first: 0xABC and 0x123; MS first: the same two pixels as a big endian bit stream
+    assert [0xABC, 0x123] == list(unpack12(numpy.array([0xAB, 0x3C, 0x12], numpy.uint8), 2, 1)[0])
+    assert [0xABC, 0x123] == list(unpack12(numpy.array([0xAB, 0xC1, 0x23], numpy.uint8), 2, 1, msFirst=True)[0])
+    assert [0x3FF, 0, 0x3FF, 0] == list(unpack10(numpy.array([0xFF, 0xC0, 0x0F, 0xFC, 0x00], numpy.uint8), 4, 1)[0])
+
+
+def test_unpackFrameRejectsUnpacked():
+    frameDesc = PxLApi.createFrameDesc()
+    frameDesc.PixelFormat.fValue = PxLApi.PixelFormat.MONO8
+    frameDesc.Roi.fWidth = frameDesc.Roi.fHeight = 2
+    frameDesc.PixelAddressingValue.fHorizontal = frameDesc.PixelAddressingValue.fVertical = 1
+    with pytest.raises(ValueError):
+        unpackFrame(numpy.zeros(4, numpy.uint8), frameDesc)
@@ -0,0 +1,99 @@
+import os
+import numpy
+import pytest
+from pixelinkWrapper import PxLApi, RawRecordingWriter, RawRecordingReader, getFrameGeometry
+
+
+def frameGeometry(hCamera):
+    ret = getFrameGeometry(hCamera)
+    assert PxLApi.apiSuccess(ret[0])
+    return ret[1]
+
+
+@pytest.fixture
+def recording(streamingCamera, tmp_path):
+    """
+    The file name of a closed recording of 5 frames of the simulated camera, with room for 8.
+    """
+    fileName = str(tmp_path / "frames.pxlr")
+    with RawRecordingWriter(fileName, frameGeometry(streamingCamera), 8) as writer:
+        assert 5 == writer.record(streamingCamera, 5)
+    return fileName
+
+
+def test_record(recording, expectedFrame):
+    # The unused slots are trimmed off
+    assert 4096 + 5 * 64 * 48 == os.path.getsize(recording)
+    with RawRecordingReader(recording) as reader:
+        assert 5 == len(reader)
+        assert (48, 64) == reader.geometry.numPyShape()
+        frameNumbers = reader.index["u64FrameNumber"].tolist()
+        assert sorted(set(frameNumbers)) == frameNumbers
+        for frameNumber, frame in zip(frameNumbers, reader):
+            assert (expectedFrame(frameNumber) == frame).all()
+        assert not reader[0].flags.writeable
+
+
+def test_randomAccess(recording, expectedFrame):
+    with RawRecordingReader(recording) as reader:
+        frameNumbers = reader.index["u64FrameNumber"].tolist()
+        for index in (3, 0, -1, 2):
+            assert (expectedFrame(frameNumbers[index]) == reader[index]).all()
+        assert 3 == reader.findFrameNumber(frameNumbers[3])
+        assert None == reader.findFrameNumber(frameNumbers[-1] + 100)
+        with pytest.raises(IndexError):
+            reader[5]
+        frame = reader[4]
+    # A frame outlives its reader
+    assert (expectedFrame(frameNumbers[4]) == frame).all()
+
+
+def test_append(hCamera, tmp_path):
+    fileName = str(tmp_path / "appended.pxlr")
+    frameDesc = PxLApi.createFrameDesc()
+    frames = numpy.random.default_rng(1).integers(0, 256, (3, 48, 64), numpy.uint8)
+    with RawRecordingWriter(fileName, frameGeometry(hCamera), 3) as writer:
+        for frameNumber, frame in enumerate(frames):
+            frameDesc.u64FrameNumber = frameNumber
+            frameDesc.Shutter.fValue = 0.5
+            assert frameNumber == writer.append(frame, frameDesc)
+        assert writer.isFull()
+        with pytest.raises(ValueError):
+            writer.append(frames[0], frameDesc)
+    with RawRecordingReader(fileName) as reader:
+        assert (frames == numpy.array(list(reader))).all()
+        assert [0, 1, 2] == reader.index["u64FrameNumber"].tolist()
+        assert (0.5 == reader.index["shutter"]).all()
+
+
+def test_readWhileRecording(streamingCamera, tmp_path, expectedFrame):
+    fileName = str(tmp_path / "unclosed.pxlr")
+    writer = RawRecordingWriter(fileName, frameGeometry(streamingCamera), 8)
+    try:
+        writer.record(streamingCamera, 3)
+        with RawRecordingReader(fileName) as reader:
+            assert 3 == len(reader)
+            assert (expectedFrame(int(reader.index["u64FrameNumber"][-1])) == reader[-1]).all()
+    finally:
+        writer.close()
+
+
+def test_errors(streamingCamera, simulatedCamera, tmp_path):
+    fileName = str(tmp_path / "errors.pxlr")
+    with RawRecordingWriter(fileName, frameGeometry(streamingCamera), 8) as writer:
+        # A frame that fails is skipped, but a lost camera ends the recording
+        simulatedCamera.injectError("PxLGetNextFrame", PxLApi.ReturnCode.ApiBufferTooSmall)
+        assert 2 == writer.record(streamingCamera, 2)
+        assert 1 == writer.errorCount
+        simulatedCamera.injectError("PxLGetNextFrame", PxLApi.ReturnCode.ApiNoCameraError)
+        with pytest.raises(PxLApi.ApiError) as error:
+            writer.record(streamingCamera)
+        assert PxLApi.ReturnCode.ApiNoCameraError == error.value.rc
+        assert 2 == writer.frameCount
+        assert 2 == writer.errorCount
+    with RawRecordingReader(fileName) as reader:
+        assert 2 == len(reader)
+    with open(fileName, "wb") as file:
+        file.write(b"RIFF" + bytes(100))
+    with pytest.raises(ValueError):
+        RawRecordingReader(fileName)
@@ -0,0 +1,72 @@
+import pytest
+import threading
+from pixelinkWrapper import PxLApi, SimulatedApi
+
+
+def test_initialize(hCamera, simulatedCamera):
+    assert simulatedCamera.hCamera == hCamera
+
+
+def test_getNextFrame(streamingCamera, expectedFrame):
+    frame = PxLApi.createByteAlignedBuffer(64 * 48, 64)
+    frameNumbers = []
+    for i in range(3):
+        ret = PxLApi.getNextFrame(streamingCamera, frame)
+        assert PxLApi.apiSuccess(ret[0])
+        frameNumbers.append(ret[1].u64FrameNumber)
+        assert expectedFrame(ret[1].u64FrameNumber).tobytes() == bytes(frame)
+    assert [0, 1, 2] == frameNumbers
+
+
+@pytest.mark.parametrize("simulatedCamera", [{"sensorWidth": 32, "sensorHeight": 16}], indirect=True)
+def test_cameraArguments(hCamera, simulatedCamera):
+    assert (32, 16, PxLApi.PixelFormat.MONO8, 32 * 16) == simulatedCamera.frameGeometry()
+    assert 32 * 16 == len(simulatedCamera.frameData(0))
+
+
+def test_injectedError(hCamera, simulatedCamera):
+    simulatedCamera.injectError("PxLGetFeature", PxLApi.ReturnCode.ApiCameraTimeoutError)
+    assert PxLApi.ReturnCode.ApiCameraTimeoutError == PxLApi.getFeature(hCamera, PxLApi.FeatureId.SHUTTER)[0]
+    assert PxLApi.apiSuccess(PxLApi.getFeature(hCamera, PxLApi.FeatureId.SHUTTER)[0])
+
+
+def test_raiseEvent(hCamera, simulatedCamera):
+    events = []
+
+    @PxLApi._eventProcessFunction
+    def eventCallback(hCamera, eventId, eventTimestamp, numDataBytes, data, userData):
+        events.append(eventId)
+        return PxLApi.ReturnCode.ApiSuccess
+
+    assert PxLApi.apiSuccess(PxLApi.setEventCallback(hCamera, PxLApi.EventId.ANY, 0, eventCallback)[0])
+    simulatedCamera.raiseEvent(PxLApi.EventId.FRAMES_SKIPPED)
+    PxLApi.setEventCallback(hCamera, PxLApi.EventId.ANY, 0, None)
+    simulatedCamera.raiseEvent(PxLApi.EventId.FRAMES_SKIPPED)
+    assert [PxLApi.EventId.FRAMES_SKIPPED] == events
+
+
+def test_compressedFrameCallback(hCamera):
+    ret = PxLApi.setFeature(hCamera, PxLApi.FeatureId.COMPRESSION, PxLApi.FeatureFlags.MANUAL,
+                            [PxLApi.PixelFormat.MONO8, PxLApi.CompressionStrategy.PIXELINK10])
+    assert PxLApi.apiSuccess(ret[0])
+    compressionInfo = PxLApi.CompressionInfoPixelink10()
+    called = threading.Event()
+
+    @PxLApi._dataProcessFunction
+    def compressedFrameCallback(hCamera, frameData, dataFormat, frameDesc, userData):
+        called.set()
+        return PxLApi.ReturnCode.ApiSuccess
+
+    ret = PxLApi.setCallback(hCamera, PxLApi.Callback.COMPRESSED_FRAME, compressionInfo, compressedFrameCallback)
+    assert PxLApi.apiSuccess(ret[0])
+    assert PxLApi.apiSuccess(PxLApi.setStreamState(hCamera, PxLApi.StreamState.START)[0])
+    assert called.wait(5)
+    PxLApi.setStreamState(hCamera, PxLApi.StreamState.STOP)
+    PxLApi.setCallback(hCamera, PxLApi.Callback.COMPRESSED_FRAME, compressionInfo, None)
+    # The compression descriptor is written into the CompressionInfo passed to setCallback
+    assert any(compressionInfo.CompressionDesc)
+
+
+def test_simulatorBackendFromEnvironment(monkeypatch):
+    monkeypatch.setenv("PIXELINK_API_BACKEND", "simulator")
+    assert isinstance(PxLApi._ApiLoader()._load(), SimulatedApi)
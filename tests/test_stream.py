@@ -0,0 +1,19 @@
+import pytest
+from pixelinkWrapper import PxLApi
+
+
+def test_streamReusesFrameDescs(hCamera, monkeypatch):
+    created = []
+    createFrameDesc = PxLApi.createFrameDesc
+    monkeypatch.setattr(PxLApi, "createFrameDesc", lambda: created.append(1) or createFrameDesc())
+    frameNumbers = [frameDesc.u64FrameNumber for frame, frameDesc in PxLApi.stream(hCamera, count=20, bufferCount=2)]
+    assert list(range(20)) == frameNumbers
+    assert 2 == len(created)
+
+
+def test_streamRetriesTimeouts(hCamera, simulatedCamera):
+    simulatedCamera.injectError("PxLGetNextFrame", PxLApi.ReturnCode.ApiCameraTimeoutError, count=3)
+    assert 1 == len(list(PxLApi.stream(hCamera, count=1, maxTries=4)))
+    simulatedCamera.injectError("PxLGetNextFrame", PxLApi.ReturnCode.ApiCameraTimeoutError, count=4)
+    with pytest.raises(PxLApi.ApiError):
+        list(PxLApi.stream(hCamera, count=1, maxTries=4))
@@ -0,0 +1,65 @@
+from pixelinkWrapper import PxLApi, StreamHealth
+
+
+def _frameDesc(frameNumber):
+    frameDesc = PxLApi.createFrameDesc()
+    frameDesc.u64FrameNumber = frameNumber
+    return frameDesc
+
+
+def test_cameraTimeoutsCounted(streamingCamera, simulatedCamera):
+    frame = PxLApi.createByteAlignedBuffer(64 * 48, 64)
+    frameDesc = PxLApi.createFrameDesc()
+    health = StreamHealth(streamingCamera)
+    simulatedCamera.injectError("PxLGetNextFrame", PxLApi.ReturnCode.ApiCameraTimeoutError, count=2)
+    for i in range(5):
+        health.update(PxLApi.getNextFrame(streamingCamera, frame, frameDesc))
+    health.update((PxLApi.ReturnCode.ApiTimeoutError,))
+    assert 3 == health.framesReceived
+    assert 3 == health.timeouts
+    assert 0 == health.errorCount
+    assert 3 == health.windowStats()[health.windows[0]]["timeouts"]
+
+
+def test_errorsCounted(streamingCamera, simulatedCamera):
+    frame = PxLApi.createByteAlignedBuffer(64 * 48, 64)
+    health = StreamHealth(streamingCamera)
+    simulatedCamera.injectError("PxLGetNextFrame", PxLApi.ReturnCode.ApiNoCameraError)
+    health.update(PxLApi.getNextFrame(streamingCamera, frame))
+    assert (0, 1, PxLApi.ReturnCode.ApiNoCameraError) == (health.timeouts, health.errorCount, health.lastError)
+
+
+def test_gapsCounted():
+    health = StreamHealth()
+    for frameNumber in (0, 1, 4, 5, 9):
+        health.update((PxLApi.ReturnCode.ApiSuccess, _frameDesc(frameNumber)))
+    health.update((PxLApi.ReturnCode.ApiSuccessWithFrameLoss, _frameDesc(10)))
+    assert (6, 6, 3, 1) == (health.framesReceived, health.framesLost, health.gaps, health.lossReports)
+    assert 6 / 12 == health.lossRate()
+    health.reset()
+    assert None == health.lossRate()
+
+
+def test_thresholdCalledOncePerBreach(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("pixelinkWrapper.streamHealth.time.monotonic", lambda: now[0])
+    breaches = []
+    health = StreamHealth(windows=(1.0,), threshold=0.25,
+                          onThreshold=lambda health, window, lossRate: breaches.append((window, lossRate)))
+    frameNumber = 0
+    for step in range(30):
+        now[0] += 0.1
+        # Half of the frames are lost during the second tenth of the steps
+        frameNumber += 2 if 10 <= step < 20 else 1
+        health.update((PxLApi.ReturnCode.ApiSuccess, _frameDesc(frameNumber)))
+    assert 1 == len(breaches)
+    assert 1.0 == breaches[0][0]
+    assert 0.25 < breaches[0][1]
+
+
+def test_framesSkippedEvents(streamingCamera, simulatedCamera):
+    with StreamHealth(streamingCamera) as health:
+        simulatedCamera.raiseEvent(PxLApi.EventId.FRAMES_SKIPPED)
+        simulatedCamera.raiseEvent(PxLApi.EventId.FRAMES_SKIPPED)
+    simulatedCamera.raiseEvent(PxLApi.EventId.FRAMES_SKIPPED)
+    assert 2 == health.framesSkippedEvents
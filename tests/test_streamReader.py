@@ -0,0 +1,67 @@
+import time
+import pytest
+from pixelinkWrapper import PxLApi, StreamReader
+
+
+def _frameNumber(item):
+    return item[1].u64FrameNumber
+
+
+@pytest.mark.parametrize("count", [2, 3])
+def test_blockDoesNotOverwriteHeldFrame(hCamera, count):
+    with StreamReader(hCamera, count=count, policy=StreamReader.Policy.BLOCK) as reader:
+        lastFrameNumber = None
+        for i in range(50):
+            frame, frameDesc = reader.next(timeout=5)
+            frameNumber = frameDesc.u64FrameNumber
+            pixels = frame.copy()
+            time.sleep(0.002) # Lets the acquisition thread catch up, and block
+            assert frameNumber == frameDesc.u64FrameNumber
+            assert (pixels == frame).all()
+            if None != lastFrameNumber:
+                assert lastFrameNumber + 1 == frameNumber # Nothing is lost in the ring
+            lastFrameNumber = frameNumber
+    assert 0 == reader.framesOverwritten
+
+
+def test_overwriteKeepsLatestFrames(hCamera):
+    with StreamReader(hCamera, count=3, policy=StreamReader.Policy.OVERWRITE) as reader:
+        first = _frameNumber(reader.next(timeout=5))
+        time.sleep(0.05)
+        frame, frameDesc = reader.latest(timeout=5)
+        frameNumber = frameDesc.u64FrameNumber
+        pixels = frame.copy()
+        assert frameNumber > first + 3
+        time.sleep(0.01)
+        assert frameNumber == frameDesc.u64FrameNumber
+        assert (pixels == frame).all()
+        # next picks up after the frame handed out last, in order
+        assert _frameNumber(reader.next(timeout=5)) > frameNumber
+    assert 0 < reader.framesOverwritten
+
+
+def test_nextInOrder(hCamera):
+    with StreamReader(hCamera, count=4) as reader:
+        frameNumbers = [_frameNumber(reader.next(timeout=5)) for i in range(20)]
+    assert frameNumbers == sorted(frameNumbers)
+    assert len(set(frameNumbers)) == len(frameNumbers)
+
+
+def test_stopEndsFrames(hCamera):
+    reader = StreamReader(hCamera, count=2, policy=StreamReader.Policy.BLOCK)
+    reader.start()
+    assert None != reader.next(timeout=5)
+    reader.stop()
+    while None != reader.next(timeout=0):
+        pass
+    assert not reader.isRunning()
+
+
+def test_fatalErrorIsRaised(hCamera, simulatedCamera):
+    with StreamReader(hCamera, count=2, policy=StreamReader.Policy.BLOCK) as reader:
+        assert None != reader.next(timeout=5)
+        simulatedCamera.injectError("PxLGetNextFrame", PxLApi.ReturnCode.ApiNoCameraError)
+        with pytest.raises(PxLApi.ApiError) as e:
+            while True:
+                reader.next(timeout=5)
+    assert PxLApi.ReturnCode.ApiNoCameraError == e.value.rc